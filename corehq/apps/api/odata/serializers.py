@@ -78,14 +78,16 @@ class ODataBaseSerializer(Serializer):
         if not table.selected:
             return []
 
+        row_extractor = table.get_row_extractor(
+            split_columns=config.split_multiselects,
+            transform_dates=config.transform_dates,
+            as_json=True,
+        )
         data = []
         for row_number, document in enumerate(documents):
-            rows = table.get_rows(
+            rows = row_extractor.get_rows(
                 document,
                 document.get('_id'),  # needed because of pagination
-                split_columns=config.split_multiselects,
-                transform_dates=config.transform_dates,
-                as_json=True,
             )
             data.extend(rows)
         return data
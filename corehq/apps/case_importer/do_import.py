@@ -1,7 +1,12 @@
 import time
 import uuid
 from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
@@ -12,17 +17,21 @@ from casexml.apps.case.mock import CaseBlock, CaseBlockError
 from corehq.apps.receiverwrapper.rate_limiter import rate_limit_submission
 from corehq.util.timer import TimingContext
 from couchexport.export import SCALAR_NEVER_WAS
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from soil.progress import TaskProgressManager
 
 from corehq.apps.case_importer.exceptions import CaseRowError
 from corehq.apps.export.tasks import add_inferred_export_properties
+from corehq.apps.groups.dbaccessors import stale_groups_by_name
 from corehq.apps.groups.models import Group
 from corehq.apps.hqcase.utils import submit_case_blocks
 from corehq.apps.locations.models import SQLLocation
-from corehq.apps.users.cases import get_wrapped_owner
+from corehq.apps.users.cases import get_wrapped_owner, get_wrapped_owners
+from corehq.apps.users.dbaccessors.all_commcare_users import get_user_docs_by_username
 from corehq.apps.users.models import CouchUser
 from corehq.apps.users.util import format_username
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.toggles import BULK_UPLOAD_DATE_OPENED
 from corehq.util.metrics.load_counters import case_load_counter
 from corehq.util.soft_assert import soft_assert
@@ -33,12 +42,16 @@ from .const import LookupErrors
 from .util import EXTERNAL_ID, RESERVED_FIELDS, lookup_case
 
 CASEBLOCK_CHUNKSIZE = 100
+READ_AHEAD_ROWS = 1000
 RowAndCase = namedtuple('RowAndCase', ['row', 'case'])
 ALL_LOCATIONS = 'ALL_LOCATIONS'
 
 
 def do_import(spreadsheet, config, domain, task=None, record_form_callback=None):
-    importer = _TimedAndThrottledImporter(domain, config, task, record_form_callback)
+    if settings.CASE_IMPORTER_SUBMISSION_WORKERS > 1:
+        importer = _PipelinedImporter(domain, config, task, record_form_callback)
+    else:
+        importer = _TimedAndThrottledImporter(domain, config, task, record_form_callback)
     return importer.do_import(spreadsheet)
 
 
@@ -52,39 +65,86 @@ class _Importer(object):
         self.results = _ImportResults()
 
         self.owner_accessor = _OwnerAccessor(domain, self.user)
+        self.case_lookup = _CaseLookup(domain)
         self.uncreated_external_ids = set()
+        self._unsubmitted_external_ids = set()
         self._unsubmitted_caseblocks = []
 
     def do_import(self, spreadsheet):
         with TaskProgressManager(self.task, src="case_importer") as progress_manager:
-            for row_num, row in enumerate(spreadsheet.iter_row_dicts(), start=1):
-                progress_manager.set_progress(row_num - 1, spreadsheet.max_row)
-                if row_num == 1:
-                    continue  # skip first row (header row)
+            raw_rows = enumerate(spreadsheet.iter_row_dicts(), start=1)
+            for raw_rows_window in chunked(raw_rows, READ_AHEAD_ROWS):
+                for row_num, row in self.read_ahead(raw_rows_window):
+                    progress_manager.set_progress(row_num - 1, spreadsheet.max_row)
+                    if row is None:
+                        continue
+
+                    try:
+                        if isinstance(row, exceptions.CaseRowError):
+                            raise row
+                        self.import_row(row_num, row)
+                    except exceptions.CaseRowError as error:
+                        self.results.add_error(row_num, error)
+
+            self.commit_caseblocks()
+            self.wait_for_submissions()
+            return self.results.to_json()
+
+    def read_ahead(self, raw_rows):
+        """Parse a window of rows and resolve their cases and owners in bulk
 
+        :param raw_rows: A list of `(row_num, raw_row)` pairs.
+        :returns: A list of `(row_num, row)` pairs where `row` is a
+        `_CaseImportRow`, a `CaseRowError` raised while parsing it or
+        `None` if the row should be skipped.
+        """
+        rows = []
+        for row_num, raw_row in raw_rows:
+            if row_num == 1:
+                row = None  # skip first row (header row)
+            else:
                 try:
-                    self.import_row(row_num, row)
+                    row = self.parse_row(raw_row)
                 except exceptions.CaseRowError as error:
-                    self.results.add_error(row_num, error)
+                    row = error
+            rows.append((row_num, row))
 
-            self.commit_caseblocks()
-            return self.results.to_json()
+        parsed_rows = [row for row_num, row in rows if isinstance(row, _CaseImportRow)]
+        self.case_lookup.prefetch(
+            self.config.search_field,
+            self.config.case_type,
+            [row.search_id for row in parsed_rows],
+        )
+        parent_ids = defaultdict(list)
+        for row in parsed_rows:
+            parent_ids['case_id', row.parent_type].append(row.parent_id)
+            parent_ids[EXTERNAL_ID, row.parent_type].append(row.parent_external_id)
+        for (search_field, case_type), search_ids in parent_ids.items():
+            self.case_lookup.prefetch(search_field, case_type, search_ids)
+        self.owner_accessor.prefetch(
+            names=[row.uploaded_owner_name for row in parsed_rows],
+            owner_ids=[row.uploaded_owner_id for row in parsed_rows if not row.uploaded_owner_name],
+        )
+        return rows
 
-    def import_row(self, row_num, raw_row):
+    def parse_row(self, raw_row):
         search_id = _parse_search_id(self.config, raw_row)
         fields_to_update = _populate_updated_fields(self.config, raw_row)
         if not any(fields_to_update.values()):
             # if the row was blank, just skip it, no errors
-            return
+            return None
 
-        row = _CaseImportRow(
+        return _CaseImportRow(
             search_id=search_id,
             fields_to_update=fields_to_update,
             config=self.config,
             domain=self.domain,
             user_id=self.user.user_id,
             owner_accessor=self.owner_accessor,
+            case_lookup=self.case_lookup,
         )
+
+    def import_row(self, row_num, row):
         if row.relies_on_uncreated_case(self.uncreated_external_ids):
             self.commit_caseblocks()
         if row.is_new_case and not self.config.create_new_cases:
@@ -102,6 +162,10 @@ class _Importer(object):
         except CaseBlockError:
             raise exceptions.CaseGeneration()
 
+        if row.external_id:
+            self._unsubmitted_external_ids.add(row.external_id)
+        if not row.is_new_case and row.existing_case.external_id:
+            self._unsubmitted_external_ids.add(row.existing_case.external_id)
         self.add_caseblock(RowAndCase(row_num, caseblock))
 
     @cached_property
@@ -120,41 +184,57 @@ class _Importer(object):
             self.results.num_chunks += 1
             self._unsubmitted_caseblocks = []
             self.uncreated_external_ids = set()
+            # lookups read ahead of this chunk may be stale now
+            self.case_lookup.forget(self._unsubmitted_external_ids)
+            self._unsubmitted_external_ids = set()
 
     def submit_and_process_caseblocks(self, caseblocks):
         if not caseblocks:
             return
         self.pre_submit_hook()
         try:
-            form, cases = self.submit_case_blocks(caseblocks)
-            if form.is_error:
-                raise Exception("Form error during case import: {}".format(form.problem))
+            form, cases = self._submit_caseblocks(caseblocks)
         except Exception:
-            notify_exception(None, "Case Importer: Uncaught failure submitting caseblocks")
-            for row_number, case in caseblocks:
-                self.results.add_error(row_number, exceptions.ImportErrorMessage())
+            self._process_failed_submission(caseblocks)
         else:
-            if self.record_form_callback:
-                self.record_form_callback(form.form_id)
-            properties = {p for c in cases for p in c.dynamic_case_properties().keys()}
-            if self.config.case_type and len(properties):
-                add_inferred_export_properties.delay(
-                    'CaseImporter',
-                    self.domain,
-                    self.config.case_type,
-                    properties,
-                )
-            else:
-                _soft_assert = soft_assert(notify_admins=True)
-                _soft_assert(
-                    len(properties) == 0,
-                    'error adding inferred export properties in domain '
-                    '({}): {}'.format(self.domain, ", ".join(properties))
-                )
+            self._process_submission(form, cases)
+
+    def _submit_caseblocks(self, caseblocks):
+        form, cases = self.submit_case_blocks(caseblocks)
+        if form.is_error:
+            raise Exception("Form error during case import: {}".format(form.problem))
+        return form, cases
+
+    def _process_failed_submission(self, caseblocks):
+        notify_exception(None, "Case Importer: Uncaught failure submitting caseblocks")
+        for row_number, case in caseblocks:
+            self.results.add_error(row_number, exceptions.ImportErrorMessage())
+
+    def _process_submission(self, form, cases):
+        if self.record_form_callback:
+            self.record_form_callback(form.form_id)
+        properties = {p for c in cases for p in c.dynamic_case_properties().keys()}
+        if self.config.case_type and len(properties):
+            add_inferred_export_properties.delay(
+                'CaseImporter',
+                self.domain,
+                self.config.case_type,
+                properties,
+            )
+        else:
+            _soft_assert = soft_assert(notify_admins=True)
+            _soft_assert(
+                len(properties) == 0,
+                'error adding inferred export properties in domain '
+                '({}): {}'.format(self.domain, ", ".join(properties))
+            )
 
     def pre_submit_hook(self):
         pass
 
+    def wait_for_submissions(self):
+        pass
+
     def submit_case_blocks(self, caseblocks):
         return submit_case_blocks(
             [cb.case.as_text() for cb in caseblocks],
@@ -194,6 +274,12 @@ class _TimedAndThrottledImporter(_Importer):
             'commcare.case_importer.duration_per_case', active_duration_per_case,
             buckets=[50, 70, 100, 150, 250, 350, 500], bucket_tag='duration', bucket_unit='ms',
         )
+        if active_duration > 0:
+            metrics_histogram(
+                'commcare.case_importer.rows_per_second',
+                (rows_created + rows_updated + rows_failed) / active_duration,
+                buckets=[1, 5, 10, 25, 50, 100, 250], bucket_tag='rate', bucket_unit='',
+            )
 
         for rows, status in ((rows_created, 'created'),
                              (rows_updated, 'updated'),
@@ -230,14 +316,113 @@ class _TimedAndThrottledImporter(_Importer):
                 self._last_submission_duration = timer.duration
 
 
+class _PipelinedImporter(_TimedAndThrottledImporter):
+    """Importer that submits caseblock chunks concurrently
+
+    Rows are parsed and turned into caseblocks in order on the importing
+    thread while chunks are submitted on a pool of
+    `CASE_IMPORTER_SUBMISSION_WORKERS` threads. Chunks are only ordered
+    where they depend on each other: a chunk is not submitted before
+    earlier chunks touching any of the same cases have been, and a row
+    referring to an external id created or changed by a chunk in flight
+    waits for that chunk before its cases are looked up.
+    """
+
+    def __init__(self, domain, config, task, record_form_callback):
+        super().__init__(domain, config, task, record_form_callback)
+        self._executor = None
+        self._submissions = {}  # future -> (caseblocks, external ids)
+        self._futures_by_case_id = {}
+        self._futures_by_external_id = {}
+
+    def do_import(self, spreadsheet):
+        with ThreadPoolExecutor(
+            max_workers=settings.CASE_IMPORTER_SUBMISSION_WORKERS,
+            thread_name_prefix='case-import',
+        ) as self._executor:
+            return super().do_import(spreadsheet)
+
+    def import_row(self, row_num, row):
+        if row.relies_on_uncreated_case(self.uncreated_external_ids):
+            self.commit_caseblocks()
+        self._wait_for({
+            self._futures_by_external_id[lookup_id]
+            for lookup_id in [row.search_id, row.parent_id, row.parent_external_id]
+            if lookup_id in self._futures_by_external_id
+        })
+        super().import_row(row_num, row)
+
+    def commit_caseblocks(self):
+        if not self._unsubmitted_caseblocks:
+            return
+        caseblocks = self._unsubmitted_caseblocks
+        external_ids = self._unsubmitted_external_ids
+        case_ids = {caseblock.case.case_id for caseblock in caseblocks}
+        dependencies = {
+            self._futures_by_case_id[case_id]
+            for case_id in case_ids if case_id in self._futures_by_case_id
+        }
+        # throttle on this thread so rate limiting delays all submissions
+        self.pre_submit_hook()
+        future = self._executor.submit(self._submit_in_thread, caseblocks, dependencies)
+        self._submissions[future] = (caseblocks, external_ids)
+        self._futures_by_case_id.update((case_id, future) for case_id in case_ids)
+        self._futures_by_external_id.update((external_id, future) for external_id in external_ids)
+
+        self.results.num_chunks += 1
+        self._unsubmitted_caseblocks = []
+        self.uncreated_external_ids = set()
+        self._unsubmitted_external_ids = set()
+
+        self._wait_for(set())
+        while len(self._submissions) > 2 * settings.CASE_IMPORTER_SUBMISSION_WORKERS:
+            self._wait_for(set(self._submissions), return_when=FIRST_COMPLETED)
+
+    def wait_for_submissions(self):
+        self._wait_for(set(self._submissions))
+
+    def _submit_in_thread(self, caseblocks, dependencies):
+        wait(dependencies)
+        close_old_connections()
+        try:
+            return self._submit_caseblocks(caseblocks)
+        finally:
+            close_old_connections()
+
+    def _wait_for(self, futures, return_when=ALL_COMPLETED):
+        """Wait for submissions and process all that are done"""
+        if futures:
+            wait(futures, return_when=return_when)
+        for future in [future for future in self._submissions if future.done()]:
+            self._process_submission_result(future)
+
+    def _process_submission_result(self, future):
+        caseblocks, external_ids = self._submissions.pop(future)
+        try:
+            form, cases = future.result()
+        except Exception:
+            self._process_failed_submission(caseblocks)
+        else:
+            self._process_submission(form, cases)
+        # lookups read ahead while the chunk was in flight may be stale
+        self.case_lookup.forget(external_ids)
+        for case_id in {caseblock.case.case_id for caseblock in caseblocks}:
+            if self._futures_by_case_id.get(case_id) is future:
+                del self._futures_by_case_id[case_id]
+        for external_id in external_ids:
+            if self._futures_by_external_id.get(external_id) is future:
+                del self._futures_by_external_id[external_id]
+
+
 class _CaseImportRow(object):
-    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor):
+    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor, case_lookup):
         self.search_id = search_id
         self.fields_to_update = fields_to_update
         self.config = config
         self.domain = domain
         self.user_id = user_id
         self.owner_accessor = owner_accessor
+        self.case_lookup = case_lookup
 
         self.case_name = fields_to_update.pop('name', None)
         self.external_id = fields_to_update.pop('external_id', None)
@@ -262,10 +447,9 @@ class _CaseImportRow(object):
 
     @cached_property
     def existing_case(self):
-        case, error = lookup_case(
+        case, error = self.case_lookup.lookup(
             self.config.search_field,
             self.search_id,
-            self.domain,
             self.config.case_type
         )
         _log_case_lookup(self.domain)
@@ -293,8 +477,8 @@ class _CaseImportRow(object):
                 ('parent_external_id', 'external_id', self.parent_external_id),
         ]:
             if search_id:
-                parent_case, error = lookup_case(
-                    search_field, search_id, self.domain, self.parent_type)
+                parent_case, error = self.case_lookup.lookup(
+                    search_field, search_id, self.parent_type)
                 _log_case_lookup(self.domain)
                 if parent_case:
                     return {self.parent_ref: (parent_case.type, parent_case.case_id)}
@@ -346,6 +530,59 @@ def _log_case_lookup(domain):
     case_load_counter("case_importer", domain)
 
 
+class _CaseLookup(object):
+    """Looks up cases like `lookup_case`, using results fetched in bulk
+    by `prefetch` where available
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self._results = {}  # (search_field, case_type, search_id) -> (case, error)
+
+    def lookup(self, search_field, search_id, case_type):
+        try:
+            return self._results[search_field, case_type, search_id]
+        except KeyError:
+            return lookup_case(search_field, search_id, self.domain, case_type)
+
+    def prefetch(self, search_field, case_type, search_ids):
+        search_ids = {
+            search_id for search_id in search_ids
+            if search_id and (search_field, case_type, search_id) not in self._results
+        }
+        if not search_ids:
+            return
+        case_accessors = CaseAccessors(self.domain)
+        cases_by_id = defaultdict(list)
+        if search_field == 'case_id':
+            for case in case_accessors.get_cases(list(search_ids)):
+                if case.domain == self.domain and case.type == case_type:
+                    cases_by_id[case.case_id].append(case)
+        elif search_field == EXTERNAL_ID:
+            for case in case_accessors.get_cases_by_external_ids(list(search_ids), case_type=case_type):
+                cases_by_id[case.external_id].append(case)
+        else:
+            return
+
+        for search_id in search_ids:
+            cases = cases_by_id[search_id]
+            if not cases:
+                result = (None, LookupErrors.NotFound)
+            elif len(cases) > 1:
+                result = (None, LookupErrors.MultipleResults)
+            else:
+                result = (cases[0], None)
+            self._results[search_field, case_type, search_id] = result
+
+    def forget(self, search_ids):
+        """Discard prefetched results for the given ids"""
+        if search_ids:
+            self._results = {
+                key: result for key, result in self._results.items()
+                if key[2] not in search_ids
+            }
+
+
 def _convert_custom_fields_to_struct(config):
     excel_fields = config.excel_fields
     case_fields = config.case_fields
@@ -487,6 +724,68 @@ class _OwnerAccessor(object):
         self.id_cache = {}
         self.name_cache = {}
 
+    def prefetch(self, names, owner_ids):
+        """Resolve owner names and check owner ids in bulk
+
+        Results, including errors, are cached as if `get_id_from_name`
+        and `check_owner_id` had been called for each name and id.
+        """
+        names = {name for name in names if name and name not in self.name_cache}
+        if names:
+            # names not found here are left to get_id_from_name
+            owners = self._get_users_by_name(names)
+            owners.update(stale_groups_by_name(self.domain, names - set(owners)))
+            owners.update(self._get_locations_by_name(names - set(owners)))
+            for name, owner in owners.items():
+                if owner is not None:
+                    _cache_call(self._get_id_from_owner, owner, name, self.name_cache)
+
+        owner_ids = {owner_id for owner_id in owner_ids if owner_id and owner_id not in self.id_cache}
+        if owner_ids:
+            owners = get_wrapped_owners(owner_ids)
+            for owner_id, owner in owners.items():
+                _cache_call(self._check_owner_id_of, owner, owner_id, self.id_cache)
+
+    def _get_users_by_name(self, names):
+        names_by_username = {
+            name if '@' in name else format_username(name, self.domain): name
+            for name in names
+        }
+        docs_by_username = defaultdict(list)
+        for doc in get_user_docs_by_username(list(names_by_username)):
+            docs_by_username[doc['username']].append(doc)
+        return {
+            # leave duplicate usernames (None) to get_id_from_name to report
+            names_by_username[username]: CouchUser.wrap_correctly(docs[0]) if len(docs) == 1 else None
+            for username, docs in docs_by_username.items()
+            if username in names_by_username
+        }
+
+    def _get_locations_by_name(self, names):
+        """Get locations by site code, or name if no site code matches
+
+        Names matching more than one location map to a
+        `DuplicateLocationName` error.
+        """
+        by_site_code = {}
+        by_lower_name = defaultdict(list)
+        for location in SQLLocation.objects.annotate(lower_name=Lower('name')).filter(
+            Q(site_code__in=list(names)) | Q(lower_name__in=[name.lower() for name in names]),
+            domain=self.domain,
+        ):
+            by_site_code[location.site_code] = location
+            by_lower_name[location.lower_name].append(location)
+        locations = {}
+        for name in names:
+            matches = by_lower_name[name.lower()]
+            if name in by_site_code:
+                locations[name] = by_site_code[name]
+            elif len(matches) == 1:
+                locations[name] = matches[0]
+            elif matches:
+                locations[name] = exceptions.DuplicateLocationName()
+        return locations
+
     def get_id_from_name(self, name):
         return cached_function_call(self._get_id_from_name, name, self.name_cache)
 
@@ -519,6 +818,11 @@ class _OwnerAccessor(object):
                 raise exceptions.DuplicateLocationName()
 
         owner = get_user(name) or get_group(name) or get_location(name)
+        return self._get_id_from_owner(owner)
+
+    def _get_id_from_owner(self, owner):
+        if isinstance(owner, CaseRowError):
+            raise owner
         if not owner:
             raise exceptions.InvalidOwnerName('owner_name')
         self._check_owner(owner, 'owner_name')
@@ -535,6 +839,9 @@ class _OwnerAccessor(object):
         Returns True if owner ID is valid.
         """
         owner = get_wrapped_owner(owner_id)
+        self._check_owner_id_of(owner)
+
+    def _check_owner_id_of(self, owner):
         self._check_owner(owner, 'owner_id')
 
     def _check_owner(self, owner, owner_field):
@@ -567,6 +874,14 @@ class _OwnerAccessor(object):
         )
 
 
+def _cache_call(fn, param, key, cache):
+    """Calls fn(param), storing the result in cache[key], including CaseRowErrors"""
+    try:
+        cache[key] = fn(param)
+    except CaseRowError as err:
+        cache[key] = err
+
+
 def cached_function_call(fn, param, cache):
     """Calls fn(param), storing the result in cache, including CaseRowErrors"""
     if param in cache:
@@ -1,7 +1,10 @@
+import threading
+import time
 import uuid
 from contextlib import contextmanager
+from types import SimpleNamespace
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.dateparse import parse_datetime
 
 from celery import states
@@ -24,6 +27,7 @@ from corehq.apps.hqcase.dbaccessors import get_case_ids_in_domain
 from corehq.apps.locations.models import LocationType
 from corehq.apps.locations.tests.util import restrict_user_by_location
 from corehq.apps.users.models import CommCareUser, WebUser
+from corehq.apps.users.util import format_username
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.tests.utils import run_with_all_backends
 from corehq.util.test_utils import flag_enabled
@@ -445,6 +449,125 @@ class ImporterTest(TestCase):
         self.assertEqual(cases['Caroline'].owner_id, case_owner._id)
         self.assertEqual(cases['Caroline'].get_case_property('favorite_color'), 'yellow')
 
+    @run_with_all_backends
+    def test_read_ahead_looks_up_cases_and_owners_in_bulk(self):
+        case_owner = CommCareUser.create(self.domain, format_username('username', self.domain), 'pw')
+        self.addCleanup(case_owner.delete)
+        cases = self.factory.create_or_update_cases([
+            CaseStructure(attrs={'create': True, 'external_id': 'ext-{}'.format(i)})
+            for i in range(3)
+        ])
+        config = self._config(['external_id', 'favorite_color', 'owner_name'], search_field='external_id')
+        file = make_worksheet_wrapper(
+            ['external_id', 'favorite_color', 'owner_name'],
+            ['ext-0', 'blue', 'username'],
+            ['ext-1', 'red', 'username'],
+            ['ext-2', 'green', 'username'],
+        )
+        with patch('corehq.apps.case_importer.do_import.lookup_case') as lookup_case, \
+                patch('corehq.apps.case_importer.do_import.CouchUser.get_by_username') as get_by_username:
+            res = do_import(file, config, self.domain)
+        lookup_case.assert_not_called()
+        get_by_username.assert_not_called()
+        self.assertEqual(res['errors'], {})
+        self.assertEqual(3, res['match_count'])
+        for case in self.accessor.get_cases([case.case_id for case in cases]):
+            self.assertEqual(case.owner_id, case_owner._id)
+
+    @run_with_all_backends
+    @patch('corehq.apps.case_importer.do_import.READ_AHEAD_ROWS', 2)
+    def test_read_ahead_across_windows(self):
+        headers = ['external_id', 'age']
+        config = self._config(headers, search_field='external_id')
+        file = make_worksheet_wrapper(
+            headers,
+            ['ext-id', 'age-0'],
+            ['other-ext-id', 'age-1'],
+            ['ext-id', 'age-2'],
+            ['other-ext-id', 'age-3'],
+        )
+        res = do_import(file, config, self.domain)
+        self.assertEqual(2, res['created_count'])
+        self.assertEqual(2, res['match_count'])
+        self.assertFalse(res['errors'])
+        cases = {c.external_id: c for c in self.accessor.get_cases(self.accessor.get_case_ids_in_domain())}
+        self.assertEqual(set(cases), {'ext-id', 'other-ext-id'})
+        self.assertEqual(cases['ext-id'].get_case_property('age'), 'age-2')
+        self.assertEqual(cases['other-ext-id'].get_case_property('age'), 'age-3')
+
+    @override_settings(CASE_IMPORTER_SUBMISSION_WORKERS=3)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 1)
+    def test_pipelined_import_orders_chunks_by_case(self):
+        case_a, case_b = self.factory.create_or_update_cases([
+            CaseStructure(attrs={'create': True}),
+            CaseStructure(attrs={'create': True}),
+        ])
+        submitted = []
+
+        def submit_case_blocks(importer, caseblocks):
+            [case_id] = [caseblock.case.case_id for caseblock in caseblocks]
+            if case_id == case_a.case_id and case_id not in submitted:
+                time.sleep(0.5)
+            submitted.append(case_id)
+            return SimpleNamespace(is_error=False, form_id=uuid.uuid4().hex), []
+
+        with patch('corehq.apps.case_importer.do_import._Importer.submit_case_blocks', submit_case_blocks):
+            res = self.import_mock_file([
+                ['case_id', 'age'],
+                [case_a.case_id, 'age-0'],
+                [case_b.case_id, 'age-1'],
+                [case_a.case_id, 'age-2'],
+            ])
+        self.assertEqual(res['match_count'], 3)
+        self.assertEqual(res['num_chunks'], 3)
+        self.assertFalse(res['errors'])
+        # case B is not held up by case A; the second update to A waits for the first
+        self.assertEqual(submitted, [case_b.case_id, case_a.case_id, case_a.case_id])
+
+    @override_settings(CASE_IMPORTER_SUBMISSION_WORKERS=3)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 1)
+    def test_pipelined_import_reports_failed_chunks(self):
+        def submit_case_blocks(importer, caseblocks):
+            [caseblock] = caseblocks
+            if 'fail' in caseblock.case.as_text():
+                raise Exception("submission failed")
+            return SimpleNamespace(is_error=False, form_id=uuid.uuid4().hex), []
+
+        with patch('corehq.apps.case_importer.do_import._Importer.submit_case_blocks', submit_case_blocks):
+            res = self.import_mock_file([
+                ['case_id', 'age'],
+                ['', 'ok'],
+                ['', 'fail'],
+                ['', 'ok'],
+            ])
+        self.assertEqual(res['created_count'], 2)
+        error = exceptions.ImportErrorMessage.title
+        self.assertEqual(res['errors'][error][None]['rows'], [3])
+
+    @override_settings(CASE_IMPORTER_SUBMISSION_WORKERS=3)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 1)
+    def test_pipelined_import_rate_limits_on_importing_thread(self):
+        importing_thread = threading.current_thread()
+        hook_threads = []
+
+        def pre_submit_hook(importer):
+            hook_threads.append(threading.current_thread())
+
+        def submit_case_blocks(importer, caseblocks):
+            return SimpleNamespace(is_error=False, form_id=uuid.uuid4().hex), []
+
+        with patch('corehq.apps.case_importer.do_import._TimedAndThrottledImporter.pre_submit_hook',
+                   pre_submit_hook), \
+                patch('corehq.apps.case_importer.do_import._Importer.submit_case_blocks', submit_case_blocks):
+            res = self.import_mock_file([
+                ['case_id', 'age'],
+                ['', 'age-0'],
+                ['', 'age-1'],
+                ['', 'age-2'],
+            ])
+        self.assertEqual(res['created_count'], 3)
+        self.assertEqual(hook_threads, [importing_thread] * 3)
+
     def test_user_can_access_location(self):
         with make_business_units(self.domain) as (inc, dsi, dsa), \
                 restrict_user_to_location(self, dsa):
@@ -0,0 +1,175 @@
+import uuid
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from kafka.future import Future
+from mock import patch
+
+from pillowtop.feed.interface import ChangeMeta
+
+from corehq.apps.change_feed import topics
+from corehq.apps.change_feed.producer import (
+    CHANGE_ERROR,
+    CHANGE_PRE_SEND,
+    CHANGE_SENT,
+    KAFKA_AUDIT_LOGGER,
+    ChangeProducer,
+    producer,
+)
+from corehq.form_processor.backends.sql.processor import FormProcessorSQL
+from corehq.form_processor.exceptions import KafkaPublishingError
+from corehq.form_processor.interfaces.processor import ProcessedForms
+from corehq.util.test_utils import capture_log_output
+
+
+class FakeFuture(Future):
+
+    def __init__(self, kafka_producer):
+        super(FakeFuture, self).__init__()
+        self.kafka_producer = kafka_producer
+
+    def get(self, timeout=None):
+        if not self.is_done:
+            self.kafka_producer.round_trip()
+        if self.failed():
+            raise self.exception
+        return self.value
+
+
+class FakeKafkaProducer(object):
+    """
+    Sends all records queued since the last round trip to the "broker" when
+    a caller waits for a record that has not been acknowledged yet
+    """
+
+    def __init__(self, fail_document_ids=()):
+        self.fail_document_ids = fail_document_ids
+        self.queued = []
+        self.sent = []
+        self.round_trips = 0
+
+    def send(self, topic, value, key=None, partition=None):
+        future = FakeFuture(self)
+        self.queued.append((key, future))
+        return future
+
+    def round_trip(self):
+        self.round_trips += 1
+        queued, self.queued = self.queued, []
+        for key, future in queued:
+            if key in self.fail_document_ids:
+                future.failure(Exception("send failed"))
+            else:
+                self.sent.append(key)
+                future.success(None)
+
+    def flush(self, timeout=None):
+        if self.queued:
+            self.round_trip()
+
+
+def _change_meta(document_id=None):
+    return ChangeMeta(
+        document_id=document_id or uuid.uuid4().hex,
+        data_source_type='dummy-type',
+        data_source_name='dummy-name',
+    )
+
+
+class ChangeProducerBatchTest(SimpleTestCase):
+
+    def setUp(self):
+        self.kafka_producer = FakeKafkaProducer()
+        self.producer = ChangeProducer()
+        self.producer._producer = self.kafka_producer
+
+    def test_unbatched(self):
+        for i in range(3):
+            self.producer.send_change(topics.CASE, _change_meta())
+        self.assertEqual(self.kafka_producer.round_trips, 3)
+
+    def test_batch(self):
+        metas = [_change_meta() for i in range(3)]
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with self.producer.batch():
+                for meta in metas:
+                    self.producer.send_change(topics.CASE, meta)
+                self.assertEqual(self.kafka_producer.round_trips, 0)
+        self.assertEqual(self.kafka_producer.round_trips, 1)
+        self.assertEqual(self.kafka_producer.sent, [meta.document_id for meta in metas])
+        self._check_logs(logs, [CHANGE_PRE_SEND] * 3 + [CHANGE_SENT] * 3)
+
+    def test_nested_batch(self):
+        with self.producer.batch():
+            self.producer.send_change(topics.CASE, _change_meta())
+            with self.producer.batch():
+                self.producer.send_change(topics.CASE, _change_meta())
+            self.assertEqual(self.kafka_producer.round_trips, 0)
+        self.assertEqual(self.kafka_producer.round_trips, 1)
+
+    def test_batch_error(self):
+        failed, sent = _change_meta(), _change_meta()
+        self.kafka_producer.fail_document_ids = [failed.document_id]
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with self.assertRaises(KafkaPublishingError):
+                with self.producer.batch():
+                    self.producer.send_change(topics.CASE, failed)
+                    self.producer.send_change(topics.CASE, sent)
+        self.assertEqual(self.kafka_producer.sent, [sent.document_id])
+        self._check_logs(logs, [CHANGE_PRE_SEND, CHANGE_PRE_SEND, CHANGE_ERROR, CHANGE_SENT])
+
+    def test_exception_in_batch(self):
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with self.assertRaises(ValueError):
+                with self.producer.batch():
+                    self.producer.send_change(topics.CASE, _change_meta())
+                    raise ValueError
+            self.kafka_producer.flush()
+        self._check_logs(logs, [CHANGE_PRE_SEND, CHANGE_SENT])
+        # the next change is not part of the batch
+        self.producer.send_change(topics.CASE, _change_meta())
+        self.assertEqual(self.kafka_producer.round_trips, 2)
+
+    def _check_logs(self, captured_logs, events):
+        lines = captured_logs.get_output().splitlines()
+        self.assertEqual([line.split(',')[0] for line in lines], events)
+
+
+class PublishSubmissionChangesTest(SimpleTestCase):
+
+    def test_one_round_trip_per_submission(self):
+        form = SimpleNamespace(
+            form_id='form1', doc_type='XFormInstance', xmlns='xmlns', domain='domain', is_deleted=False
+        )
+        cases = [
+            SimpleNamespace(case_id='case{}'.format(i), type='person', domain='domain', is_deleted=False)
+            for i in range(20)
+        ]
+        ledgers = [
+            SimpleNamespace(ledger_reference=SimpleNamespace(as_id=lambda i=i: 'ledger{}'.format(i)),
+                            domain='domain')
+            for i in range(40)
+        ]
+        kafka_producer = FakeKafkaProducer()
+        with patch.object(producer, '_producer', kafka_producer), \
+                patch('corehq.form_processor.backends.sql.processor.sql_case_post_save') as post_save:
+            FormProcessorSQL.publish_changes_to_kafka(
+                ProcessedForms(form, None), cases, SimpleNamespace(models_to_save=ledgers)
+            )
+        self.assertEqual(kafka_producer.round_trips, 1)
+        self.assertEqual(len(kafka_producer.sent), 61)
+        self.assertEqual(post_save.send.call_count, 20)
+
+    def test_no_post_save_signals_on_error(self):
+        form = SimpleNamespace(
+            form_id='form1', doc_type='XFormInstance', xmlns='xmlns', domain='domain', is_deleted=False
+        )
+        case = SimpleNamespace(case_id='case1', type='person', domain='domain', is_deleted=False)
+        kafka_producer = FakeKafkaProducer(fail_document_ids=['case1'])
+        with patch.object(producer, '_producer', kafka_producer), \
+                patch('corehq.form_processor.backends.sql.processor.sql_case_post_save') as post_save:
+            with self.assertRaises(KafkaPublishingError):
+                FormProcessorSQL.publish_changes_to_kafka(ProcessedForms(form, None), [case], None)
+        self.assertEqual(kafka_producer.sent, ['form1'])
+        self.assertFalse(post_save.send.called)
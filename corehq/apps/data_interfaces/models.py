@@ -7,6 +7,7 @@ from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.utils.translation import ugettext_lazy
 
 import jsonfield
@@ -75,6 +76,14 @@ from corehq.util.quickcache import quickcache
 from corehq.util.test_utils import unit_testing_only
 
 ALLOWED_DATE_REGEX = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# Date and ISO datetime strings whose UTC date is within a day of their
+# first ten characters. Used to filter cases on date properties in SQL.
+SQL_DATE_PATTERN = (
+    r'^[0-9]{4}-[0-9]{2}-[0-9]{2}'
+    r'([T ][0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]+)?)?(Z|[+-](0[0-9]|1[0-4])(:?[0-5][0-9])?)?)?$'
+)
+
 AUTO_UPDATE_XMLNS = 'http://commcarehq.org/hq_case_update_rule'
 
 
@@ -215,14 +224,76 @@ class AutomaticUpdateRule(models.Model):
         return date
 
     @classmethod
-    def iter_cases(cls, domain, case_type, boundary_date=None, db=None):
+    def get_case_sql_filter_for_rules(cls, rules, now):
+        """
+        Combines the SQL filters of the given rules (see get_case_sql_filter)
+        into one that holds for every case that matches any of the rules.
+
+        :return: a (sql, params) tuple or None if every case must be checked
+        """
+        conditions = []
+        params = []
+        for rule in rules:
+            sql_filter = rule.get_case_sql_filter(now)
+            if sql_filter is None:
+                return None
+            conditions.append(sql_filter[0])
+            params.extend(sql_filter[1])
+
+        if not conditions:
+            return None
+
+        return ' OR '.join('({})'.format(condition) for condition in conditions), params
+
+    def get_case_sql_filter(self, now):
+        """
+        Returns a condition on CommCareCaseSQL that holds for every case that
+        matches this rule's criteria, built from the criteria that can be
+        checked in SQL. It can also hold for cases that don't match, so cases
+        must still be checked with criteria_match().
+
+        :return: a (sql, params) tuple or None if every case must be checked
+        """
+        for action in self.memoized_actions:
+            if (
+                type(action.definition).when_case_does_not_match is not
+                CaseRuleActionDefinition.when_case_does_not_match
+            ):
+                # the action needs to see the cases that don't match
+                return None
+
+        conditions = []
+        params = []
+        if self.filter_on_server_modified:
+            conditions.append('server_modified_on <= %s')
+            params.append(now - timedelta(days=self.server_modified_boundary))
+
+        for criteria in self.memoized_criteria:
+            sql_filter = criteria.definition.get_case_sql_filter(now)
+            if sql_filter is not None:
+                conditions.append(sql_filter[0])
+                params.extend(sql_filter[1])
+
+        if not conditions:
+            return None
+
+        return ' AND '.join('({})'.format(condition) for condition in conditions), params
+
+    @classmethod
+    def iter_cases(cls, domain, case_type, boundary_date=None, db=None, criteria_filter=None):
+        """
+        :param criteria_filter: (optional) a (sql, params) tuple from
+        get_case_sql_filter_for_rules() to restrict the cases to. Only
+        applied to domains using the SQL backend.
+        """
         if should_use_sql_backend(domain):
-            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db)
+            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db,
+                criteria_filter=criteria_filter)
         else:
             return cls._iter_cases_from_es(domain, case_type, boundary_date=boundary_date)
 
     @classmethod
-    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None):
+    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None, criteria_filter=None):
         q_expression = Q(
             domain=domain,
             type=case_type,
@@ -233,11 +304,18 @@ class AutomaticUpdateRule(models.Model):
         if boundary_date:
             q_expression = q_expression & Q(server_modified_on__lte=boundary_date)
 
+        annotate = None
+        if criteria_filter:
+            sql, params = criteria_filter
+            annotate = {'matches_rule_criteria': RawSQL(sql, params, output_field=models.BooleanField())}
+            q_expression = q_expression & Q(matches_rule_criteria=True)
+
         if db:
-            return paginate_query(db, CommCareCaseSQL, q_expression, load_source='auto_update_rule')
+            return paginate_query(db, CommCareCaseSQL, q_expression, annotate=annotate,
+                load_source='auto_update_rule')
         else:
             return paginate_query_across_partitioned_databases(
-                CommCareCaseSQL, q_expression, load_source='auto_update_rule'
+                CommCareCaseSQL, q_expression, annotate=annotate, load_source='auto_update_rule'
             )
 
     @classmethod
@@ -478,6 +556,14 @@ class CaseRuleCriteriaDefinition(models.Model):
     def matches(self, case, now):
         raise NotImplementedError()
 
+    def get_case_sql_filter(self, now):
+        """
+        Returns a (sql, params) condition on CommCareCaseSQL that holds for
+        every case this definition matches, or None if it can't be checked
+        in SQL. The condition may also hold for cases that don't match.
+        """
+        return None
+
 
 class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
     # True when today < (the date in property_name + property_value days)
@@ -592,6 +678,57 @@ class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_sql_filter(self, now):
+        if (
+            '/' in self.property_name or
+            self.property_name == '_id' or
+            self.property_name in [field.name for field in CommCareCaseSQL._meta.fields]
+        ):
+            # resolved through related cases (matched case-insensitively
+            # by resolve_case_property) or model fields
+            return None
+
+        if self.property_value is None and self.match_type in (self.MATCH_EQUAL, self.MATCH_NOT_EQUAL):
+            return None
+
+        # case_json is stored as text; jsonb matches expression indexes on case_json::jsonb
+        value = "(case_json::jsonb ->> %s)"
+        json_type = "jsonb_typeof(case_json::jsonb -> %s)"
+        prop = self.property_name
+
+        if self.match_type == self.MATCH_EQUAL:
+            return "{} = %s".format(value), [prop, self.property_value]
+        elif self.match_type == self.MATCH_NOT_EQUAL:
+            # missing and non-string values are not equal to any string
+            return "{value} IS NULL OR {json_type} <> 'string' OR {value} <> %s".format(
+                value=value, json_type=json_type), [prop, prop, prop, self.property_value]
+        elif self.match_type == self.MATCH_HAS_VALUE:
+            # whitespace is left to check_has_value()
+            return "{} <> ''".format(value), [prop]
+        elif self.match_type == self.MATCH_REGEX:
+            return "{} = 'string'".format(json_type), [prop]
+        elif self.match_type in (self.MATCH_DAYS_BEFORE, self.MATCH_DAYS_AFTER):
+            try:
+                days = int(self.property_value)
+            except (TypeError, ValueError):
+                return None
+
+            # Allow a day either way for time zones. Strings that aren't
+            # plain dates or datetimes are left to matches().
+            if self.match_type == self.MATCH_DAYS_BEFORE:
+                operator = '>='
+                bound = (now - timedelta(days=days)).date() - timedelta(days=1)
+            else:
+                operator = '<='
+                bound = (now - timedelta(days=days)).date() + timedelta(days=1)
+            return (
+                "{json_type} = 'string' AND ({value} !~ %s OR LEFT({value}, 10) COLLATE \"C\" {operator} %s)"
+                .format(json_type=json_type, value=value, operator=operator),
+                [prop, prop, SQL_DATE_PATTERN, prop, bound.isoformat()]
+            )
+
+        return None
+
     def matches(self, case, now):
         return {
             self.MATCH_DAYS_BEFORE: self.check_days_before,
@@ -1080,9 +1217,16 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
         return None
 
     def when_case_matches(self, case, rule):
+        return self.refresh_schedule_instances(case, rule)
+
+    def refresh_schedule_instances(self, case, rule, batch=None):
+        """
+        :param batch: (optional) a CaseScheduleInstanceBatch for the case,
+        to collect the changes in rather than saving them right away
+        """
         schedule = self.schedule
         if isinstance(schedule, AlertSchedule):
-            refresh_case_alert_schedule_instances(case, schedule, self, rule)
+            refresh_case_alert_schedule_instances(case, schedule, self, rule, batch=batch)
         elif isinstance(schedule, TimedSchedule):
             kwargs = {}
             scheduler_module_info = self.get_scheduler_module_info()
@@ -1098,7 +1242,7 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
                 if not start_date:
                     # The case property doesn't reference a date, so delete any
                     # schedule instances pertaining to this rule and case and return
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, batch=batch)
                     return CaseRuleActionResult()
 
                 kwargs['start_date'] = start_date
@@ -1109,19 +1253,19 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
                     case_phase_matches, schedule_instance_start_date = VisitSchedulerIntegrationHelper(case,
                         scheduler_module_info).get_result()
                 except VisitSchedulerIntegrationHelper.VisitSchedulerIntegrationException:
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, batch=batch)
                     self.notify_scheduler_integration_exception(case, scheduler_module_info)
                     return CaseRuleActionResult()
 
                 if not case_phase_matches:
                     # The case is not in the matching schedule phase, so delete
                     # schedule instances pertaining to this rule and case and return
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, batch=batch)
                     return CaseRuleActionResult()
                 else:
                     kwargs['start_date'] = schedule_instance_start_date
 
-            refresh_case_timed_schedule_instances(case, schedule, self, rule, **kwargs)
+            refresh_case_timed_schedule_instances(case, schedule, self, rule, batch=batch, **kwargs)
 
         return CaseRuleActionResult()
 
@@ -1129,7 +1273,11 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
         self.delete_schedule_instances(case)
         return CaseRuleActionResult()
 
-    def delete_schedule_instances(self, case):
+    def delete_schedule_instances(self, case, batch=None):
+        if batch:
+            batch.delete_instances(case.case_id, self.alert_schedule_id or self.timed_schedule_id)
+            return
+
         if self.alert_schedule_id:
             get_case_alert_schedule_instances_for_schedule_id(case.case_id, self.alert_schedule_id).delete()
 
@@ -165,7 +165,11 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, case_type, db=N
     rules = list(all_rules.filter(case_type=case_type))
 
     boundary_date = AutomaticUpdateRule.get_boundary_date(rules, now)
-    for case in AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db):
+    criteria_filter = None
+    if settings.AUTO_UPDATE_RULE_SQL_FILTER:
+        criteria_filter = AutomaticUpdateRule.get_case_sql_filter_for_rules(rules, now)
+    for case in AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db,
+                                               criteria_filter=criteria_filter):
         migration_in_progress, last_migration_check_time = check_data_migration_in_progress(
             domain,
             last_migration_check_time
@@ -1,4 +1,4 @@
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 
 from django.test import TestCase, override_settings
@@ -37,6 +37,7 @@ from corehq.form_processor.signals import sql_case_post_save
 from corehq.form_processor.tests.utils import (
     run_with_all_backends,
     set_case_property_directly,
+    use_sql_backend,
 )
 from corehq.form_processor.utils.general import should_use_sql_backend
 from corehq.toggles import NAMESPACE_DOMAIN, RUN_AUTO_CASE_UPDATES_ON_SAVE
@@ -544,6 +545,160 @@ class CaseRuleCriteriaTest(BaseCaseRuleTest):
             self.assertTrue(rule.criteria_match(case, datetime(2017, 4, 15)))
 
 
+@use_sql_backend
+class CaseRuleSQLFilterTest(BaseCaseRuleTest):
+    """
+    The SQL filters built from rule criteria may let through cases that
+    don't match, but must keep every case that criteria_match() matches.
+    """
+    property_values = [
+        '', ' ', 'x', 'negative', 'Negative', '5', 5, True, None, {'a': 'b'},
+        '2017-01-10', '2017-01-15', '2017-01-20',
+        '2017-01-15T23:00:00-05:00', '2017-01-15T01:00:00+05:30', '2017-01-15 01:02:03.5Z',
+        '2017-01-15 or so', '15/01/2017',
+    ]
+
+    def setUp(self):
+        super(CaseRuleSQLFilterTest, self).setUp()
+        self.exit_stack = ExitStack()
+        self.addCleanup(self.exit_stack.close)
+        self.cases = [self._make_case()]  # without the property
+        for value in self.property_values:
+            self.cases.append(self._make_case(value))
+
+    def _make_case(self, *value):
+        case = self.exit_stack.enter_context(_with_case(self.domain, 'person', datetime(2017, 1, 1)))
+        if value:
+            set_case_property_directly(case, 'prop', value[0])
+            _save_case(self.domain, case)
+        return CaseAccessors(self.domain).get_case(case.case_id)
+
+    def _get_candidates(self, rules, now):
+        sql_filter = AutomaticUpdateRule.get_case_sql_filter_for_rules(rules, now)
+        self.assertIsNotNone(sql_filter)
+        return {
+            case.case_id
+            for case in AutomaticUpdateRule.iter_cases(self.domain, 'person', criteria_filter=sql_filter)
+        }
+
+    def _get_matches(self, rules, now):
+        return {
+            case.case_id
+            for case in self.cases
+            if any(rule.criteria_match(case, now) for rule in rules)
+        }
+
+    def assertCandidates(self, rules, now, exact=False):
+        candidates = self._get_candidates(rules, now)
+        matches = self._get_matches(rules, now)
+        self.assertTrue(matches <= candidates, matches - candidates)
+        if exact:
+            self.assertEqual(candidates, matches)
+        return candidates
+
+    def _rule_matching(self, match_type, property_value=None, property_name='prop'):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name=property_name,
+            property_value=property_value,
+            match_type=match_type,
+        )
+        return rule
+
+    def test_equal(self):
+        now = datetime(2017, 2, 1)
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'negative')
+        self.assertCandidates([rule], now, exact=True)
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, '5')
+        self.assertEqual(len(self.assertCandidates([rule], now)), 2)
+
+    def test_not_equal(self):
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_NOT_EQUAL, 'negative')
+        self.assertCandidates([rule], datetime(2017, 2, 1), exact=True)
+
+    def test_has_value(self):
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_HAS_VALUE)
+        candidates = self.assertCandidates([rule], datetime(2017, 2, 1))
+        self.assertEqual(len(candidates), len(self.cases) - 3)
+
+    def test_regex(self):
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_REGEX, '^neg')
+        candidates = self.assertCandidates([rule], datetime(2017, 2, 1))
+        self.assertEqual(len(candidates), len(self.cases) - 5)
+
+    def test_days_before(self):
+        for days in ['-5', '0', '5']:
+            for now in [datetime(2017, 1, 10), datetime(2017, 1, 15, 12), datetime(2017, 1, 20, 23)]:
+                rule = self._rule_matching(MatchPropertyDefinition.MATCH_DAYS_BEFORE, days)
+                self.assertCandidates([rule], now)
+
+        # only strings that don't look like dates are left to check
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_DAYS_BEFORE, '0')
+        self.assertEqual(len(self.assertCandidates([rule], datetime(2017, 1, 30))), 8)
+
+    def test_days_after(self):
+        for days in ['-5', '0', '5']:
+            for now in [datetime(2017, 1, 10), datetime(2017, 1, 15, 12), datetime(2017, 1, 20, 23)]:
+                rule = self._rule_matching(MatchPropertyDefinition.MATCH_DAYS_AFTER, days)
+                self.assertCandidates([rule], now)
+
+        # only strings that don't look like dates are left to check
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_DAYS_AFTER, '0')
+        self.assertEqual(len(self.assertCandidates([rule], datetime(2017, 1, 1))), 8)
+
+    @override_settings(
+        AVAILABLE_CUSTOM_RULE_CRITERIA={
+            'CUSTOM_CRITERIA_TEST':
+                'corehq.apps.data_interfaces.tests.test_auto_case_updates.dummy_custom_match_function',
+        }
+    )
+    def test_combined_rules(self):
+        now = datetime(2017, 2, 1)
+        rule1 = self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x')
+        rule1.add_criteria(CustomMatchDefinition, name='CUSTOM_CRITERIA_TEST')
+        rule2 = self._rule_matching(MatchPropertyDefinition.MATCH_HAS_VALUE)
+        rule2.add_criteria(
+            MatchPropertyDefinition,
+            property_name='prop',
+            property_value='5',
+            match_type=MatchPropertyDefinition.MATCH_DAYS_AFTER,
+        )
+        with patch('corehq.apps.data_interfaces.tests.test_auto_case_updates.dummy_custom_match_function') as p:
+            p.return_value = True
+            candidates = self.assertCandidates([rule1, rule2], now)
+        self.assertEqual(len(candidates), len(self.cases) - 6)
+
+    def test_server_modified(self):
+        rule = _create_empty_rule(self.domain)
+        rule.filter_on_server_modified = True
+        rule.server_modified_boundary = 10
+        rule.save()
+        self.assertEqual(self._get_candidates([rule], datetime(2017, 1, 5)), set())
+        self.assertCandidates([rule], datetime(2017, 1, 15), exact=True)
+
+    def test_unfiltered_rules(self):
+        now = datetime(2017, 2, 1)
+        rule = self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x')
+        self.assertIsNotNone(AutomaticUpdateRule.get_case_sql_filter_for_rules([rule], now))
+
+        unfiltered_rules = [
+            _create_empty_rule(self.domain),
+            self._rule_matching(MatchPropertyDefinition.MATCH_HAS_NO_VALUE),
+            self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x', property_name='parent/prop'),
+            self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x', property_name='Parent/prop'),
+            self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x', property_name='HOST/prop'),
+            self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x', property_name='external_id'),
+            self._rule_matching(MatchPropertyDefinition.MATCH_DAYS_AFTER, 'x'),
+        ]
+        scheduling_rule = self._rule_matching(MatchPropertyDefinition.MATCH_EQUAL, 'x')
+        scheduling_rule.add_action(CreateScheduleInstanceActionDefinition)
+        unfiltered_rules.append(scheduling_rule)
+        for unfiltered_rule in unfiltered_rules:
+            self.assertIsNone(unfiltered_rule.get_case_sql_filter(now))
+            self.assertIsNone(AutomaticUpdateRule.get_case_sql_filter_for_rules([rule, unfiltered_rule], now))
+
+
 class CaseRuleActionsTest(BaseCaseRuleTest):
 
     def assertActionResult(self, rule, submission_count, result=None, expected_result=None):
@@ -62,6 +62,7 @@ from corehq.messaging.scheduling.tests.util import (
 from corehq.messaging.tasks import (
     run_messaging_rule,
     run_messaging_rule_for_shard,
+    sync_case_chunk_for_messaging_rule,
     sync_case_for_messaging,
     sync_case_for_messaging_rule,
 )
@@ -1068,19 +1069,15 @@ class CaseRuleSchedulingIntegrationTest(TestCase):
         return rule.pk
 
     @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=False)
-    @patch('corehq.messaging.tasks.sync_case_for_messaging_rule.delay')
+    @patch('corehq.messaging.tasks.sync_case_chunk_for_messaging_rule.delay')
     def test_run_messaging_rule(self, task_patch):
         rule_id = self._setup_rule()
         with create_case(self.domain, 'person') as case1, create_case(self.domain, 'person') as case2:
             run_messaging_rule(self.domain, rule_id)
-            self.assertEqual(task_patch.call_count, 2)
-            task_patch.assert_has_calls(
-                [
-                    call(self.domain, case1.case_id, rule_id),
-                    call(self.domain, case2.case_id, rule_id),
-                ],
-                any_order=True
-            )
+            self.assertEqual(task_patch.call_count, 1)
+            ((domain, case_ids, called_rule_id), kwargs), = task_patch.call_args_list
+            self.assertEqual((domain, called_rule_id), (self.domain, rule_id))
+            self.assertEqual(set(case_ids), {case1.case_id, case2.case_id})
 
     @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
     @patch('corehq.messaging.tasks.sync_case_chunk_for_messaging_rule.delay')
@@ -1103,6 +1100,70 @@ class CaseRuleSchedulingIntegrationTest(TestCase):
                 any_order=True
             )
 
+    @run_with_all_backends
+    @patch('corehq.messaging.scheduling.util.utcnow')
+    def test_sync_case_chunk_for_messaging_rule(self, utcnow_patch):
+        utcnow_patch.return_value = datetime(2017, 5, 1, 7, 0)
+        schedule = AlertSchedule.create_simple_alert(
+            self.domain,
+            SMSContent(message={'en': 'Hello'})
+        )
+
+        with create_case(self.domain, 'person', update={'start_sending': 'Y'}) as case1, \
+                create_case(self.domain, 'person', update={'start_sending': 'N'}) as case2, \
+                create_case(self.domain, 'person', update={'start_sending': 'Y'}) as case3:
+            rule = create_empty_rule(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+            criteria, match_definition = rule.add_criteria(
+                MatchPropertyDefinition,
+                property_name='start_sending',
+                property_value='Y',
+                match_type=MatchPropertyDefinition.MATCH_EQUAL,
+            )
+            action, definition = rule.add_action(
+                CreateScheduleInstanceActionDefinition,
+                alert_schedule_id=schedule.schedule_id,
+                recipients=(('CommCareUser', self.user.get_id),)
+            )
+            AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+            case_ids = (case1.case_id, case2.case_id, case3.case_id, 'missing-case-id')
+
+            def get_instances(case):
+                return list(get_case_alert_schedule_instances_for_schedule(case.case_id, schedule))
+
+            # instances are created for the matching cases
+            sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+            instances1 = get_instances(case1)
+            self.assertEqual([(i.recipient_type, i.recipient_id) for i in instances1],
+                             [('CommCareUser', self.user.get_id)])
+            self.assertEqual(instances1[0].rule_id, rule.pk)
+            self.assertEqual(get_instances(case2), [])
+            self.assertEqual(len(get_instances(case3)), 1)
+
+            # syncing again leaves them be
+            sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+            self.assertEqual(
+                [i.schedule_instance_id for i in get_instances(case1)],
+                [instances1[0].schedule_instance_id],
+            )
+
+            # changing the recipients replaces them
+            definition.recipients = (('Self', None),)
+            definition.save()
+            AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+            sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+            instances1 = get_instances(case1)
+            self.assertEqual([(i.recipient_type, i.recipient_id) for i in instances1], [('Self', None)])
+            self.assertEqual(instances1[0].next_event_due, datetime(2017, 5, 1, 7, 0))
+
+            # and instances are deleted for cases that stop matching
+            match_definition.property_value = 'N'
+            match_definition.save()
+            AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+            sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+            self.assertEqual(get_instances(case1), [])
+            self.assertEqual(len(get_instances(case2)), 1)
+            self.assertEqual(get_instances(case3), [])
+
     @run_with_all_backends
     @patch('corehq.messaging.scheduling.models.content.SMSContent.send')
     @patch('corehq.messaging.scheduling.util.utcnow')
@@ -354,17 +354,19 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
         total_bytes = 0
         total_rows = 0
         track_load = load_counter(export_instance.type, "export", export_instance.domain)
+        row_extractors = [
+            (table, table.get_row_extractor(
+                split_columns=export_instance.split_multiselects,
+                transform_dates=export_instance.transform_dates,
+            ))
+            for table in export_instance.selected_tables
+        ]
 
         for row_number, doc in enumerate(documents):
             total_bytes += sys.getsizeof(doc)
-            for table in export_instance.selected_tables:
+            for table, row_extractor in row_extractors:
                 try:
-                    rows = table.get_rows(
-                        doc,
-                        row_number,
-                        split_columns=export_instance.split_multiselects,
-                        transform_dates=export_instance.transform_dates,
-                    )
+                    rows = row_extractor.get_rows(doc, row_number)
                 except Exception as e:
                     notify_exception(None, "Error exporting doc", details={
                         'domain': export_instance.domain,
@@ -0,0 +1,98 @@
+import timeit
+import uuid
+
+from django.core.management import BaseCommand
+
+from corehq.apps.export.models import (
+    ExportColumn,
+    MultipleChoiceItem,
+    Option,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    SplitExportColumn,
+    TableConfiguration,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare row generation for a synthetic form export using per-row "
+        "column evaluation and compiled row extractors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forms', type=int, default=10000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--split-columns', action='store_true')
+        parser.add_argument('--transform-dates', action='store_true')
+
+    def handle(self, forms, questions, repeat, split_columns, transform_dates, **options):
+        table = _get_table(questions)
+        docs = [_get_form(questions) for i in range(forms)]
+        options = {'split_columns': split_columns, 'transform_dates': transform_dates}
+
+        def per_column():
+            for row_number, doc in enumerate(docs):
+                _get_rows_per_column(table, doc, row_number, **options)
+
+        def compiled():
+            extractor = table.get_row_extractor(**options)
+            for row_number, doc in enumerate(docs):
+                extractor.get_rows(doc, row_number)
+
+        print("{} forms, {} questions".format(forms, questions))
+        for name, func in [('per column', per_column), ('compiled', compiled)]:
+            seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+            print("    {:<12} {:>10.0f} ms {:>10.0f} rows/s".format(name, seconds * 1000, forms / seconds))
+
+
+def _get_table(questions):
+    columns = [RowNumberColumn(label='number', selected=True)]
+    for i in range(questions):
+        path = [PathNode(name='form'), PathNode(name='q{}'.format(i))]
+        if i % 10 == 0:
+            columns.append(SplitExportColumn(
+                label='q{}'.format(i),
+                item=MultipleChoiceItem(path=path, options=[Option(value='a'), Option(value='b')]),
+                selected=True,
+            ))
+        else:
+            columns.append(ExportColumn(label='q{}'.format(i), item=ScalarItem(path=path), selected=True))
+    return TableConfiguration(path=[], columns=columns)
+
+
+def _get_form(questions):
+    return {
+        'domain': 'benchmark',
+        '_id': uuid.uuid4().hex,
+        'form': {
+            'q{}'.format(i): 'a c' if i % 10 == 0 else '2020-01-01T00:00:00.000000Z'
+            for i in range(questions)
+        },
+    }
+
+
+def _get_rows_per_column(table, document, row_number, split_columns, transform_dates):
+    """Row generation as done before row extractors: every column is evaluated from scratch"""
+    rows = []
+    document_id = document['_id']
+    for doc_row in table._get_sub_documents(document, row_number, document_id=document_id):
+        row = []
+        for column in table.selected_columns:
+            value = column.get_value(
+                document['domain'],
+                document_id,
+                doc_row.doc,
+                table.path,
+                row_index=doc_row.row,
+                split_column=split_columns,
+                transform_dates=transform_dates,
+            )
+            if isinstance(value, list):
+                row.extend(value)
+            else:
+                row.append(value)
+        rows.append(row)
+    return rows
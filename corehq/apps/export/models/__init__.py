@@ -39,6 +39,7 @@ from .new import (
     StockFormExportColumn,
     StockItem,
     TableConfiguration,
+    TableRowExtractor,
     UserDefinedExportColumn,
 )
 
@@ -99,7 +99,10 @@ from corehq.apps.reports.models import HQUserType
 from corehq.apps.userreports.app_manager.data_source_meta import (
     get_form_indicator_data_type,
 )
-from corehq.apps.userreports.expressions.getters import NestedDictGetter
+from corehq.apps.userreports.expressions.getters import (
+    NestedDictGetter,
+    safe_recursive_lookup,
+)
 from corehq.blobs import CODES, get_blob_db
 from corehq.blobs.exceptions import NotFound
 from corehq.blobs.mixin import BlobMixin
@@ -279,6 +282,38 @@ class ExportColumn(DocumentSchema):
         path = [x.name for x in self.item.path[len(base_path):]]
         return self._transform(NestedDictGetter(path)(doc), doc, transform_dates)
 
+    def get_value_getter(self, base_path, transform_dates=False, split_column=False):
+        """
+        Return a function of ``(domain, doc_id, doc, row_index)`` that is
+        equivalent to calling ``get_value`` with the given arguments.
+
+        The path lookup is resolved once, so the returned function should be
+        used when the column is evaluated for many documents.
+        """
+        if type(self).get_value is not ExportColumn.get_value:
+            # subclasses that don't compile their own getter
+            def get_value(domain, doc_id, doc, row_index):
+                return self.get_value(
+                    domain,
+                    doc_id,
+                    doc,
+                    base_path,
+                    row_index=row_index,
+                    split_column=split_column,
+                    transform_dates=transform_dates,
+                )
+            return get_value
+        return self._get_item_value_getter(base_path, transform_dates)
+
+    def _get_item_value_getter(self, base_path, transform_dates):
+        assert base_path == self.item.path[:len(base_path)], "ExportItem's path doesn't start with the base_path"
+        path = [x.name for x in self.item.path[len(base_path):]]
+        transform = self._transform
+
+        def get_value(domain, doc_id, doc, row_index):
+            return transform(safe_recursive_lookup(doc, path), doc, transform_dates)
+        return get_value
+
     def _transform(self, value, doc, transform_dates):
         """
         Transform the given value with the transform specified in self.item.transform.
@@ -453,6 +488,79 @@ class DocRow(namedtuple("DocRow", ["doc", "row"])):
     """
 
 
+class TableRowExtractor(object):
+    """
+    Generates the rows of a ``TableConfiguration`` with the value getters,
+    headers and row number column positions of its selected columns
+    computed up front, rather than for every row of every document.
+    """
+
+    def __init__(self, table, split_columns=False, transform_dates=False, as_json=False):
+        self.table = table
+        self.as_json = as_json
+        columns = table.selected_columns
+        self.value_getters = [
+            column.get_value_getter(table.path, transform_dates=transform_dates, split_column=split_columns)
+            for column in columns
+        ]
+        # we never want to auto-format RowNumberColumn (always treat as text)
+        self.skip_excel_formatting = [isinstance(column, RowNumberColumn) for column in columns]
+        if as_json:
+            self.headers = [column.get_headers(split_column=split_columns) for column in columns]
+        else:
+            self.hyperlink_column_indices = table.get_hyperlink_column_indices(split_columns)
+
+    def get_rows(self, document, row_number):
+        document_id = document.get('_id')
+
+        sub_documents = self.table._get_sub_documents(document, row_number, document_id=document_id)
+
+        domain = document.get('domain')
+
+        assert domain is not None, 'Form or Case must be associated with domain'
+        assert document_id is not None, 'Form or Case must have an id'
+
+        if self.as_json:
+            return [
+                self._get_json_row(domain, document_id, doc_row.doc, doc_row.row)
+                for doc_row in sub_documents
+            ]
+        return [
+            self._get_row(domain, document_id, doc_row.doc, doc_row.row)
+            for doc_row in sub_documents
+        ]
+
+    def _get_row(self, domain, document_id, doc, row_index):
+        row_data = []
+        skip_excel_formatting = []
+        for get_value, skip_formatting in zip(self.value_getters, self.skip_excel_formatting):
+            val = get_value(domain, document_id, doc, row_index)
+            if isinstance(val, list):
+                if skip_formatting:
+                    skip_excel_formatting.extend(range(len(row_data), len(row_data) + len(val)))
+                row_data.extend(val)
+            else:
+                if skip_formatting:
+                    skip_excel_formatting.append(len(row_data))
+                row_data.append(val)
+        return ExportRow(
+            data=row_data,
+            hyperlink_column_indices=self.hyperlink_column_indices,
+            skip_excel_formatting=skip_excel_formatting
+        )
+
+    def _get_json_row(self, domain, document_id, doc, row_index):
+        row_data = {}
+        for get_value, headers in zip(self.value_getters, self.headers):
+            val = get_value(domain, document_id, doc, row_index)
+            for index, header in enumerate(headers):
+                if isinstance(val, list):
+                    row_data[header] = "{}".format(val[index])
+                else:
+                    row_data[header] = "{}".format(val)
+        return row_data
+
+
 class TableConfiguration(DocumentSchema, ReadablePathMixin):
     """
     The TableConfiguration represents one excel sheet in an export.
@@ -492,67 +600,29 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
         :param as_json: optional parameter, mainly used in APIs, to spit out
                         the data as a json-ready dict
         :return: List of ExportRows
-        """
-        document_id = document.get('_id')
 
-        sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
-
-        domain = document.get('domain')
-
-        assert domain is not None, 'Form or Case must be associated with domain'
-        assert document_id is not None, 'Form or Case must have an id'
-
-        rows = []
-        for doc_row in sub_documents:
-            doc, row_index = doc_row.doc, doc_row.row
+        When generating rows for many documents, use ``get_row_extractor``
+        instead so that the columns are only compiled once.
+        """
+        extractor = self.get_row_extractor(
+            split_columns=split_columns,
+            transform_dates=transform_dates,
+            as_json=as_json,
+        )
+        return extractor.get_rows(document, row_number)
 
-            row_data = {} if as_json else []
-            col_index = 0
-            skip_excel_formatting = []
-            for col in self.selected_columns:
-                val = col.get_value(
-                    domain,
-                    document_id,
-                    doc,
-                    self.path,
-                    row_index=row_index,
-                    split_column=split_columns,
-                    transform_dates=transform_dates,
-                )
-                if as_json:
-                    for index, header in enumerate(col.get_headers(split_column=split_columns)):
-                        if isinstance(val, list):
-                            row_data[header] = "{}".format(val[index])
-                        else:
-                            row_data[header] = "{}".format(val)
-                elif isinstance(val, list):
-                    row_data.extend(val)
-
-                    # we never want to auto-format RowNumberColumn
-                    # (always treat as text)
-                    next_col_index = col_index + len(val)
-                    if isinstance(col, RowNumberColumn):
-                        skip_excel_formatting.extend(
-                            list(range(col_index, next_col_index))
-                        )
-                    col_index = next_col_index
-                else:
-                    row_data.append(val)
-
-                    # we never want to auto-format RowNumberColumn
-                    # (always treat as text)
-                    if isinstance(col, RowNumberColumn):
-                        skip_excel_formatting.append(col_index)
-                    col_index += 1
-            if as_json:
-                rows.append(row_data)
-            else:
-                rows.append(ExportRow(
-                    data=row_data,
-                    hyperlink_column_indices=self.get_hyperlink_column_indices(split_columns),
-                    skip_excel_formatting=skip_excel_formatting
-                ))
-        return rows
+    def get_row_extractor(self, split_columns=False, transform_dates=False, as_json=False):
+        """
+        Return a ``TableRowExtractor`` that generates the same rows as
+        ``get_rows`` with the given options. The extractor reflects the
+        columns of the table at the time it is created.
+        """
+        return TableRowExtractor(
+            self,
+            split_columns=split_columns,
+            transform_dates=transform_dates,
+            as_json=as_json,
+        )
 
     def get_column(self, item_path, item_doc_type, column_transform):
         """
@@ -2466,7 +2536,16 @@ class SplitGPSExportColumn(ExportColumn):
         )
         if not split_column:
             return value
+        return self._split_value(value)
 
+    def get_value_getter(self, base_path, transform_dates=False, split_column=False):
+        get_value = self._get_item_value_getter(base_path, transform_dates)
+        if not split_column:
+            return get_value
+        split_value = self._split_value
+        return lambda domain, doc_id, doc, row_index: split_value(get_value(domain, doc_id, doc, row_index))
+
+    def _split_value(self, value):
         if value == MISSING_VALUE:
             return [MISSING_VALUE] * 4
 
@@ -2515,7 +2594,16 @@ class SplitExportColumn(ExportColumn):
         value = super(SplitExportColumn, self).get_value(domain, doc_id, doc, base_path, **kwargs)
         if not split_column:
             return value
+        return self._split_value(value)
+
+    def get_value_getter(self, base_path, transform_dates=False, split_column=False):
+        get_value = self._get_item_value_getter(base_path, transform_dates)
+        if not split_column:
+            return get_value
+        split_value = self._split_value
+        return lambda domain, doc_id, doc, row_index: split_value(get_value(domain, doc_id, doc, row_index))
 
+    def _split_value(self, value):
         if value == MISSING_VALUE:
             value = [MISSING_VALUE] * len(self.item.options)
             if not self.ignore_unspecified_options:
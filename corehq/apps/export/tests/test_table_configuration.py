@@ -5,9 +5,14 @@ from corehq.apps.export.models import (
     DocRow,
     ExportColumn,
     ExportRow,
+    GeopointItem,
+    MultipleChoiceItem,
+    Option,
     PathNode,
     RowNumberColumn,
     ScalarItem,
+    SplitExportColumn,
+    SplitGPSExportColumn,
     TableConfiguration,
 )
 
@@ -336,3 +341,121 @@ class TableConfigurationGetRowsTest(SimpleTestCase):
         self.assertEqual(
             [row.data for row in table_configuration.get_rows(submission, 0)], []
         )
+
+
+class TableRowExtractorTest(SimpleTestCase):
+
+    def setUp(self):
+        repeat_path = [PathNode(name='form'), PathNode(name='repeat1', is_repeat=True)]
+        self.table_configuration = TableConfiguration(
+            path=repeat_path,
+            columns=[
+                RowNumberColumn(label='number', repeat=1, selected=True),
+                ExportColumn(
+                    label='q1',
+                    item=ScalarItem(path=repeat_path + [PathNode(name='q1')]),
+                    selected=True,
+                ),
+                ExportColumn(
+                    label='user',
+                    item=ScalarItem(path=repeat_path + [PathNode(name='user')], transform=USERNAME_TRANSFORM),
+                    selected=True,
+                ),
+                ExportColumn(
+                    label='when',
+                    item=ScalarItem(path=repeat_path + [PathNode(name='when')]),
+                    selected=True,
+                ),
+                SplitExportColumn(
+                    label='choice',
+                    item=MultipleChoiceItem(
+                        path=repeat_path + [PathNode(name='choice')],
+                        options=[Option(value='a'), Option(value='b')],
+                    ),
+                    selected=True,
+                ),
+                SplitGPSExportColumn(
+                    label='gps',
+                    item=GeopointItem(path=repeat_path + [PathNode(name='gps')]),
+                    selected=True,
+                ),
+            ]
+        )
+        self.submissions = [
+            {
+                'domain': 'my-domain',
+                '_id': 'form{}'.format(i),
+                'form': {
+                    'repeat1': [
+                        {
+                            'q1': 'foo',
+                            'user': None,
+                            'when': '2019-01-0{}T12:00:00.000000Z'.format(i + 1),
+                            'choice': 'a c',
+                            'gps': '1.0 2.0 3.0 4.0',
+                        },
+                        {'q1': {'#text': 'bar', 'id': '1'}, 'choice': ''},
+                    ]
+                }
+            }
+            for i in range(2)
+        ]
+
+    def _get_expected_rows(self, submission, row_number, split_columns, transform_dates, as_json):
+        table = self.table_configuration
+        rows = []
+        for doc_row in table._get_sub_documents(submission, row_number, document_id=submission['_id']):
+            row = {} if as_json else []
+            for column in table.selected_columns:
+                value = column.get_value(
+                    'my-domain',
+                    submission['_id'],
+                    doc_row.doc,
+                    table.path,
+                    row_index=doc_row.row,
+                    split_column=split_columns,
+                    transform_dates=transform_dates,
+                )
+                if as_json:
+                    for index, header in enumerate(column.get_headers(split_column=split_columns)):
+                        row[header] = "{}".format(value[index] if isinstance(value, list) else value)
+                elif isinstance(value, list):
+                    row.extend(value)
+                else:
+                    row.append(value)
+            rows.append(row)
+        return rows
+
+    def test_matches_column_values(self):
+        for split_columns in (False, True):
+            for transform_dates in (False, True):
+                for as_json in (False, True):
+                    extractor = self.table_configuration.get_row_extractor(
+                        split_columns=split_columns,
+                        transform_dates=transform_dates,
+                        as_json=as_json,
+                    )
+                    for row_number, submission in enumerate(self.submissions):
+                        rows = extractor.get_rows(submission, row_number)
+                        if not as_json:
+                            rows = [row.data for row in rows]
+                        expected = self._get_expected_rows(
+                            submission, row_number, split_columns, transform_dates, as_json
+                        )
+                        self.assertEqual(rows, expected, (split_columns, transform_dates, as_json))
+
+    def test_split_columns(self):
+        extractor = self.table_configuration.get_row_extractor(split_columns=True)
+        rows = extractor.get_rows(self.submissions[0], 0)
+        self.assertEqual(
+            [row.data for row in rows],
+            [
+                ['0.0', 0, 0, 'foo', '---', '2019-01-01T12:00:00.000000Z', 1, '', 'c', '1.0', '2.0', '3.0', '4.0'],
+                ['0.1', 0, 1, 'bar', '---', '---', '', '', '', '---', '---', '---', '---'],
+            ]
+        )
+
+    def test_skip_excel_formatting(self):
+        extractor = self.table_configuration.get_row_extractor()
+        row, = extractor.get_rows({'domain': 'my-domain', '_id': '1234', 'form': {'repeat1': [{}]}}, 0)
+        self.assertEqual(row.skip_excel_formatting, [0, 1, 2])
@@ -54,6 +54,17 @@ def iter_fixture_items_for_data_type(domain, data_type_id):
         yield FixtureDataItem.wrap(row['doc'])
 
 
+def get_fixture_item_revs(item_ids):
+    """Get `{item_id: rev}` for existing fixture items without loading them"""
+    from corehq.apps.fixtures.models import FixtureDataItem
+    results = FixtureDataItem.get_db().view('_all_docs', keys=list(item_ids))
+    return {
+        row['id']: row['value']['rev']
+        for row in results
+        if 'value' in row and not row['value'].get('deleted')
+    }
+
+
 def count_fixture_items(domain, data_type_id):
     from corehq.apps.fixtures.models import FixtureDataItem
     return FixtureDataItem.view(
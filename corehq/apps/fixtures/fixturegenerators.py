@@ -1,18 +1,27 @@
+import hashlib
 from collections import defaultdict
 from functools import partial
 from operator import attrgetter
 from xml.etree import cElementTree as ElementTree
 
+from django.conf import settings
+
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.models import FixtureSyncLog
 from casexml.apps.phone.utils import (
     GLOBAL_USER_ID,
+    app_has_changed,
     get_or_cache_global_fixture,
 )
 
-from corehq.apps.fixtures.dbaccessors import iter_fixture_items_for_data_type
+from corehq.apps.fixtures.dbaccessors import (
+    get_fixture_item_revs,
+    iter_fixture_items_for_data_type,
+)
 from corehq.apps.fixtures.models import FIXTURE_BUCKET, FixtureDataType
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
+from corehq.util.metrics import metrics_histogram
 
 from .utils import get_index_schema_node
 
@@ -60,17 +69,27 @@ class ItemListsProvider(FixtureProvider):
                 global_types[data_type._id] = data_type
             else:
                 user_types[data_type._id] = data_type
+        synced = SyncedFixtures.for_restore(restore_state)
         items = []
         if global_types:
-            items.extend(self.get_global_items(global_types, restore_state))
+            items.extend(self.get_global_items(global_types, restore_state, synced))
         if user_types:
-            items.extend(self.get_user_items(user_types, restore_user))
+            items.extend(self.get_user_items(user_types, restore_user, synced))
+        if synced is not None:
+            synced.report_bytes_saved()
         return items
 
-    def get_global_items(self, global_types, restore_state):
+    def get_global_items(self, global_types, restore_state, synced=None):
         domain = restore_state.restore_user.domain
         data_fn = partial(self._get_global_items, global_types, domain)
-        return get_or_cache_global_fixture(restore_state, FIXTURE_BUCKET, '', data_fn)
+        items = get_or_cache_global_fixture(restore_state, FIXTURE_BUCKET, '', data_fn)
+        if synced is not None and items:
+            fixture_id = self.id + '/global'
+            fingerprint = _fingerprint(items[0])
+            if synced.is_unchanged(fixture_id, fingerprint):
+                return []
+            synced.add(fixture_id, fingerprint, len(items[0]))
+        return items
 
     def _get_global_items(self, global_types, domain):
         def get_items_by_type(data_type):
@@ -80,7 +99,22 @@ class ItemListsProvider(FixtureProvider):
 
         return self._get_fixtures(global_types, get_items_by_type, GLOBAL_USER_ID)
 
-    def get_user_items(self, user_types, restore_user):
+    def get_user_items(self, user_types, restore_user, synced=None):
+        if synced is not None:
+            # Fingerprint what the user's tables are built from: table
+            # definitions and the revisions of the items the user owns,
+            # as found through fixture ownerships.
+            item_revs = get_fixture_item_revs(restore_user.get_fixture_data_item_ids())
+            sources_fingerprint = _fingerprint(repr((
+                restore_user.user_id,
+                sorted((data_type._id, data_type._rev) for data_type in user_types.values()),
+                sorted(item_revs.items()),
+            )).encode('utf-8'))
+            fixture_ids = [self._fixture_id(data_type) for data_type in user_types.values()]
+            if synced.is_unchanged(self.id + '/user', sources_fingerprint, fixture_ids):
+                return []
+            synced.add(self.id + '/user', sources_fingerprint, 0)
+
         items_by_type = defaultdict(list)
         for item in restore_user.get_fixture_data_items():
             data_type = user_types.get(item.data_type_id)
@@ -92,7 +126,19 @@ class ItemListsProvider(FixtureProvider):
             return sorted(items_by_type.get(data_type, []),
                           key=attrgetter('sort_key'))
 
-        return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id)
+        if synced is None:
+            return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id)
+
+        fixtures = []
+        for data_type, elements in self._iter_fixtures_by_type(
+                user_types, get_items_by_type, restore_user.user_id):
+            content = b"".join(ElementTree.tostring(element, encoding='utf-8') for element in elements)
+            fixture_id = self._fixture_id(data_type)
+            fingerprint = _fingerprint(content)
+            if not synced.is_unchanged(fixture_id, fingerprint):
+                synced.add(fixture_id, fingerprint, len(content))
+                fixtures.extend(elements)
+        return fixtures
 
     def _set_cached_type(self, item, data_type):
         # set the cached version used by the object so that it doesn't
@@ -101,16 +147,25 @@ class ItemListsProvider(FixtureProvider):
 
     def _get_fixtures(self, data_types, get_items_by_type, user_id):
         fixtures = []
+        for data_type, elements in self._iter_fixtures_by_type(data_types, get_items_by_type, user_id):
+            fixtures.extend(elements)
+        return fixtures
+
+    def _iter_fixtures_by_type(self, data_types, get_items_by_type, user_id):
         for data_type in sorted(data_types.values(), key=attrgetter('tag')):
+            elements = []
             if data_type.is_indexed:
-                fixtures.append(self._get_schema_element(data_type))
+                elements.append(self._get_schema_element(data_type))
             items = get_items_by_type(data_type)
-            fixtures.append(self._get_fixture_element(data_type, user_id, items))
-        return fixtures
+            elements.append(self._get_fixture_element(data_type, user_id, items))
+            yield data_type, elements
+
+    def _fixture_id(self, data_type):
+        return ':'.join((self.id, data_type.tag))
 
     def _get_fixture_element(self, data_type, user_id, items):
         attrib = {
-            'id': ':'.join((self.id, data_type.tag)),
+            'id': self._fixture_id(data_type),
             'user_id': user_id
         }
         if data_type.is_indexed:
@@ -124,8 +179,66 @@ class ItemListsProvider(FixtureProvider):
 
     def _get_schema_element(self, data_type):
         attrs_to_index = [field.field_name for field in data_type.fields if field.is_indexed]
-        fixture_id = ':'.join((self.id, data_type.tag))
-        return get_index_schema_node(fixture_id, attrs_to_index)
+        return get_index_schema_node(self._fixture_id(data_type), attrs_to_index)
+
+
+class SyncedFixtures(object):
+    """Fingerprints of the fixtures on a phone, kept on its sync logs
+
+    A fixture whose fingerprint matches the one recorded on the last
+    sync log is left out of the restore: the phone keeps the copy it
+    already has. Fingerprints of fixtures that are sent or skipped are
+    recorded on the current sync log for the next sync.
+    """
+
+    def __init__(self, last_sync_log, current_sync_log):
+        self.previous = {
+            log.fixture_id: log for log in last_sync_log.last_fixture_syncs
+        } if last_sync_log else {}
+        self.current_sync_log = current_sync_log
+        self.bytes_saved = 0
+
+    @classmethod
+    def for_restore(cls, restore_state):
+        """Get synced fixtures for a restore or `None` to send all fixtures"""
+        if not settings.INCREMENTAL_ITEM_LIST_FIXTURES or restore_state.current_sync_log is None:
+            return None
+        last_sync_log = restore_state.last_sync_log
+        if restore_state.overwrite_cache or app_has_changed(last_sync_log, restore_state.params.app_id):
+            last_sync_log = None
+        return cls(last_sync_log, restore_state.current_sync_log)
+
+    def is_unchanged(self, fixture_id, fingerprint, dependent_ids=()):
+        """Check if the phone has this version of the fixture
+
+        :param dependent_ids: Fixtures generated from the same sources.
+        Their fingerprints are carried forward if the fixture is unchanged.
+        """
+        previous = self.previous.get(fixture_id)
+        if previous is None or previous.fingerprint != fingerprint:
+            return False
+        dependents = [self.previous.get(id_) for id_ in dependent_ids]
+        if not all(dependents):
+            return False
+        for log in [previous] + dependents:
+            self.add(log.fixture_id, log.fingerprint, log.size)
+            self.bytes_saved += log.size
+        return True
+
+    def add(self, fixture_id, fingerprint, size):
+        self.current_sync_log.last_fixture_syncs.append(
+            FixtureSyncLog(fixture_id=fixture_id, fingerprint=fingerprint, size=size)
+        )
+
+    def report_bytes_saved(self):
+        metrics_histogram(
+            'commcare.restores.item_lists.bytes_saved', self.bytes_saved,
+            bucket_tag='size', buckets=[1000, 10000, 100000, 1000000, 10000000], bucket_unit='b',
+        )
+
+
+def _fingerprint(content):
+    return hashlib.md5(content).hexdigest()
 
 
 item_lists = ItemListsProvider()
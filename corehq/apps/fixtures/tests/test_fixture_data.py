@@ -1,8 +1,12 @@
+from types import SimpleNamespace
 from xml.etree import cElementTree as ElementTree
 
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from casexml.apps.case.tests.util import check_xml_line_by_line
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.restore import RestoreParams, RestoreState
 from casexml.apps.phone.tests.utils import \
     call_fixture_generator as call_fixture_generator_raw
 
@@ -11,6 +15,7 @@ from corehq.apps.fixtures.dbaccessors import (
     delete_all_fixture_data_types,
     get_fixture_data_types,
 )
+from corehq.apps.domain.models import Domain
 from corehq.apps.fixtures.exceptions import FixtureVersionError
 from corehq.apps.fixtures.models import (
     FIXTURE_BUCKET,
@@ -310,6 +315,72 @@ class FixtureDataTest(TestCase):
         fixtures = call_fixture_generator(sammy)
         self.assertEqual({item.attrib['user_id'] for item in fixtures}, {sammy.user_id})
 
+    @override_settings(INCREMENTAL_ITEM_LIST_FIXTURES=True)
+    def test_incremental_sync_skips_unchanged_fixtures(self):
+        sandwich = self.make_data_type("sandwich", is_global=True)
+        self.make_data_item(sandwich, "7.39")
+
+        fixtures, first_sync = self.sync()
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:sandwich-index', 'item-list:district'])
+
+        fixtures, second_sync = self.sync(first_sync)
+        self.assertEqual(fixtures, [])
+        self.assertEqual(
+            {log.fixture_id for log in second_sync.last_fixture_syncs},
+            {log.fixture_id for log in first_sync.last_fixture_syncs},
+        )
+
+        # fingerprints are carried forward, so the phone stays in sync
+        fixtures, third_sync = self.sync(second_sync)
+        self.assertEqual(fixtures, [])
+
+    @override_settings(INCREMENTAL_ITEM_LIST_FIXTURES=True)
+    def test_incremental_sync_sends_changed_user_fixture(self):
+        cookie = self.make_data_type("cookie", is_global=False)
+        fixtures, first_sync = self.sync()
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:cookie-index', 'item-list:district'])
+
+        self.data_item.fields["district_id"].field_list[0].field_value = "Delhi_id_2"
+        self.data_item.save()
+        fixtures, second_sync = self.sync(first_sync)
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:district'])
+        self.assertIn(b"Delhi_id_2", ElementTree.tostring(fixtures[0]))
+
+        cookie_item = self.make_data_item(cookie, "2.50")
+        self.addCleanup(cookie_item.add_user(self.user).delete)
+        fixtures, third_sync = self.sync(second_sync)
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:cookie-index'])
+
+    @override_settings(INCREMENTAL_ITEM_LIST_FIXTURES=True)
+    def test_incremental_sync_sends_fixture_after_ownership_removed(self):
+        fixtures, first_sync = self.sync()
+        self.data_item.remove_user(self.user)
+        fixtures, second_sync = self.sync(first_sync)
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:district'])
+        self.assertEqual(len(fixtures[0].find('district_list')), 0)
+        self.fixture_ownership = self.data_item.add_user(self.user)
+
+    @override_settings(INCREMENTAL_ITEM_LIST_FIXTURES=True)
+    def test_sync_with_new_app_sends_all_fixtures(self):
+        fixtures, first_sync = self.sync(app_id="app-build-1")
+        fixtures, second_sync = self.sync(first_sync, app_id="app-build-2")
+        self.assertEqual(self.fixture_ids(fixtures), ['item-list:district'])
+
+    def sync(self, last_sync=None, app_id=None):
+        app = SimpleNamespace(get_id=app_id, copy_of=None) if app_id else None
+        params = RestoreParams(version=V2, sync_log_id=last_sync._id if last_sync else '', app=app)
+        restore_state = RestoreState(
+            Domain(name=self.domain), self.user.to_ota_restore_user(), params)
+        restore_state._last_sync_log = last_sync
+        restore_state.start_sync()
+        fixtures = [ElementTree.fromstring(f) if isinstance(f, bytes) else f
+                    for f in fixturegenerators.item_lists(restore_state)]
+        return fixtures, restore_state.current_sync_log
+
+    @staticmethod
+    def fixture_ids(fixtures):
+        return [fixture.attrib['id'] for fixture in fixtures]
+
     def make_data_type(self, name, is_global):
         data_type = FixtureDataType(
             domain=self.domain,
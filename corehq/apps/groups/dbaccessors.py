@@ -39,6 +39,24 @@ def stale_group_by_name(domain, name, include_docs=True):
     )
 
 
+def stale_groups_by_name(domain, names):
+    """Get groups in a domain by name
+
+    :returns: A dict mapping each name to the first group with that name.
+    Names without a group are left out.
+    """
+    from corehq.apps.groups.models import Group
+    groups = {}
+    for group in Group.view(
+        'groups/by_name',
+        keys=[[domain, name] for name in names],
+        include_docs=True,
+        stale=settings.COUCH_STALE_QUERY,
+    ):
+        groups.setdefault(group.name, group)
+    return groups
+
+
 def refresh_group_views():
     from corehq.apps.groups.models import Group
     for view_name in [
@@ -1,14 +1,24 @@
+import hashlib
+import uuid
+import zlib
 from collections import defaultdict
 from itertools import groupby
 from xml.etree.cElementTree import Element, SubElement
 
+from django.conf import settings
 from django.contrib.postgres.fields.array import ArrayField
+from django.core.cache import cache
 from django.db.models import IntegerField, Q
 
 from django_cte import With
 from django_cte.raw import raw_cte_sql
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.utils import (
+    GLOBAL_USER_ID,
+    app_has_changed,
+    write_fixture_items_to_io,
+)
 
 from corehq import toggles
 from corehq.apps.app_manager.const import (
@@ -24,6 +34,9 @@ from corehq.apps.locations.models import (
     LocationType,
     SQLLocation,
 )
+from corehq.util.metrics import metrics_counter
+
+LOCATION_FIXTURE_CACHE_TIMEOUT = 24 * 60 * 60
 
 
 class LocationSet(object):
@@ -61,18 +74,12 @@ def should_sync_locations(last_sync, locations_queryset, restore_state):
     """
     restore_user = restore_state.restore_user
     return (
-        _app_has_changed(last_sync, restore_state.params.app_id)
+        app_has_changed(last_sync, restore_state.params.app_id)
         or _fixture_has_changed(last_sync, restore_user)
         or _locations_have_changed(last_sync, locations_queryset, restore_user)
     )
 
 
-def _app_has_changed(last_sync, app_id):
-    return (last_sync and last_sync.build_id is not None
-            and app_id is not None
-            and app_id != last_sync.build_id)
-
-
 def _fixture_has_changed(last_sync, restore_user):
     return (not last_sync or not last_sync.date or
             restore_user.get_fixture_last_modified() >= last_sync.date)
@@ -123,8 +130,67 @@ class LocationFixtureProvider(FixtureProvider):
             return []
 
         data_fields = _get_location_data_fields(restore_user.domain)
+        if settings.CACHE_LOCATION_FIXTURES and not restore_state.overwrite_cache:
+            return self._get_cached_xml_nodes(restore_user, locations_queryset, data_fields)
         return self.serializer.get_xml_nodes(self.id, restore_user, locations_queryset, data_fields)
 
+    def _get_cached_xml_nodes(self, restore_user, locations_queryset, data_fields):
+        """Get the fixture from a cache shared by users with the same locations
+
+        Users assigned to the same locations get the same locations
+        subtrees, so the serialized fixture is cached by fixture id,
+        assigned locations and location data fields. Entries are
+        invalidated by location changes (see `invalidate_location_fixtures`).
+        """
+        key = _location_fixture_cache_key(
+            restore_user.domain, self.id, restore_user.get_location_fixture_root_ids(), data_fields)
+        data = cache.get(key)
+        if data:
+            metrics_counter('commcare.fixture.locations.cache_hit', tags={'fixture': self.id})
+            data = zlib.decompress(data)
+        else:
+            metrics_counter('commcare.fixture.locations.cache_miss', tags={'fixture': self.id})
+            nodes = self.serializer.get_xml_nodes(
+                self.id, _GlobalUser(restore_user), locations_queryset, data_fields)
+            data = write_fixture_items_to_io(nodes).read()
+            cache.set(key, zlib.compress(data), LOCATION_FIXTURE_CACHE_TIMEOUT)
+        return [data.replace(GLOBAL_USER_ID.encode('utf-8'), restore_user.user_id.encode('utf-8'))]
+
+
+class _GlobalUser(object):
+    """Restore user stand-in that renders the user id as a placeholder"""
+
+    def __init__(self, restore_user):
+        self.domain = restore_user.domain
+        self.user_id = GLOBAL_USER_ID
+
+
+def _location_fixture_cache_key(domain, fixture_id, root_ids, data_fields):
+    digest = hashlib.md5(repr((
+        None if root_ids is None else sorted(root_ids),
+        [field.slug for field in data_fields],
+    )).encode('utf-8')).hexdigest()
+    return 'location-fixture:{}:{}:{}:{}'.format(
+        domain, fixture_id, _get_location_fixture_version(domain), digest)
+
+
+def _location_fixture_version_key(domain):
+    return 'location-fixture-version:{}'.format(domain)
+
+
+def _get_location_fixture_version(domain):
+    key = _location_fixture_version_key(domain)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_location_fixtures(domain):
+    """Invalidate cached location fixtures for all users of a domain"""
+    cache.delete(_location_fixture_version_key(domain))
+
 
 class HierarchicalLocationSerializer(object):
 
@@ -353,13 +419,33 @@ int_array = ArrayField(int_field)
 
 
 def get_location_fixture_queryset(user):
+    return get_location_fixture_queryset_for_root_ids(user.domain, get_location_fixture_root_ids(user))
+
+
+def get_location_fixture_queryset_for_root_ids(domain, root_ids):
+    """:param root_ids: See `get_location_fixture_root_ids`"""
+    if root_ids is None:
+        return SQLLocation.active_objects.filter(domain=domain).prefetch_related('location_type')
+
+    if not root_ids:
+        return SQLLocation.objects.none()
+
+    return _location_queryset_helper(domain, root_ids)
+
+
+def get_location_fixture_root_ids(user):
+    """Get primary keys of the locations a user's location fixture is built from
+
+    :returns: A list of `SQLLocation` ids or `None` if all locations
+    in the domain are synced.
+    """
     if toggles.SYNC_ALL_LOCATIONS.enabled(user.domain):
-        return SQLLocation.active_objects.filter(domain=user.domain).prefetch_related('location_type')
+        return None
 
     user_locations = user.get_sql_locations(user.domain)
 
     if user_locations.query.is_empty():
-        return user_locations
+        return []
 
     user_location_ids = list(user_locations.order_by().values_list("id", flat=True))
 
@@ -373,7 +459,7 @@ def get_location_fixture_queryset(user):
             list(SQLLocation.objects.filter(location_id__in=related_location_ids).values_list('id', flat=True))
         )
 
-    return _location_queryset_helper(user.domain, user_location_ids)
+    return user_location_ids
 
 
 def _location_queryset_helper(domain, location_pks):
@@ -0,0 +1,59 @@
+from time import time
+from xml.etree import cElementTree as ElementTree
+
+from django.core.management import BaseCommand
+from django.test import override_settings
+
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.restore import RestoreParams, RestoreState
+
+from corehq.apps.domain.models import Domain
+from corehq.apps.locations.fixtures import (
+    flat_location_fixture_generator,
+    invalidate_location_fixtures,
+    location_fixture_generator,
+)
+from corehq.apps.users.models import CommCareUser
+
+
+class Command(BaseCommand):
+    help = """
+    Time generating the location fixtures for a user without the shared
+    location fixture cache, with a cold cache and with a warm cache.
+    Meant to be run against a domain with many (e.g. 50k) locations.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('username')
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def handle(self, domain, username, iterations, **options):
+        user = CommCareUser.get_by_username(username)
+        assert user and user.domain == domain, "unknown user: {}".format(username)
+        project = Domain.get_by_name(domain)
+        restore_user = user.to_ota_restore_user()
+
+        for generator in [location_fixture_generator, flat_location_fixture_generator]:
+            with override_settings(CACHE_LOCATION_FIXTURES=False):
+                uncached = self._time(generator, project, restore_user, iterations)
+            with override_settings(CACHE_LOCATION_FIXTURES=True):
+                cold = []
+                for i in range(iterations):
+                    invalidate_location_fixtures(domain)
+                    cold.extend(self._time(generator, project, restore_user, 1))
+                warm = self._time(generator, project, restore_user, iterations)
+            print("{}: uncached {:.3f}s, cold cache {:.3f}s, warm cache {:.3f}s".format(
+                generator.id, min(uncached), min(cold), min(warm)))
+
+    def _time(self, generator, project, restore_user, iterations):
+        times = []
+        for i in range(iterations):
+            restore_state = RestoreState(
+                project, restore_user, RestoreParams(version=V2), is_async=False, overwrite_cache=False)
+            start = time()
+            for item in generator(restore_state):
+                if not isinstance(item, bytes):
+                    ElementTree.tostring(item, encoding='utf-8')
+            times.append(time() - start)
+        return times
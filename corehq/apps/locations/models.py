@@ -3,8 +3,11 @@ from collections import defaultdict
 from datetime import datetime
 from functools import partial
 
+from django.conf import settings
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 import jsonfield
 from django_bulk_update.helper import bulk_update as bulk_update_helper
@@ -220,6 +223,7 @@ class LocationType(models.Model):
 
         cls._pre_bulk_save(objects)
         cls.objects.bulk_create(objects)
+        _invalidate_location_fixtures(objects[0].domain)
         return list(objects)
 
     @classmethod
@@ -233,6 +237,8 @@ class LocationType(models.Model):
             o.last_modified = now
         # the caller should call 'sync_administrative_status' for individual objects
         bulk_update_helper(objects)
+        if objects:
+            _invalidate_location_fixtures(objects[0].domain)
 
     @classmethod
     def bulk_delete(cls, objects):
@@ -901,3 +907,30 @@ class LocationRelation(models.Model):
         unique_together = [
             ('location_a', 'location_b')
         ]
+
+
+@receiver(post_save, sender=LocationType)
+@receiver(post_delete, sender=LocationType)
+@receiver(post_save, sender=SQLLocation)
+@receiver(post_delete, sender=SQLLocation)
+def location_changed_receiver(sender, instance, **kwargs):
+    _invalidate_location_fixtures(instance.domain)
+
+
+@receiver(post_save, sender=LocationRelation)
+@receiver(post_delete, sender=LocationRelation)
+def location_relation_changed_receiver(sender, instance, **kwargs):
+    try:
+        domain = instance.location_a.domain
+    except SQLLocation.DoesNotExist:
+        return  # deleted along with its location, which was handled already
+    _invalidate_location_fixtures(domain)
+
+
+def _invalidate_location_fixtures(domain):
+    if not settings.CACHE_LOCATION_FIXTURES:
+        return
+    from corehq.apps.locations.fixtures import invalidate_location_fixtures
+    # wait for the commit so that restores in the meantime don't cache
+    # fixtures built from the uncommitted state under a new version
+    transaction.on_commit(lambda: invalidate_location_fixtures(domain))
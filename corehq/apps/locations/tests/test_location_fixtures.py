@@ -4,7 +4,7 @@ from collections import namedtuple
 from datetime import datetime, timedelta
 from xml.etree import cElementTree as ElementTree
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 import mock
 
@@ -37,6 +37,7 @@ from ..fixtures import (
     _location_to_fixture,
     flat_location_fixture_generator,
     get_location_fixture_queryset,
+    invalidate_location_fixtures,
     location_fixture_generator,
     related_locations_fixture_generator,
     should_sync_flat_fixture,
@@ -548,6 +549,75 @@ class WebUserLocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocations
         )
 
 
+@override_settings(CACHE_LOCATION_FIXTURES=True)
+@mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
+class CachedLocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
+
+    location_type_names = ['state', 'county', 'city']
+    location_structure = TEST_LOCATION_STRUCTURE
+
+    def setUp(self):
+        super(CachedLocationFixturesTest, self).setUp()
+        invalidate_location_fixtures(self.domain)
+        self.user = create_restore_user(self.domain, 'user', '123')
+        self.other_user = create_restore_user(self.domain, 'other-user', '123')
+        self.user._couch_user.set_location(self.locations['Suffolk'])
+        self.other_user._couch_user.set_location(self.locations['Suffolk'])
+
+    def tearDown(self):
+        self.user._couch_user.delete()
+        self.other_user._couch_user.delete()
+        self.locations['Boston'].name = 'Boston'
+        self.locations['Boston'].save()
+        super(CachedLocationFixturesTest, self).tearDown()
+
+    @flag_enabled('HIERARCHICAL_LOCATION_FIXTURE')
+    def get_fixture(self, user):
+        [data] = call_fixture_generator(location_fixture_generator, user)
+        self.assertTrue(data.startswith(b'<!--items=1-->'), data)
+        return data[len(b'<!--items=1-->'):]
+
+    def test_fixture_matches_uncached_fixture(self):
+        desired_fixture = self._assemble_expected_fixture(
+            'simple_fixture', ['Massachusetts', 'Suffolk', 'Boston', 'Revere'])
+        self.assertXmlEqual(desired_fixture, self.get_fixture(self.user))
+
+    def test_fixture_shared_by_users_with_same_locations(self):
+        self.get_fixture(self.user)
+        with mock.patch('corehq.apps.locations.fixtures.HierarchicalLocationSerializer.get_xml_nodes') as get:
+            fixture = self.get_fixture(self.other_user)
+        get.assert_not_called()
+        self.assertEqual(
+            ElementTree.fromstring(fixture).attrib['user_id'],
+            self.other_user.user_id,
+        )
+
+    def test_users_with_other_locations_do_not_share_fixture(self):
+        self.get_fixture(self.user)
+        self.other_user._couch_user.set_location(self.locations['Middlesex'])
+        fixture = self.get_fixture(self.other_user)
+        self.assertIn(self.locations['Cambridge'].location_id.encode('utf-8'), fixture)
+        self.assertNotIn(self.locations['Boston'].location_id.encode('utf-8'), fixture)
+
+    def test_location_save_invalidates_fixture_on_commit(self):
+        self.get_fixture(self.user)
+        with mock.patch('corehq.apps.locations.models.transaction.on_commit') as on_commit:
+            self.locations['Boston'].name = 'Beantown'
+            self.locations['Boston'].save()
+        self.assertNotIn(b'Beantown', self.get_fixture(self.other_user))
+
+        for args, kwargs in on_commit.call_args_list:
+            args[0]()  # commit
+        self.assertIn(b'Beantown', self.get_fixture(self.other_user))
+
+    @override_settings(CACHE_LOCATION_FIXTURES=False)
+    def test_location_save_without_caching(self):
+        with mock.patch('corehq.apps.locations.models.transaction.on_commit') as on_commit:
+            self.locations['Boston'].name = 'Beantown'
+            self.locations['Boston'].save()
+        on_commit.assert_not_called()
+
+
 @mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
 class ForkedHierarchyLocationFixturesTest(TestCase, FixtureHasLocationsMixin):
     """
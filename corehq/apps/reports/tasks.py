@@ -1,9 +1,17 @@
 import os
+import shutil
 import uuid
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import closing, contextmanager, suppress
 from datetime import datetime, timedelta
+from io import RawIOBase
+from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
+from django.db import connections
 
 from celery.schedules import crontab
 from celery.task import periodic_task, task
@@ -33,6 +41,7 @@ from corehq.elastic import (
     stream_es_query,
 )
 from corehq.form_processor.interfaces.dbaccessors import FormAccessors
+from corehq.form_processor.models import XFormInstanceSQL
 from corehq.pillows.mappings.app_mapping import APP_INDEX
 from corehq.util.dates import get_timestamp_for_filename
 from corehq.util.files import TransientTempfile, safe_filename_header
@@ -48,6 +57,8 @@ from .analytics.esaccessors import (
 
 logging = get_task_logger(__name__)
 EXPIRE_TIME = ONE_DAY
+MULTIMEDIA_EXPORT_CHUNK_SIZE = 1024 * 1024
+MULTIMEDIA_EXPORT_EXPIRY_MINUTES = 60
 
 _calc_props_soft_assert = soft_assert(to='{}@{}'.format('dmore', 'dimagi.com'), exponential_backoff=False)
 
@@ -262,12 +273,16 @@ def build_form_multimedia_zip(
     all_case_ids = set.union(*(info['case_ids'] for info in forms_info)) if forms_info else set()
     case_id_to_name = _get_case_names(domain, all_case_ids)
 
-    with TransientTempfile() as temp_path:
-        with open(temp_path, 'wb') as f:
-            _write_attachments_to_file(temp_path, num_forms, forms_info, case_id_to_name)
-        with open(temp_path, 'rb') as f:
-            zip_name = 'multimedia-{}'.format(unidecode(export.name))
-            _save_and_expose_zip(f, zip_name, domain, download_id)
+    zip_name = 'multimedia-{}'.format(unidecode(export.name))
+    if settings.MULTIMEDIA_EXPORT_FETCH_WORKERS > 1:
+        with _stream_and_expose_zip(zip_name, domain, download_id) as f:
+            _stream_attachments_to_file(f, num_forms, forms_info, case_id_to_name)
+    else:
+        with TransientTempfile() as temp_path:
+            with open(temp_path, 'wb') as f:
+                _write_attachments_to_file(temp_path, num_forms, forms_info, case_id_to_name)
+            with open(temp_path, 'rb') as f:
+                _save_and_expose_zip(f, zip_name, domain, download_id)
 
     DownloadBase.set_progress(build_form_multimedia_zip, num_forms, num_forms)
 
@@ -330,24 +345,218 @@ def _write_attachments_to_file(fpath, num_forms, forms_info, case_id_to_name):
 
 
 def _save_and_expose_zip(f, zip_name, domain, download_id):
-    expiry_minutes = 60
-    get_blob_db().put(
-        f,
+    get_blob_db().put(f, **_get_zip_blob_meta_args(domain, download_id))
+    _expose_zip(zip_name, download_id)
+
+
+def _get_zip_blob_meta_args(domain, download_id):
+    return dict(
         key=download_id,
         domain=domain,
         parent_id=domain,
         type_code=CODES.form_multimedia,
-        timeout=expiry_minutes,
+        timeout=MULTIMEDIA_EXPORT_EXPIRY_MINUTES,
     )
+
+
+def _expose_zip(zip_name, download_id):
     expose_blob_download(
         download_id,
-        expiry=expiry_minutes * 60,  # seconds
+        expiry=MULTIMEDIA_EXPORT_EXPIRY_MINUTES * 60,  # seconds
         mimetype='application/zip',
         content_disposition=safe_filename_header(zip_name, 'zip'),
         download_id=download_id,
     )
 
 
+def _stream_attachments_to_file(fileobj, num_forms, forms_info, case_id_to_name):
+    """Like `_write_attachments_to_file` but for a file that may not be seekable
+
+    Attachments are fetched ahead of time on a thread pool and copied
+    into their zip entries in chunks, so they are never held in memory
+    whole.
+    """
+    total_size = 0
+    with zipfile.ZipFile(fileobj, 'w') as multimedia_zipfile, \
+            closing(_iter_prefetched_attachments(forms_info)) as attachments:
+        for form_number, form_info, attachment, content in attachments:
+            with content:
+                total_size += attachment['size']
+                if total_size >= MAX_MULTIMEDIA_EXPORT_SIZE:
+                    raise Exception("Refusing to make multimedia export bigger than {} GB"
+                                    .format(MAX_MULTIMEDIA_EXPORT_SIZE / 1024**3))
+                filename = _format_filename(
+                    form_info,
+                    attachment['question_id'],
+                    attachment['extension'],
+                    case_id_to_name
+                )
+                zip_info = zipfile.ZipInfo(filename, attachment['timestamp'])
+                _write_stored_entry(multimedia_zipfile, zip_info, content)
+            if attachment is form_info['attachments'][-1]:
+                DownloadBase.set_progress(build_form_multimedia_zip, form_number, num_forms)
+
+
+def _write_stored_entry(zip_file, zip_info, content):
+    """Write an uncompressed zip entry whose CRC and size are known up front
+
+    `ZipFile.open(..., 'w')` adds a data descriptor after each entry when
+    the file is not seekable. Some streaming readers, such as Java's
+    `ZipInputStream`, reject data descriptors on stored entries, so the
+    local header is written with the final CRC and size instead. This
+    follows what `ZipFile.write` does for directory entries.
+    """
+    zip_info.compress_type = zipfile.ZIP_STORED
+    zip_info.file_size = zip_info.compress_size = content.size
+    zip_info.CRC = content.crc
+    # This relies on CPython's private `ZipFile` internals: `_lock`,
+    # `_writecheck`, `_didModify`, `fp` (a `_Tellable` wrapper when the
+    # file is not seekable), `start_dir`, `filelist` and `NameToInfo`,
+    # plus `ZipInfo.FileHeader`. Check them when upgrading Python.
+    with zip_file._lock:
+        zip_info.header_offset = zip_file.fp.tell()
+        zip_file._writecheck(zip_info)
+        zip_file._didModify = True
+        zip_file.fp.write(zip_info.FileHeader())
+        shutil.copyfileobj(content, zip_file.fp, MULTIMEDIA_EXPORT_CHUNK_SIZE)
+        zip_file.filelist.append(zip_info)
+        zip_file.NameToInfo[zip_info.filename] = zip_info
+        zip_file.start_dir = zip_file.fp.tell()
+
+
+def _iter_prefetched_attachments(forms_info):
+    """Yield `(form_number, form_info, attachment, content)` for each
+    attachment of the given forms
+
+    `content` is a file object that must be closed by the caller. The
+    next few attachments are fetched concurrently while it is consumed.
+    """
+    workers = max(settings.MULTIMEDIA_EXPORT_FETCH_WORKERS, 1)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='multimedia-fetch') as executor:
+        try:
+            for form_number, form_info in enumerate(forms_info, 1):
+                for attachment in form_info['attachments']:
+                    future = executor.submit(_fetch_attachment, form_info['form'], attachment['name'])
+                    pending.append(((form_number, form_info, attachment), future))
+                    if len(pending) > 2 * workers:  # bounded look-ahead
+                        yield _pop_fetched_attachment(pending)
+            while pending:
+                yield _pop_fetched_attachment(pending)
+        finally:
+            for __, future in pending:
+                if not future.cancel() and future.exception() is None:
+                    future.result().close()
+
+
+def _pop_fetched_attachment(pending):
+    item, future = pending.popleft()
+    return item + (future.result(),)
+
+
+def _fetch_attachment(form, attachment_name):
+    """Copy a form attachment to a temporary file
+
+    Small attachments are kept in memory, larger ones are spooled to
+    disk. The returned file has `size` and `crc` attributes.
+    """
+    try:
+        content = SpooledTemporaryFile(max_size=MULTIMEDIA_EXPORT_CHUNK_SIZE)
+        try:
+            crc = 0
+            with _open_attachment(form, attachment_name) as stream:
+                for chunk in iter(lambda: stream.read(MULTIMEDIA_EXPORT_CHUNK_SIZE), b''):
+                    crc = zlib.crc32(chunk, crc)
+                    content.write(chunk)
+            content.size = content.tell()
+            content.crc = crc
+            content.seek(0)
+        except BaseException:
+            content.close()
+            raise
+        return content
+    finally:
+        connections.close_all()
+
+
+def _open_attachment(form, attachment_name):
+    if isinstance(form, XFormInstanceSQL):
+        return form.get_attachment_meta(attachment_name).open()
+    return form.fetch_attachment(attachment_name, stream=True)
+
+
+@contextmanager
+def _stream_and_expose_zip(zip_name, domain, download_id):
+    """Upload what is written to the yielded file to the blob db while it
+    is being written and expose it for download when it is complete
+
+    The upload reads from a pipe on its own thread. If writing fails the
+    upload fails too and anything it saved is deleted.
+    """
+    read_fd, write_fd = os.pipe()
+    reader = _PipeReader(read_fd)
+    writer = open(write_fd, 'wb')
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='multimedia-upload') as executor:
+        upload = executor.submit(_put_in_thread, reader, **_get_zip_blob_meta_args(domain, download_id))
+        try:
+            yield writer
+            writer.close()
+        except BaseException as err:
+            reader.aborted = True
+            with suppress(BrokenPipeError):
+                writer.close()
+            wait([upload])
+            get_blob_db().delete(key=download_id)
+            if isinstance(err, BrokenPipeError) and upload.exception() is not None:
+                # the upload stopped reading, report why
+                raise upload.exception() from err
+            raise
+        upload.result()
+    _expose_zip(zip_name, download_id)
+
+
+def _put_in_thread(content, **blob_meta_args):
+    try:
+        with content:
+            return get_blob_db().put(content, **blob_meta_args)
+    finally:
+        connections.close_all()
+
+
+class _PipeReader(RawIOBase):
+    """Read end of a pipe for the blob db to upload from
+
+    Reading fails rather than ending normally if the writer is aborted.
+    Like `BlobStream` it can only be "seeked" to its current position.
+    """
+
+    def __init__(self, fd):
+        self._file = open(fd, 'rb', buffering=0)
+        self._amount_read = 0
+        self.aborted = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self._file.readinto(buffer)
+        if not size and self.aborted:
+            raise IOError("multimedia zip was not completed")
+        self._amount_read += size
+        return size
+
+    def tell(self):
+        return self._amount_read
+
+    def seek(self, offset, from_what=os.SEEK_SET):
+        if from_what != os.SEEK_SET or offset != self._amount_read:
+            raise ValueError("seek not supported")
+        return self._amount_read
+
+    def close(self):
+        self._file.close()
+        return super().close()
+
 
 def _convert_legacy_indices_to_export_properties(indices):
     # Strip the prefixed 'form' and change '.'s to '-'s
@@ -1,4 +1,8 @@
 import datetime
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 from django.test import SimpleTestCase
 
@@ -14,8 +18,10 @@ from corehq.apps.export.models import (
     TableConfiguration,
 )
 from corehq.apps.reports.tasks import (
+    _PipeReader,
     _extract_form_attachment_info,
     _get_export_properties,
+    _stream_attachments_to_file,
 )
 from corehq.blobs.models import BlobMeta
 from corehq.form_processor.models import XFormInstanceSQL
@@ -111,3 +117,45 @@ class FormMultimediaExportTest(SimpleTestCase):
                 self.assertTrue(image_2_name in attachments)
                 self.assertEqual(attachments[image_1_name]['question_id'], "image_1")
                 self.assertEqual(attachments[image_2_name]['question_id'], "my_group-image_2")
+
+    def test_stream_attachments_to_file(self):
+        zip_file = BytesIO()
+        with mock.patch('corehq.apps.reports.tasks.DownloadBase.set_progress') as set_progress:
+            _stream_attachments_to_file(zip_file, 1, self._get_forms_info(), {})
+        set_progress.assert_called_once_with(mock.ANY, 1, 1)
+        self._assert_multimedia_zip(zip_file)
+
+    def test_stream_attachments_through_pipe(self):
+        # the upload reads from a pipe, which zipfile cannot seek or tell
+        forms_info = self._get_forms_info()
+        read_fd, write_fd = os.pipe()
+        with _PipeReader(read_fd) as reader, \
+                ThreadPoolExecutor(max_workers=1) as executor:
+            upload = executor.submit(reader.read)
+            with open(write_fd, 'wb') as writer, \
+                    mock.patch('corehq.apps.reports.tasks.DownloadBase.set_progress'):
+                _stream_attachments_to_file(writer, 1, forms_info, {})
+            zip_file = BytesIO(upload.result())
+        self._assert_multimedia_zip(zip_file)
+
+    def _get_forms_info(self):
+        form = {"image": "1234.jpg", "audio": "5678.mp3"}
+        couch_xform = XFormInstance(
+            _id="abc123",
+            received_on=datetime.datetime(2020, 3, 4, 5, 6, 7),
+            form=form,
+        )
+        couch_xform.deferred_put_attachment(b"jpeg" * 1000, "1234.jpg", content_type="image/jpeg")
+        couch_xform.deferred_put_attachment(b"mp3", "5678.mp3", content_type="audio/mpeg")
+        return [_extract_form_attachment_info(couch_xform, set())]
+
+    def _assert_multimedia_zip(self, zip_file):
+        with zipfile.ZipFile(zip_file) as multimedia_zipfile:
+            self.assertIsNone(multimedia_zipfile.testzip())
+            self.assertEqual(multimedia_zipfile.read("image-user_unknown-form_abc123.jpg"), b"jpeg" * 1000)
+            self.assertEqual(multimedia_zipfile.read("audio-user_unknown-form_abc123.mp3"), b"mp3")
+            info = multimedia_zipfile.getinfo("audio-user_unknown-form_abc123.mp3")
+            self.assertEqual(info.date_time, (2020, 3, 4, 5, 6, 7))
+            self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+            # no data descriptors, which some streaming readers reject
+            self.assertFalse(info.flag_bits & 0x08)
@@ -55,6 +55,10 @@ NAMED_EXPRESSION_PREFIX = 'NamedExpression'
 NAMED_FILTER_PREFIX = 'NamedFilter'
 
 
+# hash of the indicator values of a row, see SQLSettings.row_fingerprints
+ROW_FINGERPRINT_COLUMN = 'ucr_row_fingerprint'
+
+
 DATA_SOURCE_TYPE_STANDARD = 'standard'
 DATA_SOURCE_TYPE_AGGREGATE = 'aggregate'
 
@@ -33,7 +33,7 @@ from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from corehq.util.couch import get_db_by_doc_type
 
-from .utils import eval_statements
+from .utils import compile_statement
 
 
 class IdentityExpressionSpec(JsonObject):
@@ -512,14 +512,27 @@ class RelatedDocExpressionSpec(JsonObject):
     @staticmethod
     @ucr_context_cache(vary_on=('related_doc_type', 'doc_id',))
     def _get_document(related_doc_type, doc_id, context):
+        prefetched_docs = context.prefetched_docs
+        if prefetched_docs is not None:
+            found, doc = prefetched_docs.get(related_doc_type, doc_id)
+            if found:
+                return doc
+
+        doc = RelatedDocExpressionSpec._fetch_document(related_doc_type, doc_id, context.root_doc['domain'])
+        if prefetched_docs is not None:
+            prefetched_docs.add(related_doc_type, doc_id, doc)
+        return doc
+
+    @staticmethod
+    def _fetch_document(related_doc_type, doc_id, domain):
         document_store = get_document_store_for_doc_type(
-            context.root_doc['domain'], related_doc_type,
+            domain, related_doc_type,
             load_source="related_doc_expression")
         try:
             doc = document_store.get_document(doc_id)
         except DocumentNotFoundError:
             return None
-        if context.root_doc['domain'] != doc.get('domain'):
+        if domain != doc.get('domain'):
             return None
         return doc
 
@@ -527,7 +540,7 @@ class RelatedDocExpressionSpec(JsonObject):
         assert context.root_doc['domain']
         doc = self._get_document(self.related_doc_type, doc_id, context)
         # explicitly use a new evaluation context since this is a new document
-        return self._value_expression(doc, EvaluationContext(doc, 0))
+        return self._value_expression(doc, EvaluationContext(doc, 0, prefetched_docs=context.prefetched_docs))
 
     def __str__(self):
         return "{}[{}]/{}".format(self.related_doc_type,
@@ -690,12 +703,20 @@ class EvalExpressionSpec(JsonObject):
 
     def configure(self, context_variables):
         self._context_variables = context_variables
+        try:
+            self._compiled_statement = compile_statement(self.statement)
+        except SyntaxError:
+            # preserve the old behaviour of evaluating to None for unparseable statements
+            self._compiled_statement = None
+        self._transform = transform_from_datatype(self.datatype)
 
     def __call__(self, item, context=None):
+        if self._compiled_statement is None:
+            return None
         var_dict = self.get_variables(item, context)
         try:
-            untransformed_value = eval_statements(self.statement, var_dict)
-            return transform_from_datatype(self.datatype)(untransformed_value)
+            untransformed_value = self._compiled_statement(var_dict)
+            return self._transform(untransformed_value)
         except (InvalidExpression, SyntaxError, TypeError, ZeroDivisionError):
             return None
 
@@ -3,6 +3,7 @@ import copy
 import operator
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
 
 import six
 from simpleeval import (
@@ -49,6 +50,12 @@ class EvalNoMethods(SimpleEval):
         return super(EvalNoMethods, self)._eval_call(node)
 
 
+ALLOWED_VARIABLE_TYPES = {float, Decimal, date, datetime, type(None), bool}.union(set(six.integer_types))
+
+# compiled statements are shared across all data sources in a process
+COMPILED_STATEMENT_CACHE_SIZE = 1000
+
+
 def eval_statements(statement, variable_context):
     """Evaluates math statements and returns the value
 
@@ -56,13 +63,42 @@ def eval_statements(statement, variable_context):
         statement: a simple python-like math statement
         variable_context: a dict with variable names as key and assigned values as dict values
     """
-    # variable values should be numbers
-    var_types = set(type(value) for value in variable_context.values())
-    if not var_types.issubset({float, Decimal, date, datetime, type(None), bool}.union(set(six.integer_types))):
-        raise InvalidExpression('Context contains disallowed types')
+    return compile_statement(statement)(variable_context)
+
+
+@lru_cache(maxsize=COMPILED_STATEMENT_CACHE_SIZE)
+def compile_statement(statement):
+    """Parse a statement once and return a reusable ``CompiledStatement``
+
+    Raises ``SyntaxError`` if the statement can't be parsed.
+    """
+    return CompiledStatement(statement)
+
+
+class CompiledStatement(object):
+    """A pre-parsed evaluator statement.
+
+    Evaluation still goes through ``EvalNoMethods`` with ``SAFE_OPERATORS``
+    and ``FUNCTIONS`` so the safety whitelist is unchanged; only the parse
+    step is skipped.
+    """
 
-    evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=variable_context, functions=FUNCTIONS)
-    return evaluator.eval(statement)
+    def __init__(self, statement):
+        self.statement = statement
+        body = ast.parse(statement.strip()).body
+        if not body or not hasattr(body[0], 'value'):
+            raise SyntaxError("Statement is not an expression: {}".format(statement))
+        self._node = body[0].value
+
+    def __call__(self, variable_context):
+        # variable values should be numbers
+        var_types = set(type(value) for value in variable_context.values())
+        if not var_types.issubset(ALLOWED_VARIABLE_TYPES):
+            raise InvalidExpression('Context contains disallowed types')
+
+        evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=variable_context, functions=FUNCTIONS)
+        evaluator.expr = self.statement
+        return evaluator._eval(self._node)
 
 
 SUM = 'sum'
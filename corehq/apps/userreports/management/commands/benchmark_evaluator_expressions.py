@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.expressions.utils import (
+    FUNCTIONS,
+    SAFE_OPERATORS,
+    EvalNoMethods,
+    compile_statement,
+)
+
+DEFAULT_STATEMENTS = [
+    "a + b - c + 6",
+    "a * b if a > b else b - a",
+    "timedelta_to_seconds(b - a) if a and b else 0",
+    "'yes' if a > 5 and not c else 'no'",
+]
+
+
+class Command(BaseCommand):
+    help = "Compare the per-doc cost of parsing evaluator statements against reusing compiled statements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, default=10000)
+        parser.add_argument('--statement', action='append', dest='statements')
+
+    def handle(self, docs, statements, **options):
+        statements = statements or DEFAULT_STATEMENTS
+        doc = {'a': 7, 'b': 3, 'c': 2}
+        for statement in statements:
+            expression = ExpressionFactory.from_spec({
+                "type": "evaluator",
+                "statement": statement,
+                "context_variables": {
+                    name: {"type": "property_name", "property_name": name}
+                    for name in doc
+                },
+            })
+            compiled = compile_statement(statement)
+
+            def _parse_every_time():
+                evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=doc, functions=FUNCTIONS)
+                evaluator.eval(statement)
+
+            print(statement)
+            _print_timing('parse per doc', timeit.timeit(_parse_every_time, number=docs), docs)
+            _print_timing('compiled', timeit.timeit(lambda: compiled(doc), number=docs), docs)
+            _print_timing('expression', timeit.timeit(lambda: expression(doc), number=docs), docs)
+
+
+def _print_timing(label, seconds, docs):
+    print("    {:<15} {:8.2f} us/doc".format(label, seconds / docs * 1000000))
@@ -0,0 +1,75 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.change_feed.data_sources import (
+    get_document_store_for_doc_type,
+)
+from corehq.apps.userreports.models import get_datasource_config
+from corehq.apps.userreports.specs import EvaluationContext
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a recorded chunk of docs through a set of data sources, comparing "
+        "the doc-by-doc transform with the bulk transform used when UCR_BULK_TRANSFORM is on"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('docs_file', help='JSON file containing a list of form or case docs')
+        parser.add_argument('data_source_ids', nargs='+')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--record', dest='doc_ids_file',
+            help='Instead of benchmarking, fetch the doc ids listed in this file '
+                 '(one per line) and write them to docs_file',
+        )
+
+    def handle(self, domain, docs_file, data_source_ids, repeat, doc_ids_file, **options):
+        configs = [get_datasource_config(data_source_id, domain)[0] for data_source_id in data_source_ids]
+        if doc_ids_file:
+            _record_docs(domain, configs[0].referenced_doc_type, doc_ids_file, docs_file)
+            return
+
+        with open(docs_file) as f:
+            docs = json.load(f)
+
+        # make sure filters and indicators are built before timing
+        for config in configs:
+            config.get_all_values_bulk(docs[:1])
+
+        per_doc = min(timeit.repeat(lambda: _transform_docs(configs, docs), number=1, repeat=repeat))
+        bulk = min(timeit.repeat(lambda: _transform_docs_bulk(configs, docs), number=1, repeat=repeat))
+        print("{} docs through {} data sources".format(len(docs), len(configs)))
+        print("    per doc: {:8.3f}s ({:8.1f} docs/s)".format(per_doc, len(docs) / per_doc))
+        print("    bulk:    {:8.3f}s ({:8.1f} docs/s)".format(bulk, len(docs) / bulk))
+
+
+def _transform_docs(configs, docs):
+    for doc in docs:
+        eval_context = EvaluationContext(doc)
+        for config in configs:
+            if config.filter(doc, eval_context):
+                try:
+                    config.get_all_values(doc, eval_context)
+                except Exception:
+                    pass
+                eval_context.reset_iteration()
+
+
+def _transform_docs_bulk(configs, docs):
+    eval_contexts = [EvaluationContext(doc) for doc in docs]
+    for config in configs:
+        config.get_all_values_bulk(docs, eval_contexts)
+
+
+def _record_docs(domain, doc_type, doc_ids_file, docs_file):
+    with open(doc_ids_file) as f:
+        doc_ids = [line.strip() for line in f if line.strip()]
+    doc_store = get_document_store_for_doc_type(domain, doc_type, load_source="benchmark_ucr_chunk")
+    docs = list(doc_store.iter_documents(doc_ids))
+    with open(docs_file, 'w') as f:
+        json.dump(docs, f)
+    print("Wrote {} docs to {}".format(len(docs), docs_file))
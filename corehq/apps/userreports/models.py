@@ -144,6 +144,8 @@ class SQLSettings(DocumentSchema):
     partition_config = SchemaListProperty(SQLPartition)  # no longer used
     citus_config = SchemaProperty(CitusConfig)
     primary_key = ListProperty()
+    # store a hash of each row's values and skip writing rows that haven't changed
+    row_fingerprints = BooleanProperty(default=False)
 
 
 class DataSourceBuildInformation(DocumentSchema):
@@ -424,6 +426,37 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
             None,
         )
 
+    @property
+    @memoized
+    def referenced_properties(self):
+        """
+        The doc properties this data source reads, or ``None`` if unknown
+        """
+        from corehq.apps.userreports.referenced_properties import get_referenced_properties
+        return get_referenced_properties(self)
+
+    def may_be_affected_by(self, modified_properties):
+        """
+        :param modified_properties: names of the properties modified by a
+                                    change or ``None`` if unknown
+        """
+        if modified_properties is None or self.referenced_properties is None:
+            return True
+        return not self.referenced_properties.isdisjoint(modified_properties)
+
+    @property
+    @memoized
+    def related_doc_id_expressions(self):
+        """
+        ``(related_doc_type, doc_id_expression)`` pairs for ``related_doc``
+        expressions whose doc ids can be prefetched from the root doc
+        """
+        from corehq.apps.userreports.prefetch import get_static_related_doc_specs
+        return [
+            (related_doc_type, ExpressionFactory.from_spec(spec, context=self.get_factory_context()))
+            for related_doc_type, spec in get_static_related_doc_specs(self)
+        ]
+
     @property
     @memoized
     def parsed_expression(self):
@@ -445,39 +478,28 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
 
     def get_items(self, document, eval_context=None):
         if self.filter(document, eval_context):
-            if not self.base_item_expression:
-                return [document]
-            else:
-                result = self.parsed_expression(document, eval_context)
-                if result is None:
-                    return []
-                elif isinstance(result, list):
-                    return result
-                else:
-                    return [result]
+            return self._get_items_for_matched_doc(document, eval_context)
         else:
             return []
 
+    def _get_items_for_matched_doc(self, document, eval_context):
+        if not self.base_item_expression:
+            return [document]
+        else:
+            result = self.parsed_expression(document, eval_context)
+            if result is None:
+                return []
+            elif isinstance(result, list):
+                return result
+            else:
+                return [result]
+
     def get_all_values(self, doc, eval_context=None):
         if not eval_context:
             eval_context = EvaluationContext(doc)
 
-        if self.has_validations:
-            try:
-                self.validate_document(doc, eval_context)
-            except ValidationError as e:
-                for error in e.errors:
-                    InvalidUCRData.objects.get_or_create(
-                        doc_id=doc['_id'],
-                        indicator_config_id=self._id,
-                        validation_name=error[0],
-                        defaults={
-                            'doc_type': doc['doc_type'],
-                            'domain': doc['domain'],
-                            'validation_text': error[1],
-                        }
-                    )
-                return []
+        if self.has_validations and not self._is_valid_doc(doc, eval_context):
+            return []
 
         rows = []
         for item in self.get_items(doc, eval_context):
@@ -487,6 +509,82 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
 
         return rows
 
+    def filter_bulk(self, docs, eval_contexts=None):
+        """
+        Apply the main filter to a chunk of docs.
+
+        :param eval_contexts: optional list of ``EvaluationContext`` objects
+                              in the same order as ``docs``
+        :returns: list of booleans in the same order as ``docs``
+        """
+        eval_contexts = eval_contexts or [EvaluationContext(doc) for doc in docs]
+        filter_fn = self._get_main_filter()
+        return [
+            bool(filter_fn(doc, eval_context))
+            for doc, eval_context in zip(docs, eval_contexts)
+        ]
+
+    def get_all_values_bulk(self, docs, eval_contexts=None):
+        """
+        Filter and evaluate indicators for a chunk of docs at once.
+
+        The filter, validations, base item expression and indicators are
+        resolved once for the chunk rather than once per doc, and docs that
+        pass the filter are not filtered a second time before evaluation.
+
+        :param eval_contexts: optional list of ``EvaluationContext`` objects
+                              in the same order as ``docs``. Passing the same
+                              contexts to several data sources lets them share
+                              the per-doc cache.
+        :returns: list of ``BulkDocValues`` in the same order as ``docs``.
+                  Errors raised while evaluating a single doc are captured in
+                  ``BulkDocValues.exception`` instead of being raised.
+        """
+        eval_contexts = eval_contexts or [EvaluationContext(doc) for doc in docs]
+        filter_fn = self._get_main_filter()
+        get_values = self.indicators.get_values
+        has_validations = self.has_validations
+        get_items = self._get_items_for_matched_doc
+
+        results = []
+        for doc, eval_context in zip(docs, eval_contexts):
+            if not filter_fn(doc, eval_context):
+                results.append(BulkDocValues(False, [], None))
+                continue
+
+            rows = []
+            try:
+                if not has_validations or self._is_valid_doc(doc, eval_context):
+                    for item in get_items(doc, eval_context):
+                        rows.append(get_values(item, eval_context))
+                        eval_context.increment_iteration()
+            except Exception as e:
+                results.append(BulkDocValues(True, [], e))
+            else:
+                results.append(BulkDocValues(True, rows, None))
+            finally:
+                eval_context.reset_iteration()
+
+        return results
+
+    def _is_valid_doc(self, doc, eval_context):
+        try:
+            self.validate_document(doc, eval_context)
+        except ValidationError as e:
+            for error in e.errors:
+                InvalidUCRData.objects.get_or_create(
+                    doc_id=doc['_id'],
+                    indicator_config_id=self._id,
+                    validation_name=error[0],
+                    defaults={
+                        'doc_type': doc['doc_type'],
+                        'domain': doc['domain'],
+                        'validation_text': error[1],
+                    }
+                )
+            return False
+        return True
+
     def get_report_count(self):
         """
         Return the number of ReportConfigurations that reference this data source.
@@ -1283,6 +1381,7 @@ def _filter_by_server_env(configs):
 
 
 _Validation = namedtuple('_Validation', 'name error_message validation_function')
+BulkDocValues = namedtuple('BulkDocValues', 'matched rows exception')
 
 
 class FilterValueEncoder(DjangoJSONEncoder):
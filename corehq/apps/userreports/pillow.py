@@ -1,11 +1,19 @@
 import hashlib
 import signal
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.db import close_old_connections
 
-from corehq.util.metrics import metrics_counter, metrics_histogram_timer
+from memoized import memoized
+
+from corehq.util.metrics import (
+    metrics_counter,
+    metrics_histogram,
+    metrics_histogram_timer,
+)
 from pillowtop.checkpoints.manager import KafkaPillowCheckpoint
 from pillowtop.const import DEFAULT_PROCESSOR_CHUNK_SIZE
 from pillowtop.exceptions import PillowConfigError
@@ -32,6 +40,7 @@ from corehq.apps.userreports.exceptions import (
     UserReportsWarning,
 )
 from corehq.apps.userreports.models import AsyncIndicator
+from corehq.apps.userreports.prefetch import prefetch_related_docs
 from corehq.apps.userreports.rebuild import (
     get_table_diffs,
     get_tables_rebuild_migrate,
@@ -94,6 +103,25 @@ def _filter_by_hash(configs, ucr_division):
     return filtered_configs
 
 
+def _get_modified_properties_by_id(changes):
+    """
+    Union of the modified properties of the changes for each doc in a chunk,
+    or ``None`` for docs with any change whose modified properties are unknown
+    """
+    modified_properties_by_id = {}
+    for change in changes:
+        if change.id in modified_properties_by_id and modified_properties_by_id[change.id] is None:
+            continue
+        modified_properties = change.metadata.modified_properties if change.metadata else None
+        if modified_properties is None:
+            modified_properties_by_id[change.id] = None
+        else:
+            modified_properties_by_id[change.id] = (
+                modified_properties_by_id.get(change.id, set()) | set(modified_properties)
+            )
+    return modified_properties_by_id
+
+
 def _filter_missing_domains(configs):
     """Return a list of configs whose domain exists on this environment"""
     domain_names = [config.domain for config in configs if config.is_static]
@@ -264,6 +292,11 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
     domain_timing_context = Counter()
 
+    def __init__(self, *args, **kwargs):
+        super(ConfigurableReportPillowProcessor, self).__init__(*args, **kwargs)
+        # wall time spent on each domain by the worker pool since the last checkpoint
+        self._domain_chunk_timing = Counter()
+
     @time_ucr_process_change
     def _save_doc_to_table(self, domain, table, doc, eval_context):
         # best effort will swallow errors in the table
@@ -289,14 +322,71 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
         retry_changes = set()
         change_exceptions = []
-        for domain, changes_chunk in changes_by_domain.items():
-            with WarmShutdown():
-                failed, exceptions = self._process_chunk_for_domain(domain, changes_chunk)
+        if self._use_worker_pool and len(changes_by_domain) > 1:
+            results = self._process_domain_chunks_in_parallel(changes_by_domain)
+        else:
+            results = self._process_domain_chunks(changes_by_domain)
+        for failed, exceptions in results:
             retry_changes.update(failed)
             change_exceptions.extend(exceptions)
 
         return retry_changes, change_exceptions
 
+    @property
+    def _use_worker_pool(self):
+        return settings.UCR_PILLOW_WORKERS > 1
+
+    @property
+    @memoized
+    def _domain_executor(self):
+        return ThreadPoolExecutor(max_workers=settings.UCR_PILLOW_WORKERS, thread_name_prefix='ucr-domain')
+
+    @property
+    @memoized
+    def _save_executor(self):
+        # separate from the domain executor so that domain workers waiting
+        # on their saves can never starve the pool
+        return ThreadPoolExecutor(max_workers=settings.UCR_PILLOW_WORKERS, thread_name_prefix='ucr-save')
+
+    def _process_domain_chunks(self, changes_by_domain):
+        results = []
+        for domain, changes_chunk in changes_by_domain.items():
+            with WarmShutdown():
+                results.append(self._process_chunk_for_domain(domain, changes_chunk))
+        return results
+
+    def _process_domain_chunks_in_parallel(self, changes_by_domain):
+        """Process each domain's changes on the worker pool. Results are
+        returned once every domain has finished so that the checkpoint is
+        still only updated at the end of the chunk. As with the sequential
+        path the first error raised by a domain is re-raised.
+        """
+        # signal handlers can only be installed from the main thread
+        with WarmShutdown():
+            futures = [
+                self._domain_executor.submit(self._process_chunk_for_domain_in_thread, domain, changes_chunk)
+                for domain, changes_chunk in changes_by_domain.items()
+            ]
+            wait(futures)
+        results = []
+        for domain, future in zip(changes_by_domain, futures):
+            result, duration = future.result()
+            self._domain_chunk_timing[domain] += duration
+            results.append(result)
+        return results
+
+    def _process_chunk_for_domain_in_thread(self, domain, changes_chunk):
+        """Returns the result of ``_process_chunk_for_domain`` and its wall
+        time, which is aggregated by the calling thread
+        """
+        close_old_connections()
+        try:
+            with TimingContext() as timer, self._metrics_timer('single_domain_batch'):
+                result = self._process_chunk_for_domain(domain, changes_chunk)
+            return result, timer.duration
+        finally:
+            close_old_connections()
+
     def _process_chunk_for_domain(self, domain, changes_chunk):
         adapters = list(self.table_adapters_by_domain[domain])
         changes_by_id = {change.id: change for change in changes_chunk}
@@ -306,30 +396,29 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
         to_update = {change for change in changes_chunk if not change.deleted}
         with self._metrics_timer('extract'):
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
-        change_exceptions = []
+
+        prefetched_docs = None
+        if settings.UCR_PREFETCH_RELATED_DOCS:
+            with self._metrics_timer('prefetch_related_docs'):
+                prefetched_docs = prefetch_related_docs(domain, [adapter.config for adapter in adapters], docs)
+        eval_contexts = [EvaluationContext(doc, prefetched_docs=prefetched_docs) for doc in docs]
+        if settings.UCR_SKIP_UNAFFECTED_CHANGES:
+            modified_properties_by_id = _get_modified_properties_by_id(changes_chunk)
+        else:
+            modified_properties_by_id = {}
 
         with self._metrics_timer('single_batch_transform'):
-            for doc in docs:
-                change = changes_by_id[doc['_id']]
-                doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
-                with self._metrics_timer('single_doc_transform'):
-                    for adapter in adapters:
-                        with self._metrics_timer('transform', adapter.config._id):
-                            if adapter.config.filter(doc, eval_context):
-                                if adapter.run_asynchronous:
-                                    async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
-                                else:
-                                    try:
-                                        rows_to_save_by_adapter[adapter].extend(adapter.get_all_values(doc, eval_context))
-                                    except Exception as e:
-                                        change_exceptions.append((change, e))
-                                    eval_context.reset_iteration()
-                            elif (doc_subtype is None
-                                    or doc_subtype in adapter.config.get_case_type_or_xmlns_filter()):
-                                # Delete if the subtype is unknown or
-                                # if the subtype matches our filters, but the full filter no longer applies
-                                to_delete_by_adapter[adapter].append(doc)
+            if settings.UCR_BULK_TRANSFORM:
+                transform = self._transform_docs_bulk
+            else:
+                transform = self._transform_docs
+            change_exceptions = transform(
+                adapters, docs, eval_contexts, changes_by_id, modified_properties_by_id,
+                rows_to_save_by_adapter, to_delete_by_adapter, async_configs_by_doc_id
+            )
+
+        if prefetched_docs is not None:
+            prefetched_docs.report_metrics()
 
         with self._metrics_timer('single_batch_delete'):
             # bulk delete by adapter
@@ -347,12 +436,19 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
         with self._metrics_timer('single_batch_load'):
             # bulk update by adapter
-            for adapter, rows in rows_to_save_by_adapter.items():
-                with self._metrics_timer('load', adapter.config._id):
-                    try:
-                        adapter.save_rows(rows)
-                    except Exception:
-                        retry_changes.update(to_update)
+            if self._use_worker_pool and len(rows_to_save_by_adapter) > 1:
+                futures = [
+                    self._save_executor.submit(self._save_rows, adapter, rows)
+                    for adapter, rows in rows_to_save_by_adapter.items()
+                ]
+                saved = [future.result() for future in futures]
+            else:
+                saved = [
+                    self._save_rows(adapter, rows)
+                    for adapter, rows in rows_to_save_by_adapter.items()
+                ]
+            if not all(saved):
+                retry_changes.update(to_update)
 
         if async_configs_by_doc_id:
             with self._metrics_timer('async_config_load'):
@@ -364,6 +460,86 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
         return retry_changes, change_exceptions
 
+    def _save_rows(self, adapter, rows):
+        with self._metrics_timer('load', adapter.config._id):
+            try:
+                adapter.save_rows(rows)
+            except Exception:
+                return False
+        return True
+
+    def _transform_docs(self, adapters, docs, eval_contexts, changes_by_id, modified_properties_by_id,
+                        rows_to_save_by_adapter, to_delete_by_adapter, async_configs_by_doc_id):
+        change_exceptions = []
+        for doc, eval_context in zip(docs, eval_contexts):
+            change = changes_by_id[doc['_id']]
+            doc_subtype = change.metadata.document_subtype
+            modified_properties = modified_properties_by_id.get(doc['_id'])
+            with self._metrics_timer('single_doc_transform'):
+                for adapter in adapters:
+                    if not adapter.config.may_be_affected_by(modified_properties):
+                        continue
+                    with self._metrics_timer('transform', adapter.config._id):
+                        if adapter.config.filter(doc, eval_context):
+                            if adapter.run_asynchronous:
+                                async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
+                            else:
+                                try:
+                                    rows = adapter.get_all_values(doc, eval_context)
+                                    rows_to_save_by_adapter[adapter].extend(rows)
+                                except Exception as e:
+                                    change_exceptions.append((change, e))
+                                eval_context.reset_iteration()
+                        elif (doc_subtype is None
+                                or doc_subtype in adapter.config.get_case_type_or_xmlns_filter()):
+                            # Delete if the subtype is unknown or
+                            # if the subtype matches our filters, but the full filter no longer applies
+                            to_delete_by_adapter[adapter].append(doc)
+        return change_exceptions
+
+    def _transform_docs_bulk(self, adapters, all_docs, all_eval_contexts, changes_by_id, modified_properties_by_id,
+                             rows_to_save_by_adapter, to_delete_by_adapter, async_configs_by_doc_id):
+        """Like ``_transform_docs`` but evaluates each adapter over the whole chunk
+        of docs at once. Evaluation contexts are still shared between adapters.
+        """
+        change_exceptions = []
+        for adapter in adapters:
+            config = adapter.config
+            docs, eval_contexts = [], []
+            for doc, eval_context in zip(all_docs, all_eval_contexts):
+                if config.may_be_affected_by(modified_properties_by_id.get(doc['_id'])):
+                    docs.append(doc)
+                    eval_contexts.append(eval_context)
+            if not docs:
+                continue
+            doc_subtypes = [changes_by_id[doc['_id']].metadata.document_subtype for doc in docs]
+            with self._metrics_timer('bulk_transform', config._id):
+                if adapter.run_asynchronous:
+                    matches = config.filter_bulk(docs, eval_contexts)
+                    for doc, matched in zip(docs, matches):
+                        if matched:
+                            async_configs_by_doc_id[doc['_id']].append(config._id)
+                else:
+                    results = config.get_all_values_bulk(docs, eval_contexts)
+                    matches = [result.matched for result in results]
+                    for doc, result in zip(docs, results):
+                        if result.exception is not None:
+                            change_exceptions.append((changes_by_id[doc['_id']], result.exception))
+                        elif result.matched:
+                            rows_to_save_by_adapter[adapter].extend(result.rows)
+
+                case_type_or_xmlns_filter = None
+                for doc, doc_subtype, matched in zip(docs, doc_subtypes, matches):
+                    if matched:
+                        continue
+                    if doc_subtype is not None and case_type_or_xmlns_filter is None:
+                        case_type_or_xmlns_filter = config.get_case_type_or_xmlns_filter()
+                    if doc_subtype is None or doc_subtype in case_type_or_xmlns_filter:
+                        # Delete if the subtype is unknown or
+                        # if the subtype matches our filters, but the full filter no longer applies
+                        to_delete_by_adapter[adapter].append(doc)
+        return change_exceptions
+
     def _metrics_timer(self, step, config_id=None):
         tags = {
             'action': step,
@@ -421,22 +597,37 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
         })
 
     def checkpoint_updated(self):
-        total_duration = sum(self.domain_timing_context.values())
-        duration_seen = 0
-        top_half_domains = {}
-        for domain, duration in self.domain_timing_context.most_common():
-            top_half_domains[domain] = duration
-            duration_seen += duration
-            if duration_seen >= total_duration // 2:
-                break
-
-        for domain, duration in top_half_domains.items():
+        for domain, duration in _get_top_half_domains(self._domain_chunk_timing).items():
+            metrics_histogram(
+                'commcare.change_feed.ucr.domain_chunk_duration', duration,
+                bucket_tag='duration', buckets=(.1, 1, 5, 10, 30, 60), bucket_unit='s',
+                tags={'domain': domain}
+            )
+        self._domain_chunk_timing.clear()
+
+        for domain, duration in _get_top_half_domains(self.domain_timing_context).items():
             metrics_counter('commcare.change_feed.ucr_slow_log', duration, tags={
                 'domain': domain
             })
         self.domain_timing_context.clear()
 
 
+def _get_top_half_domains(domain_timing):
+    """Returns the slowest domains in ``domain_timing`` (a ``Counter``
+    of durations by domain) that together account for half of the total
+    duration
+    """
+    total_duration = sum(domain_timing.values())
+    duration_seen = 0
+    top_half_domains = {}
+    for domain, duration in domain_timing.most_common():
+        top_half_domains[domain] = duration
+        duration_seen += duration
+        if duration_seen >= total_duration // 2:
+            break
+    return top_half_domains
+
+
 class ConfigurableReportKafkaPillow(ConstructedPillow):
     # todo; To remove after full rollout of https://github.com/dimagi/commcare-hq/pull/21329/
 
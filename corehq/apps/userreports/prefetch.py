@@ -0,0 +1,140 @@
+"""
+Chunk-scoped prefetching of documents referenced by ``related_doc`` expressions.
+
+When the UCR pillow processes a chunk of changes, most ``related_doc``
+expressions look up a document whose id can be read straight off the root
+document (e.g. a form's ``form.case.@case_id`` or a case's parent index).
+Those ids are collected for every doc in the chunk up front and loaded with
+one query per doc type. ``RelatedDocExpressionSpec`` then serves lookups from
+the shared ``PrefetchedDocs`` cache, falling back to a single fetch (which is
+also added to the cache) for anything that could not be collected statically.
+"""
+from collections import defaultdict
+
+from corehq.apps.change_feed.data_sources import (
+    get_document_store_for_doc_type,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.util.metrics import metrics_counter
+
+# expressions that only read from the item they are evaluated against
+STATIC_EXPRESSION_TYPES = ('property_name', 'property_path', 'constant')
+# expressions that are static if all their sub-expressions are
+COMPOSITE_EXPRESSION_TYPES = {
+    'nested': ('argument_expression', 'value_expression'),
+    'array_index': ('array_expression', 'index_expression'),
+    'root_doc': ('expression',),
+}
+
+
+class PrefetchedDocs(object):
+    """Documents shared between all evaluation contexts of a chunk"""
+
+    def __init__(self, domain):
+        self.domain = domain
+        self._docs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, doc_type, doc_id, doc):
+        """``doc`` may be ``None`` to record that the document does not exist"""
+        self._docs[(doc_type, doc_id)] = doc
+
+    def get(self, doc_type, doc_id):
+        """
+        :returns: tuple of ``(found, doc)``. ``found`` is ``False`` if the doc
+                  has not been loaded into this cache.
+        """
+        key = (doc_type, doc_id)
+        if key in self._docs:
+            self.hits += 1
+            return True, self._docs[key]
+        self.misses += 1
+        return False, None
+
+    def report_metrics(self):
+        tags = {'domain': self.domain}
+        if self.hits:
+            metrics_counter('commcare.ucr.related_doc_prefetch.hits', self.hits, tags=tags)
+        if self.misses:
+            metrics_counter('commcare.ucr.related_doc_prefetch.misses', self.misses, tags=tags)
+
+
+def prefetch_related_docs(domain, configs, docs):
+    """
+    Load all documents that ``related_doc`` expressions in ``configs`` will
+    look up for ``docs``, using one query per related doc type.
+
+    :returns: ``PrefetchedDocs``
+    """
+    prefetched = PrefetchedDocs(domain)
+    doc_ids_by_type = defaultdict(set)
+    for config in configs:
+        for related_doc_type, doc_id_expression in config.related_doc_id_expressions:
+            for doc in docs:
+                doc_id = doc_id_expression(doc, EvaluationContext(doc))
+                if doc_id and isinstance(doc_id, str):
+                    doc_ids_by_type[related_doc_type].add(doc_id)
+
+    for related_doc_type, doc_ids in doc_ids_by_type.items():
+        document_store = get_document_store_for_doc_type(
+            domain, related_doc_type, load_source="related_doc_prefetch")
+        found = {
+            doc['_id']: doc
+            for doc in document_store.iter_documents(list(doc_ids))
+            if doc.get('domain') == domain
+        }
+        for doc_id in doc_ids:
+            prefetched.add(related_doc_type, doc_id, found.get(doc_id))
+    return prefetched
+
+
+def get_static_related_doc_specs(config):
+    """
+    Find ``related_doc`` expressions in a data source whose doc id can be read
+    directly off the root document.
+
+    :returns: list of ``(related_doc_type, doc_id_expression_spec)``
+    """
+    if config.base_item_expression:
+        # indicators are evaluated against the items, not the root doc
+        specs = [config.configured_filter, config.base_item_expression]
+    else:
+        specs = [config.configured_filter, config.configured_indicators, config.named_expressions]
+
+    found = []
+    for related_doc_spec in _iter_related_doc_specs(specs):
+        doc_id_spec = related_doc_spec['doc_id_expression']
+        if _is_static_expression(doc_id_spec, config.named_expressions):
+            key = (related_doc_spec.get('related_doc_type'), doc_id_spec)
+            if key not in found:
+                found.append(key)
+    return found
+
+
+def _iter_related_doc_specs(spec):
+    if isinstance(spec, dict):
+        if spec.get('type') == 'related_doc':
+            yield spec
+            # value expressions are evaluated against the related doc
+            return
+        for value in spec.values():
+            yield from _iter_related_doc_specs(value)
+    elif isinstance(spec, list):
+        for value in spec:
+            yield from _iter_related_doc_specs(value)
+
+
+def _is_static_expression(spec, named_expressions):
+    if not isinstance(spec, dict):
+        # literals are converted to constant expressions
+        return True
+    expression_type = spec.get('type')
+    if expression_type == 'named':
+        return _is_static_expression(named_expressions.get(spec.get('name')), named_expressions)
+    if expression_type in COMPOSITE_EXPRESSION_TYPES:
+        return all(
+            _is_static_expression(spec.get(key), named_expressions)
+            for key in COMPOSITE_EXPRESSION_TYPES[expression_type]
+        )
+    return expression_type in STATIC_EXPRESSION_TYPES
@@ -0,0 +1,68 @@
+"""
+Static analysis of the document properties a data source reads.
+
+This lets the UCR pillow skip evaluating a data source for a change whose
+modified properties (see ``ChangeMeta.modified_properties``) don't include
+anything the data source references.
+"""
+
+# spec types that only read the properties named in their spec (or in their
+# sub-specs). Any other type found in a data source, such as ``identity``,
+# ``get_case_forms``, ``ledger_balances`` or custom expressions, may read the
+# whole doc and disables the analysis.
+PROPERTY_READING_SPEC_TYPES = frozenset([
+    # expressions
+    'constant', 'property_name', 'property_path', 'named', 'conditional', 'array_index', 'root_doc',
+    'related_doc', 'iterator', 'base_iteration_number', 'switch', 'nested', 'dict', 'add_days',
+    'add_hours', 'add_months', 'month_start_date', 'month_end_date', 'diff_days', 'evaluator',
+    'filter_items', 'map_items', 'reduce_items', 'flatten', 'sort_items', 'split_string', 'coalesce',
+    # filters
+    'property_match', 'boolean_expression', 'and', 'or', 'not',
+    # indicators
+    'small_boolean', 'boolean', 'choice_list', 'count', 'expression', 'inserted_at', 'raw',
+    'repeat_iteration',
+    # transforms
+    'custom', 'date_format', 'number_format', 'translation', 'multiple_value_string_translation',
+])
+
+
+def get_referenced_properties(config):
+    """
+    :returns: frozenset of the top level doc properties read by the data
+              source, or ``None`` if that can't be determined
+    """
+    properties = set()
+    specs = [
+        config.configured_filter,
+        config.configured_indicators,
+        config.base_item_expression,
+        config.named_expressions,
+        config.named_filters,
+        [validation.expression for validation in config.validations],
+    ]
+    if not _collect_properties(specs, properties):
+        return None
+    return frozenset(properties)
+
+
+def _collect_properties(spec, properties):
+    if isinstance(spec, dict):
+        spec_type = spec.get('type')
+        if spec_type is not None and spec_type not in PROPERTY_READING_SPEC_TYPES:
+            return False
+        if 'property_name' in spec:
+            property_name = spec['property_name']
+            if not isinstance(property_name, str):
+                # e.g. a property name computed by an expression
+                return False
+            properties.add(property_name)
+        if 'property_path' in spec:
+            property_path = spec['property_path']
+            if not (isinstance(property_path, list) and property_path
+                    and all(isinstance(part, str) for part in property_path)):
+                return False
+            properties.add(property_path[0])
+        return all(_collect_properties(value, properties) for value in spec.values())
+    elif isinstance(spec, list):
+        return all(_collect_properties(value, properties) for value in spec)
+    return spec is None or isinstance(spec, (str, int, float, bool))
@@ -24,11 +24,15 @@ class EvaluationContext(object):
     """
     An evaluation context. Necessary for repeats to pass both the row of the repeat as well
     as the root document and the iteration number.
+
+    `prefetched_docs` optionally holds related documents fetched in bulk
+    for a chunk of documents (see `corehq.apps.userreports.prefetch`).
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, prefetched_docs=None):
         self.root_doc = root_doc
         self.iteration = iteration
+        self.prefetched_docs = prefetched_docs
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
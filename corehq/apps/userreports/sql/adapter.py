@@ -1,6 +1,7 @@
 import hashlib
 import itertools
 import logging
+from collections import Counter, defaultdict
 
 from django.utils.translation import ugettext as _
 
@@ -12,6 +13,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.schema import Index, PrimaryKeyConstraint
 
 from corehq.apps.userreports.adapter import IndicatorAdapter
+from corehq.apps.userreports.const import ROW_FINGERPRINT_COLUMN
 from corehq.apps.userreports.exceptions import (
     ColumnNotFoundError,
     TableRebuildError,
@@ -20,6 +22,7 @@ from corehq.apps.userreports.exceptions import (
 from corehq.apps.userreports.sql.columns import column_to_sql
 from corehq.apps.userreports.util import get_table_name
 from corehq.sql_db.connections import connection_manager
+from corehq.util.metrics import metrics_counter
 from corehq.util.soft_assert import soft_assert
 from corehq.util.test_utils import unit_testing_only
 
@@ -181,16 +184,22 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             {i.column.database_column_name.decode('utf-8'): i.value for i in row}
             for row in rows
         ]
+        if self.config.sql_settings.row_fingerprints:
+            for row in formatted_rows:
+                row[ROW_FINGERPRINT_COLUMN] = get_row_fingerprint(row)
         if self.session_helper.is_citus_db and use_shard_col:
             config = self.config.sql_settings.citus_config
             if config.distribution_type == 'hash':
                 self._by_column_update(formatted_rows)
                 return
-        doc_ids = set(row['doc_id'] for row in formatted_rows)
         table = self.get_table()
         if self.supports_upsert() and use_shard_col:
             queries = [self._upsert_query(table, formatted_rows)]
         else:
+            formatted_rows = self._exclude_unchanged_docs(table, formatted_rows)
+            if not formatted_rows:
+                return
+            doc_ids = set(row['doc_id'] for row in formatted_rows)
             delete = table.delete().where(table.c.doc_id.in_(doc_ids))
             # Using session.bulk_insert_mappings below might seem more inline
             #   with sqlalchemy API, but it results in
@@ -214,10 +223,13 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         rows = sorted(rows, key=lambda row: row[shard_col])
         for shard_value, rows_ in itertools.groupby(rows, key=lambda row: row[shard_col]):
             formatted_rows = list(rows_)
-            doc_ids = set(row['doc_id'] for row in formatted_rows)
             if self.supports_upsert():
                 queries = [self._upsert_query(table, formatted_rows)]
             else:
+                formatted_rows = self._exclude_unchanged_docs(table, formatted_rows)
+                if not formatted_rows:
+                    continue
+                doc_ids = set(row['doc_id'] for row in formatted_rows)
                 delete = table.delete().where(table.c.get(shard_col) == shard_value)
                 delete = delete.where(table.c.doc_id.in_(doc_ids))
                 insert = table.insert().values(formatted_rows)
@@ -242,13 +254,45 @@ class IndicatorSqlAdapter(IndicatorAdapter):
     def _upsert_query(self, table, rows):
         from sqlalchemy.dialects.postgresql import insert
         upsert = insert(table).values(rows)
+        where = None
+        if self.config.sql_settings.row_fingerprints:
+            # leave rows whose values haven't changed untouched
+            fingerprint = table.c[ROW_FINGERPRINT_COLUMN]
+            where = fingerprint.is_distinct_from(upsert.excluded[ROW_FINGERPRINT_COLUMN])
         return upsert.on_conflict_do_update(
             constraint=table.primary_key,
             set_={
                 col.name: col for col in upsert.excluded if not col.primary_key
-            }
+            },
+            where=where,
         )
 
+    def _exclude_unchanged_docs(self, table, rows):
+        """Drop the rows of docs whose stored row fingerprints match the new rows"""
+        if not self.config.sql_settings.row_fingerprints:
+            return rows
+
+        new_fingerprints = defaultdict(Counter)
+        for row in rows:
+            new_fingerprints[row['doc_id']][row[ROW_FINGERPRINT_COLUMN]] += 1
+
+        existing_fingerprints = defaultdict(Counter)
+        query = sqlalchemy.select([table.c.doc_id, table.c[ROW_FINGERPRINT_COLUMN]]).where(
+            table.c.doc_id.in_(list(new_fingerprints))
+        )
+        with self.session_context() as session:
+            for doc_id, fingerprint in session.execute(query):
+                existing_fingerprints[doc_id][fingerprint] += 1
+
+        unchanged_doc_ids = {
+            doc_id for doc_id, fingerprints in new_fingerprints.items()
+            if existing_fingerprints[doc_id] == fingerprints
+        }
+        if not unchanged_doc_ids:
+            return rows
+        metrics_counter('commcare.ucr.unchanged_docs_skipped', len(unchanged_doc_ids))
+        return [row for row in rows if row['doc_id'] not in unchanged_doc_ids]
+
     def bulk_save(self, docs):
         rows = []
         for doc in docs:
@@ -427,8 +471,19 @@ class ErrorRaisingMultiDBAdapter(MultiDBSqlAdapter):
     mirror_adapter_cls = ErrorRaisingIndicatorSqlAdapter
 
 
+def get_row_fingerprint(row):
+    """Hash of the values of a formatted row, ignoring when it was inserted"""
+    values = sorted(
+        (column, value) for column, value in row.items()
+        if column not in ('inserted_at', ROW_FINGERPRINT_COLUMN)
+    )
+    return hashlib.md5(repr(values).encode('utf-8')).hexdigest()
+
+
 def get_indicator_table(indicator_config, metadata, override_table_name=None):
     sql_columns = [column_to_sql(col) for col in indicator_config.get_columns()]
+    if indicator_config.sql_settings.row_fingerprints:
+        sql_columns.append(sqlalchemy.Column(ROW_FINGERPRINT_COLUMN, sqlalchemy.String(32), nullable=True))
     table_name = override_table_name or get_table_name(indicator_config.domain, indicator_config.table_id)
     columns_by_col_id = {col.database_column_name.decode('utf-8') for col in indicator_config.get_columns()}
     extra_indices = []
@@ -77,6 +77,69 @@ class DataSourceConfigurationTest(SimpleTestCase):
                 # in the database layer. this should eventually be fixed.
                 self.assertEqual(str(expected_indicators[result.column.id]), result.value)
 
+    @patch('corehq.apps.userreports.specs.datetime')
+    def test_get_all_values_bulk(self, datetime_mock):
+        fake_time_now = datetime.datetime(2015, 4, 24, 12, 30, 8, 24886)
+        datetime_mock.utcnow.return_value = fake_time_now
+        sample_doc, _ = get_sample_doc_and_indicators(fake_time_now)
+        not_matching = dict(doc_type="NotCommCareCase", domain='user-reports', type='ticket')
+
+        matching_result, not_matching_result = self.config.get_all_values_bulk([sample_doc, not_matching])
+
+        self.assertTrue(matching_result.matched)
+        self.assertIsNone(matching_result.exception)
+        self.assertEqual(
+            [[(v.column.id, v.value) for v in row] for row in matching_result.rows],
+            [[(v.column.id, v.value) for v in row] for row in self.config.get_all_values(sample_doc)],
+        )
+        self.assertEqual((False, [], None), tuple(not_matching_result))
+
+    def test_get_all_values_bulk_captures_errors(self):
+        doc = dict(doc_type="CommCareCase", domain='user-reports', type='ticket')
+        with patch.object(self.config.indicators, 'get_values', side_effect=ValueError):
+            [result] = self.config.get_all_values_bulk([doc])
+        self.assertTrue(result.matched)
+        self.assertIsInstance(result.exception, ValueError)
+
+    def test_filter_bulk(self):
+        docs = [
+            dict(doc_type="CommCareCase", domain='user-reports', type='ticket'),
+            dict(doc_type="CommCareCase", domain='user-reports', type='not-ticket'),
+        ]
+        self.assertEqual([True, False], self.config.filter_bulk(docs))
+
+    def test_referenced_properties(self):
+        self.assertEqual(
+            {'type', 'opened_on', 'owner_id', 'category', 'tags', 'is_starred', 'estimate', 'priority'},
+            set(self.config.referenced_properties)
+        )
+        self.assertTrue(self.config.may_be_affected_by(None))
+        self.assertTrue(self.config.may_be_affected_by(['priority', 'unrelated']))
+        self.assertFalse(self.config.may_be_affected_by(['unrelated']))
+
+    def test_referenced_properties_unknown(self):
+        self.config.configured_indicators.append({
+            "type": "expression",
+            "column_id": "whole_doc",
+            "datatype": "string",
+            "expression": {"type": "identity"},
+        })
+        self.assertIsNone(self.config.referenced_properties)
+        self.assertTrue(self.config.may_be_affected_by(['unrelated']))
+
+    def test_referenced_properties_computed_property_name(self):
+        self.config.configured_indicators.append({
+            "type": "expression",
+            "column_id": "computed",
+            "datatype": "string",
+            "expression": {
+                "type": "property_name",
+                "property_name": {"type": "constant", "constant": "foo"},
+            },
+        })
+        self.assertIsNone(self.config.referenced_properties)
+        self.assertTrue(self.config.may_be_affected_by(['foo']))
+
     def test_configured_filter_auto_date_convert(self):
         source = self.config.to_json()
         source['configured_filter'] = {
@@ -21,6 +21,9 @@ from corehq.apps.userreports.expressions.factory import ExpressionFactory
 from corehq.apps.userreports.expressions.specs import (
     PropertyNameGetterSpec,
     PropertyPathGetterSpec,
+)
+from corehq.apps.userreports.expressions.utils import (
+    compile_statement,
     eval_statements,
 )
 from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
@@ -1109,6 +1112,35 @@ def test_errors_in_evaluator_statements(self, eq, context, error_type):
     self.assertEqual(expression({}), None)
 
 
+class TestCompiledStatements(SimpleTestCase):
+
+    def test_compiled_statements_are_cached(self):
+        self.assertIs(compile_statement('a + b'), compile_statement('a + b'))
+
+    def test_compiled_statement_is_reusable(self):
+        compiled = compile_statement('a * b')
+        self.assertEqual(compiled({'a': 2, 'b': 3}), 6)
+        self.assertEqual(compiled({'a': 4, 'b': 5}), 20)
+
+    def test_compiled_statement_keeps_whitelist(self):
+        with self.assertRaises(InvalidExpression):
+            compile_statement('a**b')({'a': 2, 'b': 3})
+        with self.assertRaises(InvalidExpression):
+            compile_statement('"WORD".lower()')({})
+        with self.assertRaises(InvalidExpression):
+            compile_statement('a + b')({'a': 2, 'b': 'text'})
+
+    def test_unparseable_statement(self):
+        with self.assertRaises(SyntaxError):
+            compile_statement('a +')
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": 'a +',
+            "context_variables": {'a': 1}
+        })
+        self.assertEqual(expression({}), None)
+
+
 class TestEvaluatorTypes(SimpleTestCase):
 
     def test_datatype(self):
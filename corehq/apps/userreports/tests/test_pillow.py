@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from django.test import SimpleTestCase, TestCase, override_settings
 
 import mock
+import sqlalchemy
 
 from casexml.apps.case.mock import CaseBlock
 from casexml.apps.case.models import CommCareCase
@@ -15,6 +16,7 @@ from pillow_retry.models import PillowError
 
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.producer import producer
+from corehq.apps.userreports.const import ROW_FINGERPRINT_COLUMN
 from corehq.apps.userreports.data_source_providers import (
     MockDataSourceProvider,
 )
@@ -29,6 +31,11 @@ from corehq.apps.userreports.pillow import (
     REBUILD_CHECK_INTERVAL,
     ConfigurableReportPillowProcessor,
     ConfigurableReportTableManagerMixin,
+    _get_modified_properties_by_id,
+)
+from corehq.apps.userreports.sql.adapter import (
+    IndicatorSqlAdapter,
+    get_row_fingerprint,
 )
 from corehq.apps.userreports.tasks import (
     queue_async_indicators,
@@ -91,6 +98,132 @@ class ConfigurableReportTableManagerTest(SimpleTestCase):
         self.assertTrue(table_manager.needs_bootstrap())
 
 
+@override_settings(UCR_PILLOW_WORKERS=3)
+class ParallelDomainProcessingTest(SimpleTestCase):
+
+    def setUp(self):
+        self.processor = ConfigurableReportPillowProcessor(data_source_providers=[])
+        self.processor.table_adapters_by_domain = {'domain1': [], 'domain2': [], 'domain3': []}
+        self.processor.bootstrapped = True
+        self.changes = [
+            mock.MagicMock(id='{}-doc{}'.format(domain, i), metadata=mock.MagicMock(domain=domain))
+            for domain in ('domain1', 'domain2', 'domain3')
+            for i in range(2)
+        ]
+
+    def test_all_domains_processed(self):
+        def _process(domain, changes_chunk):
+            return {changes_chunk[0]}, [(changes_chunk[1], Exception(domain))]
+
+        with mock.patch.object(self.processor, '_process_chunk_for_domain', side_effect=_process) as patch:
+            retry_changes, change_exceptions = self.processor.process_changes_chunk(self.changes)
+
+        self.assertEqual(3, patch.call_count)
+        self.assertEqual(set(self.changes[::2]), retry_changes)
+        self.assertEqual(
+            {'domain1', 'domain2', 'domain3'},
+            {str(exception) for change, exception in change_exceptions}
+        )
+        self.assertEqual(
+            {'domain1', 'domain2', 'domain3'},
+            set(self.processor._domain_chunk_timing)
+        )
+
+    def test_errors_are_raised(self):
+        def _process(domain, changes_chunk):
+            if domain == 'domain2':
+                raise ValueError
+            return set(), []
+
+        with mock.patch.object(self.processor, '_process_chunk_for_domain', side_effect=_process):
+            with self.assertRaises(ValueError):
+                self.processor.process_changes_chunk(self.changes)
+
+    @override_settings(UCR_PILLOW_WORKERS=0)
+    def test_no_timing_without_worker_pool(self):
+        with mock.patch.object(self.processor, '_process_chunk_for_domain', return_value=(set(), [])):
+            self.processor.process_changes_chunk(self.changes)
+
+        self.assertEqual({}, dict(self.processor._domain_chunk_timing))
+
+    def test_checkpoint_updated_reports_top_domains(self):
+        self.processor._domain_chunk_timing.update({'domain1': 10, 'domain2': 1, 'domain3': 1})
+
+        with mock.patch('corehq.apps.userreports.pillow.metrics_histogram') as histogram:
+            self.processor.checkpoint_updated()
+
+        self.assertEqual(
+            [{'domain': 'domain1'}],
+            [call[1]['tags'] for call in histogram.call_args_list]
+        )
+        self.assertEqual({}, dict(self.processor._domain_chunk_timing))
+
+
+class UnchangedRowsTest(SimpleTestCase):
+
+    def _change(self, doc_id, modified_properties):
+        return mock.MagicMock(id=doc_id, metadata=mock.MagicMock(modified_properties=modified_properties))
+
+    def test_modified_properties_by_id(self):
+        changes = [
+            self._change('doc1', ['name']),
+            self._change('doc1', ['owner_id']),
+            self._change('doc2', ['name']),
+            self._change('doc2', None),
+            self._change('doc2', ['owner_id']),
+        ]
+        self.assertEqual(
+            {'doc1': {'name', 'owner_id'}, 'doc2': None},
+            _get_modified_properties_by_id(changes)
+        )
+
+    def test_row_fingerprint_ignores_inserted_at(self):
+        row = {'doc_id': 'abc', 'name': 'bob', 'inserted_at': datetime(2020, 1, 1)}
+        fingerprint = get_row_fingerprint(row)
+        self.assertEqual(fingerprint, get_row_fingerprint(dict(row, inserted_at=datetime.utcnow())))
+        self.assertNotEqual(fingerprint, get_row_fingerprint(dict(row, name='alice')))
+
+    def test_exclude_unchanged_docs(self):
+        config = get_sample_data_source()
+        config.sql_settings.row_fingerprints = True
+        with mock.patch('corehq.apps.userreports.sql.adapter.connection_manager'):
+            adapter = IndicatorSqlAdapter(config)
+        table = sqlalchemy.Table(
+            'test_table', sqlalchemy.MetaData(),
+            sqlalchemy.Column('doc_id'),
+            sqlalchemy.Column(ROW_FINGERPRINT_COLUMN),
+        )
+        rows = [
+            {'doc_id': 'unchanged', ROW_FINGERPRINT_COLUMN: 'a'},
+            {'doc_id': 'changed', ROW_FINGERPRINT_COLUMN: 'b'},
+            {'doc_id': 'new', ROW_FINGERPRINT_COLUMN: 'c'},
+            {'doc_id': 'fewer_rows', ROW_FINGERPRINT_COLUMN: 'd'},
+        ]
+        session = mock.MagicMock()
+        session.execute.return_value = [
+            ('unchanged', 'a'),
+            ('changed', 'x'),
+            ('fewer_rows', 'd'),
+            ('fewer_rows', 'e'),
+        ]
+        adapter.session_context = mock.MagicMock()
+        adapter.session_context.return_value.__enter__.return_value = session
+
+        self.assertEqual(
+            ['changed', 'new', 'fewer_rows'],
+            [row['doc_id'] for row in adapter._exclude_unchanged_docs(table, rows)]
+        )
+
+    def test_exclude_unchanged_docs_without_fingerprints(self):
+        config = get_sample_data_source()
+        with mock.patch('corehq.apps.userreports.sql.adapter.connection_manager'):
+            adapter = IndicatorSqlAdapter(config)
+        adapter.session_context = mock.MagicMock()
+        rows = [{'doc_id': 'abc'}]
+        self.assertEqual(rows, adapter._exclude_unchanged_docs(mock.MagicMock(), rows))
+        adapter.session_context.assert_not_called()
+
+
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
 class ChunkedUCRProcessorTest(TestCase):
     @classmethod
@@ -246,6 +379,11 @@ class ChunkedUCRProcessorTest(TestCase):
         self.assertEqual(set([case.case_id for case in cases]), set(invalid_data))
 
 
+@override_settings(UCR_BULK_TRANSFORM=True)
+class BulkTransformChunkedUCRProcessorTest(ChunkedUCRProcessorTest):
+    pass
+
+
 class IndicatorPillowTest(TestCase):
 
     @classmethod
@@ -586,6 +724,12 @@ class ReuseEvaluationContextTest(TestCase):
         pillow2 = _get_pillow(self.configs, processor_chunk_size=100)
         self._test_reuse_cache(pillow1, pillow2, 3)
 
+    @override_settings(UCR_BULK_TRANSFORM=True)
+    def test_reuse_cache_bulk_transform(self):
+        pillow1 = _get_pillow(self.configs[:1], processor_chunk_size=100)
+        pillow2 = _get_pillow(self.configs, processor_chunk_size=100)
+        self._test_reuse_cache(pillow1, pillow2, 3)
+
     def _test_reuse_cache(self, pillow1=None, pillow2=None, num_queries=4):
         # tests that these two pillows make the same number of DB calls even
         # though pillow2 has an extra config
@@ -0,0 +1,98 @@
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.prefetch import (
+    PrefetchedDocs,
+    get_static_related_doc_specs,
+    prefetch_related_docs,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_related_doc_type,
+    get_sample_data_source,
+)
+
+
+class FakeDocumentStore(object):
+
+    def __init__(self, docs):
+        self.docs = {doc['_id']: doc for doc in docs}
+        self.get_calls = 0
+        self.iter_calls = 0
+
+    def get_document(self, doc_id):
+        self.get_calls += 1
+        return self.docs[doc_id]
+
+    def iter_documents(self, ids):
+        self.iter_calls += 1
+        return [self.docs[doc_id] for doc_id in ids if doc_id in self.docs]
+
+
+def _child_case(case_id, parent_id):
+    return {
+        '_id': case_id,
+        'domain': 'bug-domain',
+        'type': 'bug-child',
+        'indices': [{'referenced_id': parent_id}],
+    }
+
+
+class PrefetchRelatedDocsTest(SimpleTestCase):
+
+    def test_static_related_doc_specs(self):
+        config = get_data_source_with_related_doc_type()
+        self.assertEqual(
+            [('CommCareCase', {'name': 'parent_id', 'type': 'named'})],
+            get_static_related_doc_specs(config)
+        )
+
+    def test_no_related_docs(self):
+        self.assertEqual([], get_static_related_doc_specs(get_sample_data_source()))
+
+    def test_prefetch(self):
+        config = get_data_source_with_related_doc_type()
+        parents = [
+            {'_id': 'parent1', 'domain': 'bug-domain', 'update-prop-parent': 'a'},
+            {'_id': 'parent2', 'domain': 'other-domain', 'update-prop-parent': 'b'},
+        ]
+        docs = [
+            _child_case('child1', 'parent1'),
+            _child_case('child2', 'parent1'),
+            _child_case('child3', 'parent2'),
+            _child_case('child4', 'missing'),
+        ]
+        store = FakeDocumentStore(parents)
+        with patch('corehq.apps.userreports.prefetch.get_document_store_for_doc_type', return_value=store):
+            prefetched = prefetch_related_docs('bug-domain', [config], docs)
+        self.assertEqual(1, store.iter_calls)
+
+        expression = ExpressionFactory.from_spec(
+            config.named_expressions['parent_property'], config.get_factory_context()
+        )
+        with patch('corehq.apps.userreports.expressions.specs.get_document_store_for_doc_type',
+                   return_value=store):
+            values = [
+                expression(doc, EvaluationContext(doc, prefetched_docs=prefetched))
+                for doc in docs
+            ]
+        self.assertEqual(['a', 'a', None, None], values)
+        self.assertEqual(0, store.get_calls)
+        self.assertEqual((4, 0), (prefetched.hits, prefetched.misses))
+
+    def test_miss_is_shared(self):
+        config = get_data_source_with_related_doc_type()
+        store = FakeDocumentStore([{'_id': 'parent1', 'domain': 'bug-domain', 'update-prop-parent': 'a'}])
+        prefetched = PrefetchedDocs('bug-domain')
+        expression = ExpressionFactory.from_spec(
+            config.named_expressions['parent_property'], config.get_factory_context()
+        )
+        with patch('corehq.apps.userreports.expressions.specs.get_document_store_for_doc_type',
+                   return_value=store):
+            for case_id in ('child1', 'child2'):
+                doc = _child_case(case_id, 'parent1')
+                self.assertEqual('a', expression(doc, EvaluationContext(doc, prefetched_docs=prefetched)))
+        self.assertEqual(1, store.get_calls)
+        self.assertEqual((1, 1), (prefetched.hits, prefetched.misses))
@@ -9,10 +9,13 @@ def get_blob_db():
         db = _get_s3_db(settings)
         if db is None:
             db = _get_fs_db(settings)
-        elif getattr(settings, "BLOB_DB_MIGRATING_FROM_FS_TO_S3", False):
-            db = _get_migrating_db(db, _get_fs_db(settings))
-        elif getattr(settings, "BLOB_DB_MIGRATING_FROM_S3_TO_S3", False):
-            db = _get_migrating_db(db, _get_s3_db(settings, "OLD_S3_BLOB_DB_SETTINGS"))
+        else:
+            if getattr(settings, "BLOB_DB_CACHE", None):
+                db = _get_caching_db(db, settings.BLOB_DB_CACHE)
+            if getattr(settings, "BLOB_DB_MIGRATING_FROM_FS_TO_S3", False):
+                db = _get_migrating_db(db, _get_fs_db(settings))
+            elif getattr(settings, "BLOB_DB_MIGRATING_FROM_S3_TO_S3", False):
+                db = _get_migrating_db(db, _get_s3_db(settings, "OLD_S3_BLOB_DB_SETTINGS"))
         _db.append(db)
     return _db[-1]
 
@@ -32,6 +35,11 @@ def _get_fs_db(settings):
     return FilesystemBlobDB(blob_dir)
 
 
+def _get_caching_db(db, config):
+    from .cachedb import get_caching_db
+    return get_caching_db(db, config)
+
+
 def _get_migrating_db(new_db, old_db):
     from .migratingdb import MigratingBlobDB
     return MigratingBlobDB(new_db, old_db)
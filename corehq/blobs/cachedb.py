@@ -0,0 +1,201 @@
+"""Local disk cache for blobs read from a (remote) blob db
+"""
+import io
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from os.path import dirname, join
+from tempfile import NamedTemporaryFile
+
+from corehq.blobs import CODES
+from corehq.blobs.interface import AbstractBlobDB
+from corehq.blobs.util import BlobStream, RangeReader, check_safe_key
+from corehq.util.metrics import metrics_counter
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class CachingBlobDB(object):
+    """Adaptor that keeps recently read blobs on local disk
+
+    Blobs with a type code listed in `type_codes` are copied to
+    `cache_dir` the first time they are read and served from there until
+    they are evicted, least recently used first, to keep the total size
+    of the cache under `max_bytes`. Blobs are cached uncompressed.
+
+    Each process tracks the blobs it has cached and evicts them on its
+    own, so `max_bytes` is a per-process limit. Blobs deleted through
+    this adaptor are removed from the cache directory, which makes them
+    unavailable to other processes sharing it. Blobs deleted on other
+    machines are not invalidated, so only immutable blob types should be
+    cached.
+
+    :param db: The blob db to read through.
+    :param cache_dir: Absolute path of the cache directory.
+    :param max_bytes: Maximum number of bytes to keep in the cache.
+    :param type_codes: A dict mapping type codes to the size of the
+    largest blob of that type to cache (`None` for no limit).
+    """
+
+    def __init__(self, db, cache_dir, max_bytes, type_codes):
+        self.db = db
+        self.metadb = db.metadb
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.type_codes = type_codes
+        self._entries = OrderedDict()  # key -> size, least recent first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, content, **blob_meta_args):
+        meta = self.db.put(content, **blob_meta_args)
+        self._evict(meta.key)
+        return meta
+
+    def get(self, key=None, type_code=None, meta=None):
+        fileobj = self._get_cached(key, type_code, meta)
+        if fileobj is None:
+            return self.db.get(key=key, type_code=type_code, meta=meta)
+        if not isinstance(fileobj, CachedFile):
+            return fileobj
+        key = fileobj.blob_key
+        compressed_length = meta.compressed_length if meta is not None else None
+        return BlobStream(fileobj, self, key, fileobj.size, compressed_length)
+
+    def get_range(self, start, end=None, key=None, type_code=None, meta=None):
+        AbstractBlobDB._validate_range(start, end)
+        fileobj = self._get_cached(key, type_code, meta)
+        if fileobj is None:
+            return self.db.get_range(start, end, key=key, type_code=type_code, meta=meta)
+        if not isinstance(fileobj, CachedFile):
+            return AbstractBlobDB._skip_to_range(self, fileobj, start, end)
+        fileobj.seek(start)
+        length = max(fileobj.size - start, 0)
+        if end is not None:
+            length = min(end - start, length)
+        return BlobStream(RangeReader(fileobj, length), self, fileobj.blob_key, length, None)
+
+    def download(self, fileobj, key=None, type_code=None, meta=None):
+        blob = self._get_cached(key, type_code, meta)
+        if blob is None:
+            return self.db.download(fileobj, key=key, type_code=type_code, meta=meta)
+        with blob:
+            shutil.copyfileobj(blob, fileobj, CHUNK_SIZE)
+
+    def size(self, key):
+        return self.db.size(key)
+
+    def exists(self, key):
+        return self.db.exists(key)
+
+    def delete(self, key):
+        self._evict(key)
+        return self.db.delete(key)
+
+    def bulk_delete(self, metas):
+        for meta in metas:
+            self._evict(meta.key)
+        return self.db.bulk_delete(metas)
+
+    def expire(self, *args, **kw):
+        self.metadb.expire(*args, **kw)
+
+    def copy_blob(self, content, key):
+        self._evict(key)
+        self.db.copy_blob(content, key)
+
+    def _path(self, key):
+        check_safe_key(key)
+        return join(self.cache_dir, key)
+
+    def _get_cached(self, key, type_code, meta):
+        """Open a blob from the cache, copying it there first if needed
+
+        :returns: A `CachedFile`, `None` if the blob is not cacheable,
+        or the `BlobStream` read from `db` if its content turned out to
+        be too large to cache.
+        """
+        key = AbstractBlobDB._validate_get_args(key, type_code, meta)
+        if meta is not None:
+            type_code = meta.type_code
+        if type_code not in self.type_codes:
+            return None
+        tags = {'type': CODES.name_of(type_code, f'type_code_{type_code}')}
+        path = self._path(key)
+        try:
+            fileobj = CachedFile(path, key)
+        except FileNotFoundError:
+            pass
+        else:
+            # also adopts files cached by other processes
+            self._add(key, fileobj.size)
+            metrics_counter('commcare.blobs.cache.hit', tags=tags)
+            return fileobj
+        metrics_counter('commcare.blobs.cache.miss', tags=tags)
+
+        max_size = self.type_codes[type_code]
+        if max_size is not None and meta is not None and meta.content_length > max_size:
+            return None
+        blob = self.db.get(key=key, type_code=type_code, meta=meta)
+        if max_size is not None and blob.content_length > max_size:
+            return blob
+        with blob:
+            os.makedirs(dirname(path), exist_ok=True)
+            with NamedTemporaryFile(dir=dirname(path), delete=False) as tmp:
+                try:
+                    shutil.copyfileobj(blob, tmp, CHUNK_SIZE)
+                except BaseException:
+                    os.remove(tmp.name)
+                    raise
+        os.replace(tmp.name, path)
+        fileobj = CachedFile(path, key)
+        self._add(key, fileobj.size)
+        return fileobj
+
+    def _add(self, key, size):
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = []
+            while self._total_bytes > self.max_bytes and self._entries:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._remove(old_key)
+        if evicted:
+            metrics_counter('commcare.blobs.cache.evicted', value=len(evicted))
+
+    def _evict(self, key):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        self._remove(key)
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class CachedFile(io.FileIO):
+    """Cached blob file
+
+    The file stays readable if it is evicted while open.
+    """
+
+    def __init__(self, path, blob_key):
+        super(CachedFile, self).__init__(path, "rb")
+        self.blob_key = blob_key
+        self.size = os.fstat(self.fileno()).st_size
+
+
+def get_caching_db(db, config):
+    """Wrap blob db with a local disk cache
+
+    :param config: A dict with "dir", "max_bytes" and "type_codes" items.
+    Type codes are given by name (see `corehq.blobs.CODES`).
+    """
+    type_codes = {getattr(CODES, name): max_size for name, max_size in config["type_codes"].items()}
+    return CachingBlobDB(db, config["dir"], config["max_bytes"], type_codes)
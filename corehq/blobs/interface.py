@@ -1,9 +1,12 @@
+import shutil
 from abc import ABCMeta, abstractmethod
 
 from . import CODES
 from .metadata import MetaDB
+from .util import BlobStream, RangeReader
 
 NOT_SET = object()
+RANGE_SKIP_CHUNK_SIZE = 1024 * 1024
 
 
 class AbstractBlobDB(metaclass=ABCMeta):
@@ -69,6 +72,64 @@ class AbstractBlobDB(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def get_range(self, start, end=None, key=None, type_code=None, meta=None):
+        """Get a byte range of a blob.
+
+        :param start: Offset of the first byte to read.
+        :param end: Offset of the byte after the last byte to read. Read
+        to the end of the blob if `None`.
+        :param key: Blob key.
+        :param type_code: Blob type code.
+        :param meta: BlobMeta instance.
+
+        Offsets refer to the uncompressed blob content. See `get` for
+        details about `key`, `type_code` and `meta` arguments. This
+        implementation reads and discards the content before `start`;
+        backends that support ranged reads should override it.
+
+        :returns: A BlobStream object in binary read mode positioned at
+        `start`. Its `content_length` is the length of the range. The
+        returned object should be closed when finished reading.
+        """
+        self._validate_range(start, end)
+        blob = self.get(key=key, type_code=type_code, meta=meta)
+        return self._skip_to_range(self, blob, start, end)
+
+    @staticmethod
+    def _skip_to_range(db, blob, start, end):
+        """Read and discard the content of an open blob before `start`
+
+        :returns: A BlobStream of `db` for the range of `blob`.
+        """
+        skipped = 0
+        while skipped < start:
+            chunk = blob.read(min(start - skipped, RANGE_SKIP_CHUNK_SIZE))
+            if not chunk:
+                break
+            skipped += len(chunk)
+        available = max(blob.content_length - start, 0)
+        length = available if end is None else min(end - start, available)
+        return BlobStream(RangeReader(blob, length), db, blob.blob_key, length, None)
+
+    def download(self, fileobj, key=None, type_code=None, meta=None):
+        """Copy the content of a blob into a file-like object
+
+        :param fileobj: A file-like object in binary write mode.
+
+        See `get` for details about `key`, `type_code` and `meta`
+        arguments. Backends that can fetch parts of a blob concurrently
+        should override this method.
+        """
+        with self.get(key=key, type_code=type_code, meta=meta) as blob:
+            shutil.copyfileobj(blob, fileobj)
+
+    @staticmethod
+    def _validate_range(start, end):
+        if start < 0:
+            raise ValueError("'start' must not be negative")
+        if end is not None and end < start:
+            raise ValueError("'end' must not be less than 'start'")
+
     @staticmethod
     def _validate_get_args(key, type_code, meta):
         if key is not None or type_code is not None:
@@ -25,6 +25,18 @@ class MigratingBlobDB(object):
         except NotFound:
             return self.old_db.get(*args, **kw)
 
+    def get_range(self, *args, **kw):
+        try:
+            return self.new_db.get_range(*args, **kw)
+        except NotFound:
+            return self.old_db.get_range(*args, **kw)
+
+    def download(self, *args, **kw):
+        try:
+            return self.new_db.download(*args, **kw)
+        except NotFound:
+            return self.old_db.download(*args, **kw)
+
     def size(self, *args, **kw):
         try:
             return self.new_db.size(*args, **kw)
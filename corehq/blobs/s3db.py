@@ -1,7 +1,9 @@
 from contextlib import contextmanager
 from gzip import GzipFile
+from io import BytesIO
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from botocore.utils import fix_s3_host
@@ -22,6 +24,11 @@ from corehq.util.metrics import metrics_counter, metrics_histogram_timer
 
 DEFAULT_S3_BUCKET = "blobdb"
 DEFAULT_BULK_DELETE_CHUNKSIZE = 1000
+# Content larger than this is uploaded (and downloaded) in parts of
+# `multipart_chunksize` bytes, `max_concurrency` parts at a time.
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 10
 
 
 class S3BlobDB(AbstractBlobDB):
@@ -41,6 +48,11 @@ class S3BlobDB(AbstractBlobDB):
         self.bulk_delete_chunksize = config.get("bulk_delete_chunksize", DEFAULT_BULK_DELETE_CHUNKSIZE)
         self.s3_bucket_name = config.get("s3_bucket", DEFAULT_S3_BUCKET)
         self._s3_bucket_exists = False
+        self.transfer_config = TransferConfig(
+            multipart_threshold=config.get("multipart_threshold", DEFAULT_MULTIPART_THRESHOLD),
+            multipart_chunksize=config.get("multipart_chunksize", DEFAULT_MULTIPART_CHUNKSIZE),
+            max_concurrency=config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        )
         # https://github.com/boto/boto3/issues/259
         self.db.meta.client.meta.events.unregister('before-sign.s3', fix_s3_host)
 
@@ -74,7 +86,7 @@ class S3BlobDB(AbstractBlobDB):
             self.metadb.put(meta)
             source = {"Bucket": self.s3_bucket_name, "Key": content.blob_key}
             with self.report_timing('put-via-copy', meta.key):
-                s3_bucket.copy(source, meta.key)
+                s3_bucket.copy(source, meta.key, Config=self.transfer_config)
         else:
             content.seek(0)
             if meta.is_compressed:
@@ -86,7 +98,8 @@ class S3BlobDB(AbstractBlobDB):
                 chunk_sizes.append(bytes_sent)
 
             with self.report_timing('put', meta.key):
-                s3_bucket.upload_fileobj(content, meta.key, Callback=_track_transfer)
+                s3_bucket.upload_fileobj(
+                    content, meta.key, Callback=_track_transfer, Config=self.transfer_config)
             meta.content_length, meta.compressed_length = get_content_size(content, chunk_sizes)
             self.metadb.put(meta)
         return meta
@@ -107,6 +120,42 @@ class S3BlobDB(AbstractBlobDB):
             content_length, compressed_length = reported_content_length, None
         return BlobStream(body, self, key, content_length, compressed_length)
 
+    @retry_on_slow_down
+    def get_range(self, start, end=None, key=None, type_code=None, meta=None):
+        if meta and meta.is_compressed:
+            # offsets refer to uncompressed content, which cannot be
+            # located in the compressed object without reading it
+            return super(S3BlobDB, self).get_range(start, end, key, type_code, meta)
+        key = self._validate_get_args(key, type_code, meta)
+        self._validate_range(start, end)
+        check_safe_key(key)
+        if end == start:
+            return BlobStream(BytesIO(b""), self, key, 0, None)
+        byte_range = "bytes={}-{}".format(start, "" if end is None else end - 1)
+        with maybe_not_found(throw=NotFound(key)), self.report_timing('get-range', key):
+            try:
+                resp = self._s3_bucket().Object(key).get(Range=byte_range)
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "InvalidRange":
+                    raise
+                # start is past the end of the blob
+                return BlobStream(BytesIO(b""), self, key, 0, None)
+        return BlobStream(resp["Body"], self, key, resp['ContentLength'], None)
+
+    def download(self, fileobj, key=None, type_code=None, meta=None):
+        """Download blob content into a file-like object
+
+        Blobs larger than the configured `multipart_threshold` are
+        fetched with concurrent ranged requests. Compressed blobs are
+        streamed and decompressed sequentially.
+        """
+        if meta and meta.is_compressed:
+            return super(S3BlobDB, self).download(fileobj, key, type_code, meta)
+        key = self._validate_get_args(key, type_code, meta)
+        check_safe_key(key)
+        with maybe_not_found(throw=NotFound(key)), self.report_timing('download', key):
+            self._s3_bucket().download_fileobj(key, fileobj, Config=self.transfer_config)
+
     def size(self, key):
         check_safe_key(key)
         with maybe_not_found(throw=NotFound(key)), self.report_timing('size', key):
@@ -147,7 +196,7 @@ class S3BlobDB(AbstractBlobDB):
 
     def copy_blob(self, content, key):
         with self.report_timing('copy_blobdb', key):
-            self._s3_bucket(create=True).upload_fileobj(content, key)
+            self._s3_bucket(create=True).upload_fileobj(content, key, Config=self.transfer_config)
 
     def _s3_bucket(self, create=False):
         if create and not self._s3_bucket_exists:
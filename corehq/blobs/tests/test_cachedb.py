@@ -0,0 +1,144 @@
+import os
+from io import BytesIO
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.test import SimpleTestCase, TestCase
+
+from testil import replattr
+
+from corehq.blobs import CODES
+from corehq.blobs.cachedb import CachingBlobDB, get_caching_db
+from corehq.blobs.exceptions import NotFound
+from corehq.blobs.tests.test_fsdb import _BlobDBTests
+from corehq.blobs.tests.util import TemporaryFilesystemBlobDB, new_meta
+from corehq.util.metrics.tests.utils import capture_metrics
+
+
+class TestCachingBlobDB(TestCase, _BlobDBTests):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestCachingBlobDB, cls).setUpClass()
+        cls.fsdb = TemporaryFilesystemBlobDB()
+        cls.cache_dir = mkdtemp(prefix="blobdb-cache")
+        cls.db = CachingBlobDB(cls.fsdb, cls.cache_dir, 100, {CODES.tempfile: 20})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fsdb.close()
+        rmtree(cls.cache_dir)
+        super(TestCachingBlobDB, cls).tearDownClass()
+
+    def test_read_through(self):
+        meta = self.db.put(BytesIO(b"content"), meta=self.new_meta())
+        with capture_metrics() as metrics:
+            with self.db.get(meta=meta) as fh:
+                self.assertEqual(fh.read(), b"content")
+            with replattr(self.fsdb, "get", blow_up, sigcheck=False):
+                with self.db.get(meta=meta) as fh:
+                    self.assertEqual(fh.read(), b"content")
+                    self.assertEqual(fh.content_length, 7)
+                with self.db.get_range(3, 6, meta=meta) as fh:
+                    self.assertEqual(fh.read(), b"ten")
+        self.assertEqual(metrics.sum('commcare.blobs.cache.miss', type='tempfile'), 1)
+        self.assertEqual(metrics.sum('commcare.blobs.cache.hit', type='tempfile'), 2)
+
+    def test_uncached_type_code(self):
+        meta = self.db.put(BytesIO(b"content"), meta=self.new_meta(type_code=CODES.data_import))
+        with capture_metrics() as metrics, self.db.get(meta=meta) as fh:
+            self.assertEqual(fh.read(), b"content")
+        self.assertFalse(metrics.list('commcare.blobs.cache.miss'))
+        self.assertFalse(self.is_cached(meta))
+
+    def test_blob_too_big_to_cache(self):
+        meta = self.db.put(BytesIO(b"x" * 21), meta=self.new_meta())
+        with self.db.get(meta=meta) as fh:
+            self.assertEqual(fh.read(), b"x" * 21)
+        self.assertFalse(self.is_cached(meta))
+
+    def test_blob_too_big_to_cache_is_read_once(self):
+        meta = self.fsdb.put(BytesIO(b"x" * 21), meta=new_meta())
+        get_args = {"key": meta.key, "type_code": meta.type_code}
+        real_get = self.fsdb.get
+        calls = []
+
+        def get(*args, **kw):
+            calls.append(kw)
+            return real_get(*args, **kw)
+
+        with replattr(self.fsdb, "get", get, sigcheck=False):
+            with self.db.get(**get_args) as fh:
+                self.assertEqual(fh.read(), b"x" * 21)
+            with self.db.get_range(3, 6, **get_args) as fh:
+                self.assertEqual(fh.read(), b"xxx")
+            fileobj = BytesIO()
+            self.db.download(fileobj, **get_args)
+            self.assertEqual(fileobj.getvalue(), b"x" * 21)
+        self.assertEqual(len(calls), 3)
+        self.assertFalse(self.is_cached(meta))
+
+    def test_evict_least_recently_used(self):
+        metas = [self.db.put(BytesIO(b"x" * 20), meta=self.new_meta()) for i in range(6)]
+        for meta in metas[:5]:
+            self.db.get(meta=meta).close()
+        self.db.get(meta=metas[0]).close()  # make metas[1] the least recently used
+        self.db.get(meta=metas[5]).close()
+        self.assertEqual(
+            [self.is_cached(meta) for meta in metas],
+            [True, False, True, True, True, True],
+        )
+
+    def test_delete_invalidates_cache(self):
+        meta = self.db.put(BytesIO(b"content"), meta=self.new_meta())
+        self.db.get(meta=meta).close()
+        self.assertTrue(self.is_cached(meta))
+        self.db.delete(key=meta.key)
+        self.assertFalse(self.is_cached(meta))
+        with self.assertRaises(NotFound):
+            self.db.get(meta=meta)
+
+    def test_bulk_delete_invalidates_cache(self):
+        metas = [self.db.put(BytesIO(b"content"), meta=self.new_meta()) for i in range(2)]
+        for meta in metas:
+            self.db.get(meta=meta).close()
+        self.db.bulk_delete(metas=metas)
+        self.assertEqual([self.is_cached(meta) for meta in metas], [False, False])
+
+    def test_put_invalidates_cache(self):
+        meta = self.new_meta()
+        self.db.put(BytesIO(b"bing"), meta=meta)
+        self.db.get(meta=meta).close()
+        self.db.put(BytesIO(b"bang"), meta=meta)
+        with self.db.get(meta=meta) as fh:
+            self.assertEqual(fh.read(), b"bang")
+
+    def is_cached(self, meta):
+        return os.path.exists(os.path.join(self.cache_dir, meta.key))
+
+
+class TestCachingBlobDBCompressed(TestCachingBlobDB):
+    meta_kwargs = {'compressed_length': -1}
+
+
+class TestGetCachingDB(SimpleTestCase):
+
+    def test_type_codes_by_name(self):
+        db = get_caching_db(FakeDB(), {
+            "dir": "/tmp/cache",
+            "max_bytes": 1000,
+            "type_codes": {"form_xml": 100, "commcarebuild": None},
+        })
+        self.assertEqual(db.type_codes, {CODES.form_xml: 100, CODES.commcarebuild: None})
+
+
+class FakeDB(object):
+    metadb = None
+
+
+def blow_up(*args, **kw):
+    raise Boom("should not be called")
+
+
+class Boom(Exception):
+    pass
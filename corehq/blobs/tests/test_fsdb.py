@@ -74,6 +74,35 @@ class _BlobDBTests(object):
         with self.db.get(meta=new) as fh:
             self.assertEqual(fh.read(), b"content")
 
+    def test_get_range(self):
+        meta = self.db.put(BytesIO(b"0123456789"), meta=self.new_meta())
+        with self.db.get_range(2, 5, meta=meta) as fh:
+            self.assertEqual(fh.content_length, 3)
+            self.assertEqual(fh.read(), b"234")
+
+    def test_get_range_to_end(self):
+        meta = self.db.put(BytesIO(b"0123456789"), meta=self.new_meta())
+        with self.db.get_range(7, meta=meta) as fh:
+            self.assertEqual(fh.content_length, 3)
+            self.assertEqual(fh.read(), b"789")
+
+    def test_get_range_past_end(self):
+        meta = self.db.put(BytesIO(b"0123456789"), meta=self.new_meta())
+        with self.db.get_range(8, 20, meta=meta) as fh:
+            self.assertEqual(fh.read(), b"89")
+        with self.db.get_range(20, meta=meta) as fh:
+            self.assertEqual(fh.read(), b"")
+
+    def test_get_range_not_found(self):
+        with self.assertRaises(mod.NotFound):
+            self.db.get_range(0, 5, key="missing", type_code=CODES.tempfile)
+
+    def test_download(self):
+        meta = self.db.put(BytesIO(b"content"), meta=self.new_meta())
+        fileobj = BytesIO()
+        self.db.download(fileobj, meta=meta)
+        self.assertEqual(fileobj.getvalue(), b"content")
+
     def test_exists(self):
         meta = self.db.put(BytesIO(b"content"), meta=self.new_meta())
         self.assertTrue(self.db.exists(key=meta.key), 'not found')
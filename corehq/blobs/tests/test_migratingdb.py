@@ -32,6 +32,17 @@ class TestMigratingBlobDB(get_base_class()):
         with self.db.get(meta=meta) as fh:
             self.assertEqual(fh.read(), b"content")
 
+    def test_get_range_falls_back_to_fsdb(self):
+        meta = self.fsdb.put(BytesIO(b"content"), meta=new_meta())
+        with self.db.get_range(2, 5, meta=meta) as fh:
+            self.assertEqual(fh.read(), b"nte")
+
+    def test_download_falls_back_to_fsdb(self):
+        meta = self.fsdb.put(BytesIO(b"content"), meta=new_meta())
+        fileobj = BytesIO()
+        self.db.download(fileobj, meta=meta)
+        self.assertEqual(fileobj.getvalue(), b"content")
+
     def test_copy_blob_masks_old_blob(self):
         content = BytesIO(b"fs content")
         meta = self.fsdb.put(content, meta=new_meta())
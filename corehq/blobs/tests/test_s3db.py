@@ -60,6 +60,7 @@ Finally, add the following to `localsettings.py`:
         }
 
 """  # noqa: W605
+import os
 from io import BytesIO, SEEK_SET, TextIOWrapper
 
 from django.conf import settings
@@ -102,6 +103,60 @@ class TestS3BlobDBCompressed(TestS3BlobDB):
     meta_kwargs = {'compressed_length': -1}
 
 
+class TestS3BlobDBMultipart(TestCase):
+    # S3 requires parts (other than the last) to be at least 5MB
+    part_size = 5 * 1024 * 1024
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestS3BlobDBMultipart, cls).setUpClass()
+        with trap_extra_setup(AttributeError, msg="S3_BLOB_DB_SETTINGS not configured"):
+            config = dict(settings.S3_BLOB_DB_SETTINGS)
+        config.update(
+            multipart_threshold=cls.part_size,
+            multipart_chunksize=cls.part_size,
+            max_concurrency=4,
+        )
+        cls.db = TemporaryS3BlobDB(config)
+        cls.content = os.urandom(cls.part_size * 2 + 1000)
+        cls.meta = cls.db.put(BytesIO(cls.content), meta=new_meta())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+        super(TestS3BlobDBMultipart, cls).tearDownClass()
+
+    def test_put_uses_multipart_upload(self):
+        obj = self.db._s3_bucket().Object(self.meta.key)
+        # multipart ETags are suffixed with the number of parts
+        self.assertTrue(obj.e_tag.strip('"').endswith("-3"), obj.e_tag)
+        self.assertEqual(self.meta.content_length, len(self.content))
+        self.assertEqual(self.db.size(key=self.meta.key), len(self.content))
+
+    def test_get(self):
+        with self.db.get(meta=self.meta) as fh:
+            self.assertEqual(fh.read(), self.content)
+
+    def test_get_range_across_parts(self):
+        start, end = self.part_size - 10, self.part_size + 10
+        with self.db.get_range(start, end, meta=self.meta) as fh:
+            self.assertEqual(fh.content_length, 20)
+            self.assertEqual(fh.read(), self.content[start:end])
+
+    def test_download(self):
+        fileobj = BytesIO()
+        self.db.download(fileobj, meta=self.meta)
+        self.assertEqual(fileobj.getvalue(), self.content)
+
+    def test_put_compressed(self):
+        meta = self.db.put(BytesIO(self.content), meta=new_meta(compressed_length=-1))
+        self.assertEqual(meta.content_length, len(self.content))
+        with self.db.get(meta=meta) as fh:
+            self.assertEqual(fh.read(), self.content)
+        with self.db.get_range(self.part_size, self.part_size + 5, meta=meta) as fh:
+            self.assertEqual(fh.read(), self.content[self.part_size:self.part_size + 5])
+
+
 class TestBlobStream(TestCase):
 
     @classmethod
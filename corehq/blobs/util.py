@@ -273,6 +273,29 @@ class BlobStream(RawIOBase):
         return self._blob_db()
 
 
+class RangeReader(object):
+    """Read at most `length` bytes from a stream"""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._remaining = length
+        self._amount_read = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(size) if size else b""
+        self._remaining -= len(data)
+        self._amount_read += len(data)
+        return data
+
+    def tell(self):
+        return self._amount_read
+
+    def close(self):
+        self._stream.close()
+
+
 def get_content_size(fileobj, chunks_sent):
     """
     :param fileobj: content object written to the backend
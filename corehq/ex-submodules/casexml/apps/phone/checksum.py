@@ -1,10 +1,6 @@
 import hashlib
-import binascii
-from copy import copy
 import six
 from six.moves import zip
-from functools import reduce
-from six.moves import map
 
 
 EMPTY_HASH = ""
@@ -32,6 +28,9 @@ class CaseStateHash(object):
 
 class Checksum(object):
     """
+    XOR of the md5 hashes of a list of ids, which can be updated as ids
+    are added or removed.
+
     >>> Checksum(['abc123', '123abc']).hexdigest()
     '409c5c597fa2c2a693b769f0d2ad432b'
 
@@ -44,16 +43,30 @@ class Checksum(object):
     >>> c.hexdigest()
     '409c5c597fa2c2a693b769f0d2ad432b'
 
+    >>> c.add('xyz789')
+    >>> c.remove('xyz789')
+    >>> c.hexdigest()
+    '409c5c597fa2c2a693b769f0d2ad432b'
+
     >>> Checksum().hexdigest()
     ''
 
     """
 
     def __init__(self, init=None):
-        self._list = init or []
+        self._value = 0
+        self.count = 0
+        for id in init or []:
+            self.add(id)
 
     def add(self, id):
-        self._list.append(id)
+        self._value ^= int.from_bytes(Checksum.hash(id), 'big')
+        self.count += 1
+
+    def remove(self, id):
+        """Remove an id that was previously added"""
+        self._value ^= int.from_bytes(Checksum.hash(id), 'big')
+        self.count -= 1
 
     @classmethod
     def hash(cls, line):
@@ -67,10 +80,6 @@ class Checksum(object):
         return bytearray([b1 ^ b2 for (b1, b2) in zip(bytes1, bytes2)])
 
     def hexdigest(self):
-        if not self._list:
+        if not self.count:
             return EMPTY_HASH
-        x = copy(self._list)
-        x = list(map(Checksum.hash, x))
-        x = reduce(Checksum.xor, x)
-        x = binascii.hexlify(bytes(x)).decode('utf-8')
-        return x
+        return '%032x' % self._value
@@ -0,0 +1,162 @@
+"""
+Compact binary encoding of the case state of a ``SimplifiedSyncLog``
+
+Sync logs of users with many cases hold tens of thousands of case ids, each
+serialized as a 36 character JSON string, several times over. The compact
+format stores
+
+- each set of case ids as a sorted array of 16 byte UUIDs, plus a list of
+  any case ids that are not canonical UUID strings
+- each index tree as a table of interned strings (encoded the same way)
+  and an array of ``(case, identifier, referenced case)`` offsets into that
+  table
+
+The encoded state is stored in ``SyncLogSQL.case_state`` and the fields it
+holds are removed from ``SyncLogSQL.doc``.
+"""
+import json
+import struct
+import sys
+from array import array
+
+FORMAT_VERSION = 1
+
+CASE_ID_FIELDS = ('case_ids_on_phone', 'dependent_case_ids_on_phone', 'closed_cases')
+INDEX_TREE_FIELDS = ('index_tree', 'extension_index_tree')
+CASE_STATE_FIELDS = CASE_ID_FIELDS + INDEX_TREE_FIELDS
+
+_UUID_SIZE = 16
+_LENGTH = struct.Struct('<I')
+# identifier and referenced case offset of a case without indices
+_NO_INDEX = 0xFFFFFFFF
+
+
+def encode_case_state(doc):
+    """Encode the case state fields of a sync log doc
+
+    :param doc: Sync log JSON (``SimplifiedSyncLog.to_json()``).
+    :returns: bytes
+    """
+    sections = []
+    for field in CASE_ID_FIELDS:
+        sections.extend(_pack_strings(doc.get(field) or [])[:2])
+    for field in INDEX_TREE_FIELDS:
+        sections.extend(_pack_index_tree((doc.get(field) or {}).get('indices') or {}))
+    parts = [bytes([FORMAT_VERSION])]
+    for section in sections:
+        parts.append(_LENGTH.pack(len(section)))
+        parts.append(section)
+    return b''.join(parts)
+
+
+def decode_case_state(data):
+    """Decode case state encoded with ``encode_case_state``
+
+    :returns: dict of case state fields in sync log JSON format.
+    """
+    data = memoryview(data)
+    if data[0] != FORMAT_VERSION:
+        raise ValueError("Unknown case state format: {}".format(data[0]))
+    sections = _iter_sections(data[1:])
+    state = {}
+    for field in CASE_ID_FIELDS:
+        state[field] = _unpack_strings(next(sections), next(sections))
+    for field in INDEX_TREE_FIELDS:
+        strings = _unpack_strings(next(sections), next(sections))
+        state[field] = {
+            'doc_type': 'IndexTree',
+            'indices': _unpack_index_tree(strings, next(sections)),
+        }
+    return state
+
+
+def strip_case_state(doc):
+    """Copy of sync log JSON without the fields held in the compact case state"""
+    return {key: value for key, value in doc.items() if key not in CASE_STATE_FIELDS}
+
+
+def _iter_sections(data):
+    offset = 0
+    while offset < len(data):
+        length, = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        yield data[offset:offset + length]
+        offset += length
+
+
+def _uuid_bytes(value):
+    """Packed UUID or ``None`` if ``value`` is not a canonical UUID string"""
+    if len(value) != 36 or value[8] != '-' or value[13] != '-' or value[18] != '-' or value[23] != '-':
+        return None
+    hexed = value.replace('-', '')
+    try:
+        packed = bytes.fromhex(hexed)
+    except ValueError:
+        return None
+    # rejects upper case and whitespace, which fromhex accepts
+    return packed if packed.hex() == hexed else None
+
+
+def _pack_strings(values):
+    """
+    :returns: ``(uuids, others, ordered)`` where ``uuids`` is the sorted
+              array of UUIDs, ``others`` is a JSON list of the remaining
+              values and ``ordered`` lists the values in the order they
+              will be unpacked: UUIDs first, then others.
+    """
+    uuids = []
+    others = []
+    for value in values:
+        packed = _uuid_bytes(value)
+        if packed is None:
+            others.append(value)
+        else:
+            uuids.append((packed, value))
+    uuids.sort()
+    others.sort()
+    ordered = [value for packed, value in uuids] + others
+    return b''.join(packed for packed, value in uuids), json.dumps(others).encode('utf-8'), ordered
+
+
+def _unpack_strings(uuids, others):
+    hexed = uuids.hex()
+    values = [
+        '-'.join((
+            hexed[i:i + 8], hexed[i + 8:i + 12], hexed[i + 12:i + 16], hexed[i + 16:i + 20], hexed[i + 20:i + 32]
+        ))
+        for i in range(0, len(hexed), _UUID_SIZE * 2)
+    ]
+    values.extend(json.loads(bytes(others).decode('utf-8')))
+    return values
+
+
+def _pack_index_tree(indices):
+    strings = set()
+    for case_id, case_indices in indices.items():
+        strings.add(case_id)
+        strings.update(case_indices.keys())
+        strings.update(case_indices.values())
+    packed_uuids, packed_others, ordered = _pack_strings(strings)
+    positions = {value: i for i, value in enumerate(ordered)}
+    rows = array('I')
+    for case_id, case_indices in indices.items():
+        if not case_indices:
+            rows.extend((positions[case_id], _NO_INDEX, _NO_INDEX))
+        for identifier, referenced_id in case_indices.items():
+            rows.extend((positions[case_id], positions[identifier], positions[referenced_id]))
+    if sys.byteorder != 'little':
+        rows.byteswap()
+    return packed_uuids, packed_others, rows.tobytes()
+
+
+def _unpack_index_tree(strings, data):
+    rows = array('I')
+    rows.frombytes(data)
+    if sys.byteorder != 'little':
+        rows.byteswap()
+    indices = {}
+    for i in range(0, len(rows), 3):
+        case_indices = indices.setdefault(strings[rows[i]], {})
+        if rows[i + 1] != _NO_INDEX:
+            case_indices[strings[rows[i + 1]]] = strings[rows[i + 2]]
+    return indices
@@ -23,8 +23,14 @@ Example case graphs with outcomes:
 """
 import logging
 from collections import defaultdict
+from contextlib import ExitStack
 from functools import wraps
 from itertools import chain, islice
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+from django.conf import settings
+from django.db import connections
 
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
@@ -35,9 +41,13 @@ from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
-from corehq.sql_db.routers import read_from_plproxy_standbys
+from corehq.sql_db.routers import (
+    allow_read_from_plproxy_standby,
+    read_from_plproxy_standbys,
+)
 from corehq.toggles import LIVEQUERY_READ_FROM_STANDBYS, NAMESPACE_USER
 from corehq.util.metrics.load_counters import case_load_counter
+from corehq.util.timer import NestableTimer
 
 
 def livequery_read_from_standbys(func):
@@ -257,15 +267,18 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
                     live_ids, restore_state, accessor)
         else:
             sync_ids = live_ids
-        restore_state.current_sync_log.case_ids_on_phone = live_ids
+        restore_state.current_sync_log.set_case_ids_on_phone(live_ids)
 
         with timing_context("compile_response(%s cases)" % len(sync_ids)):
             iaccessor = PrefetchIndexCaseAccessor(accessor, indices)
+            batches = batch_cases(iaccessor, sync_ids, settings.LIVEQUERY_BATCH_SIZE)
+            if settings.LIVEQUERY_PREFETCH_QUEUE_DEPTH > 0:
+                batches = prefetch_batches(timing_context, batches, settings.LIVEQUERY_PREFETCH_QUEUE_DEPTH)
             compile_response(
                 timing_context,
                 restore_state,
                 response,
-                batch_cases(iaccessor, sync_ids),
+                batches,
                 init_progress(async_task, len(sync_ids)),
             )
 
@@ -300,7 +313,7 @@ class PrefetchIndexCaseAccessor(object):
         return self.accessor.get_cases(case_ids, **kw)
 
 
-def batch_cases(accessor, case_ids):
+def batch_cases(accessor, case_ids, batch_size=1000):
     def take(n, iterable):
         # https://docs.python.org/2/library/itertools.html#recipes
         return list(islice(iterable, n))
@@ -308,13 +321,87 @@ def batch_cases(accessor, case_ids):
     track_load = case_load_counter("livequery_restore", accessor.domain)
     ids = iter(case_ids)
     while True:
-        next_ids = take(1000, ids)
+        next_ids = take(batch_size, ids)
         if not next_ids:
             break
         track_load(len(next_ids))
         yield accessor.get_cases(next_ids)
 
 
+def prefetch_batches(timing_context, batches, queue_depth):
+    """Produce batches on a separate thread while the caller consumes them
+
+    Up to `queue_depth` batches are fetched ahead of the consumer so that
+    database queries overlap with XML serialization. The time spent
+    producing each batch is added to `timing_context` as a "fetch_cases"
+    timer when the batch is consumed, and time spent waiting for a batch
+    is recorded as "wait_for_cases".
+    """
+    batch_queue = Queue(maxsize=queue_depth)
+    stop = Event()
+    use_standbys = allow_read_from_plproxy_standby()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batch_queue.put(item, timeout=1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            with ExitStack() as stack:
+                if use_standbys:
+                    # routing is thread local
+                    stack.enter_context(read_from_plproxy_standbys())
+                items = iter(batches)
+                while not stop.is_set():
+                    timer = NestableTimer("fetch_cases", is_root=False)
+                    timer.start()
+                    try:
+                        batch = next(items)
+                    except StopIteration:
+                        break
+                    timer.stop()
+                    timer.name = "fetch_cases (%s cases)" % len(batch)
+                    if not put((batch, timer, None)):
+                        return
+        except Exception as err:
+            put((None, None, err))
+            return
+        finally:
+            connections.close_all()
+        put(_DONE)
+
+    producer = Thread(target=produce, name="livequery-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            with timing_context("wait_for_cases"):
+                item = batch_queue.get()
+            if item is _DONE:
+                break
+            batch, timer, err = item
+            if err is not None:
+                raise err
+            timing_context.peek().append(timer)
+            yield batch
+    finally:
+        stop.set()
+        # unblock the producer if it is waiting for space in the queue
+        try:
+            while True:
+                batch_queue.get_nowait()
+        except Empty:
+            pass
+        producer.join()
+
+
+_DONE = object()
+
+
 def init_progress(async_task, total):
     if not async_task:
         return lambda done: None
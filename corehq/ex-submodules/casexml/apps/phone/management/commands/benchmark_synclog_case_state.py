@@ -0,0 +1,91 @@
+import json
+import timeit
+import tracemalloc
+import uuid
+
+from django.core.management import BaseCommand
+
+from casexml.apps.phone.compact_case_state import (
+    decode_case_state,
+    encode_case_state,
+    strip_case_state,
+)
+from casexml.apps.phone.models import SyncLogSQL, properly_wrap_sync_log
+
+
+class Command(BaseCommand):
+    help = "Compare size, load/save time and memory of the JSON and compact sync log case state formats"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synclog-id', help='Benchmark an existing sync log')
+        parser.add_argument(
+            '--cases', type=int, default=50000,
+            help='Number of cases on the phone of a generated sync log',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, synclog_id, cases, repeat, **options):
+        if synclog_id:
+            synclog_sql = SyncLogSQL.objects.get(synclog_id=synclog_id)
+            doc = properly_wrap_sync_log(synclog_sql.doc, synclog_sql).to_json()
+        else:
+            doc = _generate_doc(cases)
+
+        as_json = json.dumps(doc)
+        compact = encode_case_state(doc)
+        stripped = json.dumps(strip_case_state(doc))
+        print("{} cases on phone".format(len(doc.get('case_ids_on_phone', []))))
+        print("    {:<8} {:>12} {:>12} {:>12} {:>12}".format(
+            'format', 'bytes', 'save (ms)', 'load (ms)', 'memory (KB)'
+        ))
+        _print_row(
+            'json',
+            len(as_json),
+            _time(lambda: json.dumps(doc), repeat),
+            _time(lambda: json.loads(as_json), repeat),
+            _memory(lambda: json.loads(as_json)),
+        )
+        _print_row(
+            'compact',
+            len(compact) + len(stripped),
+            _time(lambda: (encode_case_state(doc), json.dumps(strip_case_state(doc))), repeat),
+            _time(lambda: (decode_case_state(compact), json.loads(stripped)), repeat),
+            _memory(lambda: (decode_case_state(compact), json.loads(stripped))),
+        )
+
+
+def _generate_doc(num_cases):
+    case_ids = [str(uuid.uuid4()) for i in range(num_cases)]
+    # one in four cases is a child case
+    children = case_ids[::4]
+    parents = case_ids[1::4]
+    return {
+        'doc_type': 'SimplifiedSyncLog',
+        'case_ids_on_phone': case_ids,
+        'dependent_case_ids_on_phone': parents[:len(parents) // 10],
+        'closed_cases': [],
+        'index_tree': {
+            'doc_type': 'IndexTree',
+            'indices': {child: {'parent': parent} for child, parent in zip(children, parents)},
+        },
+        'extension_index_tree': {'doc_type': 'IndexTree', 'indices': {}},
+    }
+
+
+def _time(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def _memory(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size / 1024
+
+
+def _print_row(name, size, save, load, memory):
+    print("    {:<8} {:>12} {:>12.1f} {:>12.1f} {:>12.0f}".format(name, size, save, load, memory))
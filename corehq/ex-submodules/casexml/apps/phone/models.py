@@ -5,6 +5,7 @@ from collections import defaultdict, namedtuple
 from copy import copy
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.core.exceptions import ValidationError
 from django.db import models
@@ -17,6 +18,11 @@ from casexml.apps.case import const
 from casexml.apps.case.sharedmodels import CommCareCaseIndex, IndexHoldingMixIn
 from casexml.apps.phone.change_publishers import publish_synclog_saved
 from casexml.apps.phone.checksum import CaseStateHash, Checksum
+from casexml.apps.phone.compact_case_state import (
+    decode_case_state,
+    encode_case_state,
+    strip_case_state,
+)
 from casexml.apps.phone.exceptions import (
     IncompatibleSyncLogType,
     MissingSyncLog,
@@ -121,6 +127,9 @@ class OTARestoreUser(object):
     def get_fixture_data_items(self):
         raise NotImplementedError()
 
+    def get_fixture_data_item_ids(self):
+        raise NotImplementedError()
+
     def get_commtrack_location_id(self):
         raise NotImplementedError()
 
@@ -141,8 +150,13 @@ class OTARestoreUser(object):
 
     @memoized
     def get_locations_to_sync(self):
-        from corehq.apps.locations.fixtures import get_location_fixture_queryset
-        return get_location_fixture_queryset(self)
+        from corehq.apps.locations.fixtures import get_location_fixture_queryset_for_root_ids
+        return get_location_fixture_queryset_for_root_ids(self.domain, self.get_location_fixture_root_ids())
+
+    @memoized
+    def get_location_fixture_root_ids(self):
+        from corehq.apps.locations.fixtures import get_location_fixture_root_ids
+        return get_location_fixture_root_ids(self)
 
 
 class OTARestoreWebUser(OTARestoreUser):
@@ -160,6 +174,9 @@ class OTARestoreWebUser(OTARestoreUser):
     def get_fixture_data_items(self):
         return []
 
+    def get_fixture_data_item_ids(self):
+        return set()
+
     def get_commtrack_location_id(self):
         return None
 
@@ -195,6 +212,11 @@ class OTARestoreCommCareUser(OTARestoreUser):
 
         return FixtureDataItem.by_user(self._couch_user)
 
+    def get_fixture_data_item_ids(self):
+        from corehq.apps.fixtures.models import FixtureDataItem
+
+        return FixtureDataItem.by_user(self._couch_user, wrap=False)
+
     def get_commtrack_location_id(self):
         from corehq.apps.commtrack.util import get_commtrack_location_id
 
@@ -267,6 +289,12 @@ class UCRSyncLog(Document):
     datetime = DateTimeProperty()
 
 
+class FixtureSyncLog(Document):
+    fixture_id = StringProperty()
+    fingerprint = StringProperty()  # digest of the fixture content sent
+    size = IntegerProperty()  # bytes
+
+
 class AbstractSyncLog(SafeSaveDocument):
     date = DateTimeProperty()
     domain = StringProperty()
@@ -297,6 +325,7 @@ class AbstractSyncLog(SafeSaveDocument):
     cache_payload_paths = DictProperty()
 
     last_ucr_sync_times = SchemaListProperty(UCRSyncLog)
+    last_fixture_syncs = SchemaListProperty(FixtureSyncLog)
 
     strict = True  # for asserts
 
@@ -412,7 +441,13 @@ def synclog_to_sql_object(synclog_json_object):
     ]
     for from_field, to_field in field_mapping:
         setattr(synclog, to_field, getattr(synclog_json_object, from_field, None))
-    synclog.doc = synclog_json_object.to_json()
+    doc = synclog_json_object.to_json()
+    if settings.SYNCLOG_COMPACT_CASE_STATE:
+        synclog.case_state = encode_case_state(doc)
+        doc = strip_case_state(doc)
+    else:
+        synclog.case_state = None
+    synclog.doc = doc
     return synclog
 
 
@@ -440,6 +475,8 @@ class SyncLogSQL(models.Model):
     had_state_error = models.BooleanField(default=False)
     error_date = models.DateTimeField(null=True, blank=True)
     error_hash = models.CharField(max_length=255, null=True, blank=True)
+    # case state fields of `doc` in compact format. See compact_case_state.py
+    case_state = models.BinaryField(null=True)
 
     def save(self, *args, **kwargs):
         super(SyncLogSQL, self).save(*args, **kwargs)
@@ -594,6 +631,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
     device_id = StringProperty()
 
     _purged_cases = None
+    _case_ids_checksum = None
 
     @property
     def purged_cases(self):
@@ -613,6 +651,42 @@ class SimplifiedSyncLog(AbstractSyncLog):
     def get_footprint_of_cases_on_phone(self):
         return list(self.case_ids_on_phone)
 
+    def get_state_hash(self):
+        return CaseStateHash(self._get_case_ids_checksum().hexdigest())
+
+    def set_case_ids_on_phone(self, case_ids):
+        self.case_ids_on_phone = case_ids
+        self._case_ids_checksum = None
+
+    def _get_case_ids_checksum(self):
+        """
+        Running checksum of case_ids_on_phone. It is computed on first use
+        and then kept up to date as cases are added and removed, so case ids
+        must only be changed through set_case_ids_on_phone(),
+        _add_case_on_phone() and _remove_case_on_phone().
+
+        It is not saved: once a sync log has been loaded there is no way to
+        tell whether its case ids were changed without updating a stored
+        checksum.
+        """
+        if self._case_ids_checksum is None:
+            self._case_ids_checksum = Checksum(self.case_ids_on_phone)
+        return self._case_ids_checksum
+
+    def _add_case_on_phone(self, case_id):
+        if case_id not in self.case_ids_on_phone:
+            self.case_ids_on_phone.add(case_id)
+            if self._case_ids_checksum is not None:
+                self._case_ids_checksum.add(case_id)
+
+    def _remove_case_on_phone(self, case_id):
+        """
+        :raises: KeyError if the case is not on the phone
+        """
+        self.case_ids_on_phone.remove(case_id)
+        if self._case_ids_checksum is not None:
+            self._case_ids_checksum.remove(case_id)
+
     @property
     def primary_case_ids(self):
         return self.case_ids_on_phone - self.dependent_case_ids_on_phone
@@ -753,7 +827,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         self._validate_case_removal(to_remove, all_to_remove, deleted_indices, checked_case_id, xform_id)
 
         try:
-            self.case_ids_on_phone.remove(to_remove)
+            self._remove_case_on_phone(to_remove)
         except KeyError:
             should_fail_softly = not xform_id or _domain_has_legacy_toggle_set()
             if should_fail_softly:
@@ -789,7 +863,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         #                 "expected {} in {} but wasn't".format(index, all_to_remove))
 
     def _add_primary_case(self, case_id):
-        self.case_ids_on_phone.add(case_id)
+        self._add_case_on_phone(case_id)
         if case_id in self.dependent_case_ids_on_phone:
             self.dependent_case_ids_on_phone.remove(case_id)
 
@@ -806,7 +880,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         self.extension_index_tree.set_index(index.case_id, index.identifier, index.referenced_id)
 
         if index.referenced_id not in self.case_ids_on_phone:
-            self.case_ids_on_phone.add(index.referenced_id)
+            self._add_case_on_phone(index.referenced_id)
             self.dependent_case_ids_on_phone.add(index.referenced_id)
 
         case_child_indices = [idx for idx in case_update.indices_to_add
@@ -820,7 +894,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         assert index.relationship == const.CASE_INDEX_CHILD
         self.index_tree.set_index(index.case_id, index.identifier, index.referenced_id)
         if index.referenced_id not in self.case_ids_on_phone:
-            self.case_ids_on_phone.add(index.referenced_id)
+            self._add_case_on_phone(index.referenced_id)
             self.dependent_case_ids_on_phone.add(index.referenced_id)
 
     def _delete_index(self, index):
@@ -936,7 +1010,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
             _get_logger().debug('case {} is NOT live.'.format(update.case_id))
             if update.has_extension_indices_to_add():
                 # non-live cases with extension indices should be added and processed
-                self.case_ids_on_phone.add(update.case_id)
+                self._add_case_on_phone(update.case_id)
                 for index in update.indices_to_add:
                     self._add_index(index, update)
                     made_changes = True
@@ -988,7 +1062,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         return [CaseState(case_id=id) for id in self.case_ids_on_phone]
 
     def test_only_clear_cases_on_phone(self):
-        self.case_ids_on_phone = set()
+        self.set_case_ids_on_phone(set())
 
     def test_only_get_dependent_cases_on_phone(self):
         # hack - just for tests
@@ -1021,6 +1095,8 @@ def get_properly_wrapped_sync_log(doc_id):
 
 
 def properly_wrap_sync_log(doc, synclog_sql=None):
+    if synclog_sql is not None and synclog_sql.case_state is not None:
+        doc = dict(doc, **decode_case_state(synclog_sql.case_state))
     synclog = SimplifiedSyncLog.wrap(doc)
     if synclog_sql:
         synclog._synclog_sql = synclog_sql
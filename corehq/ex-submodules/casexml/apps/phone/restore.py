@@ -1,6 +1,5 @@
 import logging
 import os
-import shutil
 import tempfile
 import uuid
 from io import BytesIO
@@ -98,24 +97,41 @@ class StockSettings(object):
 
 
 class RestoreContent(object):
+    """Writes a restore response to a temporary file in a single pass
+
+    The start tag is written up front. When the item count is requested a
+    fixed-width slot is reserved for it in the start tag, and the count is
+    written into that slot once all elements have been appended, so the body
+    never needs to be copied after it has been written.
+    """
     start_tag_template = (
         b'<OpenRosaResponse xmlns="http://openrosa.org/http/response"%(items)s>'
         b'<message nature="%(nature)s">Successfully restored account %(username)s!</message>'
     )
     items_template = b' items="%s"'
+    # maximum number of digits in the item count
+    items_width = 10
     closing_tag = b'</OpenRosaResponse>'
 
     def __init__(self, username=None, items=False):
         self.username = username
         self.items = items
         self.num_items = 0
+        self.response_body = None
 
     def __enter__(self):
         self.response_body = tempfile.TemporaryFile('w+b')
+        try:
+            self._write_start_tag()
+        except Exception:
+            self.response_body.close()
+            raise
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.response_body.close()
+        # response_body is None if it was handed over by get_fileobj
+        if self.response_body is not None:
+            self.response_body.close()
 
     def append(self, xml_element):
         self.num_items += 1
@@ -130,27 +146,38 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
-    def _write_to_file(self, fileobj):
-        # Add 1 to num_items to account for message element
-        items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
-        fileobj.write(self.start_tag_template % {
-            b"items": items,
+    def _write_start_tag(self):
+        self._items_offset = self.start_tag_template.index(b'%(items)s')
+        self.response_body.write(self.start_tag_template % {
+            b"items": self._get_items_attribute(0) if self.items else b'',
             b"username": self.username.encode("utf8"),
             b"nature": ResponseNature.OTA_RESTORE_SUCCESS.encode("utf8"),
         })
 
-        self.response_body.seek(0)
-        shutil.copyfileobj(self.response_body, fileobj)
-
-        fileobj.write(self.closing_tag)
+    def _get_items_attribute(self, num_items):
+        """The items attribute, padded with whitespace to fill the reserved slot"""
+        slot_length = len(self.items_template % (b'0' * self.items_width))
+        items = self.items_template % ('%s' % num_items).encode('utf-8')
+        if len(items) > slot_length:
+            raise ValueError("Too many items in restore: {}".format(num_items))
+        return items.ljust(slot_length)
 
     def get_fileobj(self):
-        fileobj = tempfile.TemporaryFile('w+b')
+        """Finish the response and return its file
+
+        The caller is responsible for closing the returned file. This can
+        only be called once.
+        """
+        fileobj, self.response_body = self.response_body, None
         try:
-            self._write_to_file(fileobj)
+            fileobj.write(self.closing_tag)
+            if self.items:
+                # Add 1 to num_items to account for message element
+                fileobj.seek(self._items_offset)
+                fileobj.write(self._get_items_attribute(self.num_items + 1))
             fileobj.seek(0)
             return fileobj
-        except:
+        except Exception:
             fileobj.close()
             raise
 
@@ -216,7 +243,12 @@ class AsyncRestoreResponse(object):
 
 class CachedResponse(object):
 
-    def __init__(self, name):
+    def __init__(self, name, parent_id=None):
+        """
+        :param name: Blob key of the cached content.
+        :param parent_id: Parent id of the cached blob. Required to
+        read compressed content.
+        """
         if name and name.startswith("restore-response-"):
             # Name template was 'restore-response-{}.xml' before new
             # blob metadata API was implemented. This can be removed
@@ -225,16 +257,27 @@ class CachedResponse(object):
             # '_default' is the bucket name from the old blob db API.
             name = "_default/" + name
         self.name = name
+        self.parent_id = parent_id
+
+    @property
+    def is_compressed(self):
+        return bool(self.name) and self.name.endswith(".gz")
 
     @classmethod
-    def save_for_later(cls, fileobj, timeout, domain, restore_user_id):
+    def save_for_later(cls, fileobj, timeout, domain, restore_user_id, compress=False):
         """Save restore response for later
 
         :param fileobj: A file-like object.
         :param timeout: Minimum content expiration in seconds.
+        :param compress: Store the content gzip compressed.
         :returns: A new `CachedResponse` pointing to the saved content.
         """
         name = 'restore-{}.xml'.format(uuid4().hex)
+        blob_meta_args = {}
+        if compress:
+            name += '.gz'
+            # the blob db compresses content with a negative compressed length
+            blob_meta_args['compressed_length'] = -1
         get_blob_db().put(
             NoClose(fileobj),
             domain=domain,
@@ -242,8 +285,9 @@ class CachedResponse(object):
             type_code=CODES.restore,
             key=name,
             timeout=max(timeout // 60, 60),
+            **blob_meta_args
         )
-        return cls(name)
+        return cls(name, restore_user_id)
 
     def __bool__(self):
         try:
@@ -261,10 +305,24 @@ class CachedResponse(object):
         try:
             value = self._fileobj
         except AttributeError:
-            value = get_blob_db().get(key=self.name, type_code=CODES.restore) if self.name else None
+            if not self.name:
+                value = None
+            elif self.is_compressed:
+                value = self._get_compressed_blob()
+            else:
+                value = get_blob_db().get(key=self.name, type_code=CODES.restore)
             self._fileobj = value
         return value
 
+    def _get_compressed_blob(self):
+        # content is only decompressed when it is fetched with its metadata
+        db = get_blob_db()
+        try:
+            meta = db.metadb.get(parent_id=self.parent_id, key=self.name)
+        except db.metadb.DoesNotExist:
+            raise NotFound(self.name)
+        return db.get(meta=meta)
+
     def get_http_response(self):
         file = self.as_file()
         headers = {'Content-Length': file.content_length}
@@ -612,7 +670,7 @@ class RestoreConfig(object):
 
         cache_payload_path = self.restore_payload_path_cache.get_value()
 
-        return CachedResponse(cache_payload_path)
+        return CachedResponse(cache_payload_path, self.restore_user.user_id)
 
     def generate_payload(self, async_task=None):
         if async_task:
@@ -669,7 +727,7 @@ class RestoreConfig(object):
             if isinstance(response_or_name, bytes):
                 response_or_name = response_or_name.decode('utf-8')
             if isinstance(response_or_name, str):
-                response = CachedResponse(response_or_name)
+                response = CachedResponse(response_or_name, self.restore_user.user_id)
             else:
                 response = response_or_name
         except TimeoutError:
@@ -722,6 +780,7 @@ class RestoreConfig(object):
                 self.cache_timeout,
                 self.domain,
                 self.restore_user.user_id,
+                compress=settings.COMPRESS_CACHED_RESTORES,
             )
             self.restore_payload_path_cache.set_value(response.name, self.cache_timeout)
             return response
@@ -0,0 +1,57 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.compact_case_state import (
+    CASE_STATE_FIELDS,
+    decode_case_state,
+    encode_case_state,
+    strip_case_state,
+)
+
+
+class CompactCaseStateTest(SimpleTestCase):
+
+    def _doc(self):
+        case_ids = [str(uuid.uuid4()) for i in range(5)]
+        return {
+            'doc_type': 'SimplifiedSyncLog',
+            'case_ids_on_phone': case_ids + ['not-a-uuid', case_ids[0].upper(), uuid.uuid4().hex],
+            'dependent_case_ids_on_phone': case_ids[:2],
+            'closed_cases': [],
+            'index_tree': {
+                'doc_type': 'IndexTree',
+                'indices': {
+                    case_ids[2]: {'parent': case_ids[0], 'host': 'not-a-uuid'},
+                    'not-a-uuid': {'parent': case_ids[1]},
+                    case_ids[3]: {},
+                },
+            },
+            'extension_index_tree': {'doc_type': 'IndexTree', 'indices': {}},
+        }
+
+    def test_round_trip(self):
+        doc = self._doc()
+        state = decode_case_state(encode_case_state(doc))
+        self.assertEqual(set(CASE_STATE_FIELDS), set(state))
+        for field in ('case_ids_on_phone', 'dependent_case_ids_on_phone', 'closed_cases'):
+            self.assertEqual(sorted(doc[field]), sorted(state[field]))
+        self.assertEqual(doc['index_tree'], state['index_tree'])
+        self.assertEqual(doc['extension_index_tree'], state['extension_index_tree'])
+
+    def test_missing_fields(self):
+        state = decode_case_state(encode_case_state({}))
+        self.assertEqual([], state['case_ids_on_phone'])
+        self.assertEqual({}, state['index_tree']['indices'])
+
+    def test_smaller_than_json(self):
+        doc = self._doc()
+        doc['case_ids_on_phone'] = [str(uuid.uuid4()) for i in range(1000)]
+        self.assertLess(len(encode_case_state(doc)), len(str(doc)) / 2)
+
+    def test_strip_case_state(self):
+        self.assertEqual({'doc_type': 'SimplifiedSyncLog'}, strip_case_state(self._doc()))
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            decode_case_state(b'\x00' + encode_case_state({})[1:])
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.data_providers.case.livequery import prefetch_batches
+from corehq.util.timer import TimingContext
+
+
+class PrefetchBatchesTest(SimpleTestCase):
+
+    def _consume(self, batches, queue_depth=2):
+        timing_context = TimingContext('restore')
+        with timing_context, timing_context('compile_response'):
+            result = list(prefetch_batches(timing_context, batches, queue_depth))
+        return result, timing_context
+
+    def test_batches_in_order(self):
+        batches = [[1, 2], [3], [4, 5, 6]]
+        result, timing_context = self._consume(iter(batches), queue_depth=1)
+        self.assertEqual(batches, result)
+        compile_timer, = timing_context.root.subs
+        self.assertEqual(
+            ['fetch_cases (2 cases)', 'fetch_cases (1 cases)', 'fetch_cases (3 cases)'],
+            [timer.name for timer in compile_timer.subs if timer.name.startswith('fetch_cases')]
+        )
+        self.assertEqual(4, len([timer for timer in compile_timer.subs if timer.name == 'wait_for_cases']))
+
+    def test_producer_error(self):
+        def batches():
+            yield [1]
+            raise ValueError('fetch failed')
+
+        with self.assertRaisesRegex(ValueError, 'fetch failed'):
+            self._consume(batches())
+
+    def test_consumer_stops_early(self):
+        produced = []
+
+        def batches():
+            for i in range(100):
+                produced.append(i)
+                yield [i]
+
+        timing_context = TimingContext('restore')
+        with timing_context:
+            prefetched = prefetch_batches(timing_context, batches(), 2)
+            self.assertEqual([0], next(prefetched))
+            prefetched.close()
+        self.assertLess(len(produced), 100)
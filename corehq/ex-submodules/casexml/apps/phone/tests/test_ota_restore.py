@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 import os
 from casexml.apps.phone.tests.utils import deprecated_generate_restore_payload
 from casexml.apps.phone.utils import get_restore_config
@@ -131,6 +131,21 @@ class OtaRestoreTest(BaseOtaRestoreTest):
         self.assertIsInstance(restore_config_cached.get_payload(), CachedResponse)
         self.assertNotIsInstance(restore_config_overwrite.get_payload(), CachedResponse)
 
+    @override_settings(COMPRESS_CACHED_RESTORES=True)
+    def testCompressedCache(self):
+        restore_config = get_restore_config(
+            self.project, self.restore_user, items=True, force_cache=True
+        )
+        restore_config_cached = get_restore_config(
+            self.project, self.restore_user, items=True
+        )
+        original_payload = restore_config.get_payload().as_string()
+        cached_response = restore_config_cached.get_payload()
+        self.assertIsInstance(cached_response, CachedResponse)
+        self.assertTrue(cached_response.is_compressed)
+        self.assertEqual(len(original_payload), cached_response.as_file().content_length)
+        self.assertEqual(original_payload, cached_response.as_string())
+
     def testDifferentDeviceCache(self):
         '''
         Ensure that if restore is coming from different device, do not return cached response
@@ -46,7 +46,8 @@ class OtaV3RestoreTest(TestCase):
 class TestRestoreContent(SimpleTestCase):
 
     def _expected(self, username, body, items=None):
-        items_text = (' items="%s"' % items) if items is not None else ''
+        # the items attribute is padded to a fixed width
+        items_text = (' items="%s"' % items).ljust(19) if items is not None else ''
         return (
             '<OpenRosaResponse xmlns="http://openrosa.org/http/response"%(items)s>'
             '<message nature="ota_restore_success">Successfully restored account %(username)s!</message>'
@@ -75,3 +76,20 @@ class TestRestoreContent(SimpleTestCase):
             response.append(body.encode('utf-8'))
             with response.get_fileobj() as fileobj:
                 self.assertEqual(expected, fileobj.read().decode('utf-8'))
+
+    def test_items_multiple_elements(self):
+        user = 'user1'
+        body = '<elem>data0</elem><elem>data1</elem>'
+        expected = self._expected(user, body, items=3)
+        with RestoreContent(user, True) as response:
+            response.extend([b'<elem>data0</elem>', b'<elem>data1</elem>'])
+            with response.get_fileobj() as fileobj:
+                self.assertEqual(expected, fileobj.read().decode('utf-8'))
+
+    def test_fileobj_outlives_content(self):
+        with RestoreContent('user1', True) as response:
+            response.append(b'<elem>data0</elem>')
+            fileobj = response.get_fileobj()
+        with fileobj:
+            content = fileobj.read().decode('utf-8')
+        self.assertEqual(self._expected('user1', '<elem>data0</elem>', items=2), content)
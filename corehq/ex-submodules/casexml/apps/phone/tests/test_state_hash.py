@@ -1,10 +1,11 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.test.utils import override_settings
 from casexml.apps.case.mock import CaseBlock
-from casexml.apps.phone.checksum import EMPTY_HASH, CaseStateHash
+from casexml.apps.phone.checksum import EMPTY_HASH, CaseStateHash, Checksum
 from casexml.apps.case.xml import V1
 from casexml.apps.case.tests.util import delete_all_sync_logs, delete_all_xforms, delete_all_cases
 from casexml.apps.phone.exceptions import BadStateException
+from casexml.apps.phone.models import IndexTree, SimplifiedSyncLog
 from casexml.apps.phone.tests.utils import create_restore_user
 from casexml.apps.phone.utils import MockDevice
 from corehq.apps.domain.models import Domain
@@ -84,3 +85,42 @@ class StateHashTest(TestCase):
 @use_sql_backend
 class StateHashTestSQL(StateHashTest):
     pass
+
+
+class RunningChecksumTest(SimpleTestCase):
+
+    def _full_hash(self, sync_log):
+        return CaseStateHash(Checksum(list(sync_log.case_ids_on_phone)).hexdigest())
+
+    def test_purge_updates_checksum(self):
+        sync_log = SimplifiedSyncLog(
+            index_tree=IndexTree(indices={'child': {'parent': 'parent'}}),
+            case_ids_on_phone={'parent', 'child', 'other'},
+        )
+        self.assertEqual(self._full_hash(sync_log), sync_log.get_state_hash())
+
+        sync_log.purge('child')
+        self.assertEqual({'other'}, sync_log.case_ids_on_phone)
+        self.assertEqual(self._full_hash(sync_log), sync_log.get_state_hash())
+
+    def test_set_case_ids_on_phone(self):
+        sync_log = SimplifiedSyncLog()
+        self.assertEqual(CaseStateHash(EMPTY_HASH), sync_log.get_state_hash())
+        sync_log.set_case_ids_on_phone({'abc123', '123abc'})
+        self.assertEqual(CaseStateHash('409c5c597fa2c2a693b769f0d2ad432b'), sync_log.get_state_hash())
+
+    def test_same_size_changes(self):
+        sync_log = SimplifiedSyncLog(case_ids_on_phone={'abc123', 'xyz789'})
+        sync_log.get_state_hash()
+        sync_log._remove_case_on_phone('xyz789')
+        sync_log._add_case_on_phone('123abc')
+        self.assertEqual(CaseStateHash('409c5c597fa2c2a693b769f0d2ad432b'), sync_log.get_state_hash())
+
+    def test_checksum_is_not_saved(self):
+        sync_log = SimplifiedSyncLog(case_ids_on_phone={'abc123'})
+        sync_log.get_state_hash()
+        doc = sync_log.to_json()
+        # case ids changed by code that doesn't maintain a checksum
+        doc['case_ids_on_phone'] = ['123abc']
+        loaded = SimplifiedSyncLog.wrap(doc)
+        self.assertEqual(self._full_hash(loaded), loaded.get_state_hash())
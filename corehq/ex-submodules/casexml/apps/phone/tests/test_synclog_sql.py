@@ -1,8 +1,13 @@
 from datetime import datetime
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from casexml.apps.phone.models import SyncLogSQL, SimplifiedSyncLog
+from casexml.apps.phone.models import (
+    IndexTree,
+    SimplifiedSyncLog,
+    SyncLogSQL,
+    get_properly_wrapped_sync_log,
+)
 
 
 class SyncLogQueryTest(TestCase):
@@ -28,3 +33,31 @@ class SyncLogQueryTest(TestCase):
         with self.assertNumQueries(1):
             # previously this was 2 queries, fetch + update
             synclog.save()
+
+    @override_settings(SYNCLOG_COMPACT_CASE_STATE=True)
+    def test_compact_case_state(self):
+        case_id = '4c8b8b5e-3a35-4d53-9f0c-5d6a3e8d3c0b'
+        synclog = SimplifiedSyncLog(
+            domain='test',
+            user_id='user1',
+            date=datetime(2015, 7, 1, 0, 0),
+            case_ids_on_phone={case_id, 'child-case'},
+            dependent_case_ids_on_phone={case_id},
+            index_tree=IndexTree(indices={'child-case': {'parent': case_id}}),
+        )
+        synclog.save()
+
+        synclog_sql = SyncLogSQL.objects.get(synclog_id=synclog._id)
+        self.assertIsNotNone(synclog_sql.case_state)
+        self.assertNotIn('case_ids_on_phone', synclog_sql.doc)
+
+        loaded = get_properly_wrapped_sync_log(synclog._id)
+        self.assertEqual({case_id, 'child-case'}, loaded.case_ids_on_phone)
+        self.assertEqual({case_id}, loaded.dependent_case_ids_on_phone)
+        self.assertEqual({'child-case': {'parent': case_id}}, loaded.index_tree.indices)
+
+        with override_settings(SYNCLOG_COMPACT_CASE_STATE=False):
+            loaded.save()
+        synclog_sql = SyncLogSQL.objects.get(synclog_id=synclog._id)
+        self.assertIsNone(synclog_sql.case_state)
+        self.assertEqual({case_id, 'child-case'}, get_properly_wrapped_sync_log(synclog._id).case_ids_on_phone)
@@ -115,6 +115,13 @@ def clear_fixture_cache(domain, bucket_prefix):
     get_blob_db().delete(key=key)
 
 
+def app_has_changed(last_sync, app_id):
+    """Whether the restore is for a different app build than the last sync"""
+    return (last_sync and last_sync.build_id is not None
+            and app_id is not None
+            and app_id != last_sync.build_id)
+
+
 def _record_datadog_metric(name, cache_key):
     metrics_counter('commcare.fixture.{}'.format(name), tags={
         'cache_key': cache_key,
@@ -37,6 +37,9 @@ class ChangeMeta(jsonobject.JsonObject):
     # track of retry attempts
     attempts = jsonobject.IntegerProperty(default=0)
 
+    # names of the document properties changed by this change, if known
+    modified_properties = DefaultProperty()
+
 
 class Change(object):
     """
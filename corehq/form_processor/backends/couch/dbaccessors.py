@@ -20,6 +20,7 @@ from corehq.apps.hqcase.dbaccessors import (
     get_closed_case_ids,
     get_case_ids_in_domain_by_owner,
     get_cases_in_domain_by_external_id,
+    get_cases_in_domain_by_external_ids,
     get_deleted_case_ids_by_owner,
     get_all_case_owner_ids)
 from corehq.apps.hqcase.utils import get_case_by_domain_hq_user_id
@@ -270,6 +271,15 @@ class CaseAccessorCouch(AbstractCaseAccessor):
             return [case for case in cases if case.type == case_type]
         return cases
 
+    @staticmethod
+    def get_cases_by_external_ids(domain, external_ids, case_type=None):
+        if not external_ids:
+            return []
+        cases = get_cases_in_domain_by_external_ids(domain, external_ids)
+        if case_type:
+            return [case for case in cases if case.type == case_type]
+        return cases
+
     @staticmethod
     def soft_delete_cases(domain, case_ids, deletion_date=None, deletion_id=None):
         return _soft_delete(CommCareCase.get_db(), case_ids, deletion_date, deletion_id)
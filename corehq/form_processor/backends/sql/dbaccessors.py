@@ -4,7 +4,7 @@ import logging
 import operator
 import struct
 from abc import ABCMeta, abstractmethod, abstractproperty
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from io import BytesIO
 from itertools import groupby
@@ -18,6 +18,7 @@ from django.db.models.functions import Concat, Greatest
 
 import csiphash
 from ddtrace import tracer
+from django_bulk_update.helper import bulk_update as bulk_update_helper
 
 from casexml.apps.case.xform import get_case_updates
 from dimagi.utils.chunked import chunked
@@ -1008,14 +1009,7 @@ class CaseAccessorSQL(AbstractCaseAccessor):
 
         attachments_to_save = case.get_tracked_models_to_create(CaseAttachmentSQL)
         attachment_ids_to_delete = [att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL)]
-        for attachment in attachments_to_save:
-            if attachment.is_saved():
-                raise CaseSaveError(
-                    """Updating attachments is not supported.
-                    case id={}, attachment id={}""".format(
-                        case.case_id, attachment.attachment_id
-                    )
-                )
+        _check_attachments_to_save(case, attachments_to_save)
 
         try:
             with transaction.atomic(using=case.db, savepoint=False):
@@ -1042,6 +1036,21 @@ class CaseAccessorSQL(AbstractCaseAccessor):
         except DatabaseError as e:
             raise CaseSaveError(e)
 
+    @staticmethod
+    def save_cases(cases):
+        """Save multiple cases along with their tracked models
+
+        Equivalent to calling ``save_case`` for each case, but new and updated
+        rows are written with one query per model and shard database rather
+        than one query per row.
+        """
+        cases_by_db = defaultdict(list)
+        for case in cases:
+            cases_by_db[case.db].append(case)
+
+        for db, db_cases in cases_by_db.items():
+            _save_cases_in_db(db, db_cases)
+
     @staticmethod
     def get_open_case_ids_for_owner(domain, owner_id):
         return CaseAccessorSQL._get_case_ids_in_domain(domain, owner_ids=[owner_id], is_closed=False)
@@ -1154,6 +1163,19 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             [domain, external_id, case_type]
         ))
 
+    @staticmethod
+    def get_cases_by_external_ids(domain, external_ids, case_type=None):
+        if not external_ids:
+            return []
+        cases = []
+        for db_name in get_db_aliases_for_partitioned_query():
+            query = CommCareCaseSQL.objects.using(db_name).filter(
+                domain=domain, external_id__in=external_ids, deleted=False)
+            if case_type:
+                query = query.filter(type=case_type)
+            cases.extend(query)
+        return cases
+
     @staticmethod
     def get_case_by_domain_hq_user_id(domain, user_id, case_type):
         try:
@@ -1516,3 +1538,66 @@ def _attach_prefetch_models(objects_by_id, prefetched_models, link_field_name, c
     for obj_id in unseen:
         obj = objects_by_id[obj_id]
         setattr(obj, cached_attrib_name, [])
+
+
+def _check_attachments_to_save(case, attachments_to_save):
+    for attachment in attachments_to_save:
+        if attachment.is_saved():
+            raise CaseSaveError(
+                """Updating attachments is not supported.
+                case id={}, attachment id={}""".format(
+                    case.case_id, attachment.attachment_id
+                )
+            )
+
+
+def _save_cases_in_db(db, cases):
+    to_create = defaultdict(list)
+    to_update = defaultdict(list)
+    ids_to_delete = defaultdict(list)
+
+    def add(model_class, models):
+        for model in models:
+            (to_update if model.is_saved() else to_create)[model_class].append(model)
+
+    for case in cases:
+        add(CommCareCaseSQL, [case])
+        add(CaseTransaction, case.get_live_tracked_models(CaseTransaction))
+
+        indices = case.get_live_tracked_models(CommCareCaseIndexSQL)
+        for index in indices:
+            index.domain = case.domain  # ensure domain is set on indices
+        add(CommCareCaseIndexSQL, indices)
+
+        attachments = case.get_tracked_models_to_create(CaseAttachmentSQL)
+        _check_attachments_to_save(case, attachments)
+        to_create[CaseAttachmentSQL].extend(attachments)
+
+        for model_class in (CommCareCaseIndexSQL, CaseAttachmentSQL):
+            ids_to_delete[model_class].extend(
+                model.id for model in case.get_tracked_models_to_delete(model_class)
+            )
+
+    update_fields = {
+        # prevent changing identifier
+        CommCareCaseIndexSQL: ['referenced_id', 'referenced_type', 'relationship_id'],
+    }
+    try:
+        with transaction.atomic(using=db, savepoint=False):
+            # cases first so that related rows never reference a missing case
+            for model_class in (CommCareCaseSQL, CaseTransaction, CommCareCaseIndexSQL, CaseAttachmentSQL):
+                if to_create[model_class]:
+                    model_class.objects.using(db).bulk_create(to_create[model_class])
+                if to_update[model_class]:
+                    bulk_update_helper(
+                        to_update[model_class],
+                        update_fields=update_fields.get(model_class),
+                        using=db,
+                    )
+                if ids_to_delete[model_class]:
+                    model_class.objects.using(db).filter(id__in=ids_to_delete[model_class]).delete()
+
+            for case in cases:
+                case.clear_tracked_models()
+    except DatabaseError as e:
+        raise CaseSaveError(e)
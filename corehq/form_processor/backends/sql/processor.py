@@ -10,6 +10,7 @@ from lxml import etree
 
 from casexml.apps.case import const
 from casexml.apps.case.xform import get_case_updates
+from corehq.apps.change_feed.producer import producer
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.backends.sql.dbaccessors import (
     FormAccessorSQL, CaseAccessorSQL, LedgerAccessorSQL
@@ -21,6 +22,7 @@ from corehq.form_processor.interfaces.processor import CaseUpdateMetadata
 from corehq.form_processor.models import (
     XFormInstanceSQL, CaseTransaction,
     CommCareCaseSQL, FormEditRebuild, Attachment, XFormOperationSQL)
+from corehq.form_processor.signals import sql_case_post_save
 from corehq.form_processor.utils import convert_xform_to_json, extract_meta_instance_id, extract_meta_user_id
 from corehq.util.metrics.load_counters import case_load_counter
 from corehq import toggles
@@ -121,8 +123,7 @@ class FormProcessorSQL(object):
 
                 FormAccessorSQL.save_new_form(processed_forms.submitted)
                 if cases:
-                    for case in cases:
-                        CaseAccessorSQL.save_case(case)
+                    CaseAccessorSQL.save_cases(cases)
 
                 if stock_result:
                     ledgers_to_save = stock_result.models_to_save
@@ -132,9 +133,10 @@ class FormProcessorSQL(object):
                 sort_submissions = toggles.SORT_OUT_OF_ORDER_FORM_SUBMISSIONS_SQL.enabled(
                     processed_forms.submitted.domain, toggles.NAMESPACE_DOMAIN)
                 if sort_submissions:
-                    for case in cases:
-                        if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary():
-                            CaseAccessorSQL.save_case(case)
+                    CaseAccessorSQL.save_cases([
+                        case for case in cases
+                        if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary()
+                    ])
         except DatabaseError:
             for model in all_models:
                 setattr(model, model._meta.pk.attname, None)
@@ -149,14 +151,18 @@ class FormProcessorSQL(object):
 
     @staticmethod
     def publish_changes_to_kafka(processed_forms, cases, stock_result):
-        publish_form_saved(processed_forms.submitted)
         cases = cases or []
-        for case in cases:
-            publish_case_saved(case)
+        with producer.batch():
+            publish_form_saved(processed_forms.submitted)
+            for case in cases:
+                publish_case_saved(case, send_post_save_signal=False)
 
-        if stock_result:
-            for ledger in stock_result.models_to_save:
-                publish_ledger_v2_saved(ledger)
+            if stock_result:
+                for ledger in stock_result.models_to_save:
+                    publish_ledger_v2_saved(ledger)
+
+        for case in cases:
+            sql_case_post_save.send(case.__class__, case=case)
 
     @classmethod
     def apply_deprecation(cls, existing_xform, new_xform):
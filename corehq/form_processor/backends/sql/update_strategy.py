@@ -2,6 +2,7 @@ import logging
 import sys
 from functools import cmp_to_key
 
+from django.conf import settings
 from django.utils.translation import ugettext as _
 
 from ddtrace import tracer
@@ -67,6 +68,15 @@ def _convert_type_check_length(property_name, value):
         raise CaseValueError('Error processing case update: Field: {}, Error: {}'.format(property_name, str(e)))
 
 
+# case attributes that case updates can change, see _track_modified_properties
+TRACKED_CASE_ATTRIBUTES = list(KNOWN_PROPERTIES) + [
+    'opened_by', 'modified_on', 'modified_by', 'closed', 'closed_on', 'closed_by', 'location_id',
+]
+# properties of the serialized case that change with every form
+ALWAYS_MODIFIED_CASE_PROPERTIES = frozenset(['server_modified_on', 'xform_ids', 'actions'])
+PROPERTY_ONLY_ACTIONS = (const.CASE_ACTION_UPDATE, const.CASE_ACTION_CLOSE)
+
+
 class SqlCaseUpdateStrategy(UpdateStrategy):
     case_implementation_class = CommCareCaseSQL
 
@@ -95,8 +105,42 @@ class SqlCaseUpdateStrategy(UpdateStrategy):
             self.case.track_update(transaction)
 
     def update_from_case_update(self, case_update, xformdoc, other_forms=None):
+        track_modified_properties = settings.UCR_SKIP_UNAFFECTED_CHANGES
+        if track_modified_properties:
+            properties_before = self._get_property_snapshot()
         self._apply_case_update(case_update, xformdoc)
         self.add_transaction_for_form(self.case, case_update, xformdoc)
+        if track_modified_properties:
+            self._track_modified_properties(case_update, properties_before)
+
+    def _get_property_snapshot(self):
+        snapshot = {prop: getattr(self.case, prop) for prop in TRACKED_CASE_ATTRIBUTES}
+        snapshot.update(self.case.case_json)
+        return snapshot
+
+    def _track_modified_properties(self, case_update, properties_before):
+        """
+        Keep track of the names of the properties changed by case updates so
+        that change consumers can skip work for changes that don't affect
+        them. ``modified_properties`` is ``None`` when the changes can't be
+        described by a list of property names (e.g. creates or index changes).
+        """
+        modified_properties = getattr(self.case, 'modified_properties', set())
+        if modified_properties is None:
+            return
+        if any(action.action_type_slug not in PROPERTY_ONLY_ACTIONS for action in case_update.actions):
+            self.case.modified_properties = None
+            return
+
+        properties_after = self._get_property_snapshot()
+        modified_properties = modified_properties | ALWAYS_MODIFIED_CASE_PROPERTIES | {
+            prop for prop in set(properties_before) | set(properties_after)
+            if properties_before.get(prop) != properties_after.get(prop)
+        }
+        if 'modified_by' in modified_properties:
+            # serialized as user_id
+            modified_properties.add('user_id')
+        self.case.modified_properties = modified_properties
 
     @staticmethod
     def add_transaction_for_form(case, case_update, form):
@@ -251,6 +295,7 @@ class SqlCaseUpdateStrategy(UpdateStrategy):
         """
         Clear known case properties, and all dynamic properties
         """
+        self.case.modified_properties = None
         self.case.case_json = {}
         self.case.deleted = False
 
@@ -41,6 +41,7 @@ def publish_case_saved(case, send_post_save_signal=True):
 
 
 def change_meta_from_sql_case(case):
+    modified_properties = getattr(case, 'modified_properties', None)
     return ChangeMeta(
         document_id=case.case_id,
         data_source_type=data_sources.SOURCE_SQL,
@@ -49,6 +50,7 @@ def change_meta_from_sql_case(case):
         document_subtype=case.type,
         domain=case.domain,
         is_deletion=case.is_deleted,
+        modified_properties=sorted(modified_properties) if modified_properties is not None else None,
     )
 
 
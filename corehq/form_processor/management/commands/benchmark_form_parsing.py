@@ -0,0 +1,150 @@
+import random
+import timeit
+import tracemalloc
+import uuid
+
+from django.core.management import BaseCommand
+
+from corehq.form_processor.utils import (
+    adjust_datetimes,
+    convert_xform_to_adjusted_json,
+    convert_xform_to_json,
+)
+
+FORM_TEMPLATE = """<?xml version='1.0' ?>
+<data uiVersion="1" version="42" name="Household visit" xmlns:jrm="http://dev.commcarehq.org/jr/xforms"
+    xmlns="http://openrosa.org/formdesigner/benchmark-household-visit">
+    <visit_date>2019-03-04</visit_date>
+    <visit_time>2019-03-04T10:15:27.433+05:30</visit_time>
+    <village>Village {seed}</village>
+    <notes>
+    </notes>
+    <gps>18.5204303 73.8567437 560.0 10.0</gps>
+{members}
+    <n0:case case_id="{case_id}" date_modified="2019-03-04T10:21:02.122+05:30"
+        user_id="{user_id}" xmlns:n0="http://commcarehq.org/case/transaction/v2">
+        <n0:update>
+            <n0:member_count>{repeats}</n0:member_count>
+            <n0:last_visit>2019-03-04</n0:last_visit>
+        </n0:update>
+    </n0:case>
+    <n1:meta xmlns:n1="http://openrosa.org/jr/xforms">
+        <n1:deviceID>359872065437261</n1:deviceID>
+        <n1:timeStart>2019-03-04T10:12:44.207+05:30</n1:timeStart>
+        <n1:timeEnd>2019-03-04T10:21:02.122+05:30</n1:timeEnd>
+        <n1:username>worker</n1:username>
+        <n1:userID>{user_id}</n1:userID>
+        <n1:instanceID>{form_id}</n1:instanceID>
+        <n2:appVersion xmlns:n2="http://commcarehq.org/xforms">CommCare Android, version "2.44.3"</n2:appVersion>
+        <n1:location>18.5204303 73.8567437 560.0 10.0</n1:location>
+    </n1:meta>
+</data>"""
+
+MEMBER_TEMPLATE = """    <member ids="member_id" count="{count}">
+        <member_id>{case_id}</member_id>
+        <name>Member {index} नाम</name>
+        <dob>1987-11-{day:02d}</dob>
+        <last_seen>2019-02-{day:02d}T0{hour}:30:00.000Z</last_seen>
+        <sex>{sex}</sex>
+        <symptoms>fever cough</symptoms>
+        <vitals>
+            <weight>{weight}</weight>
+            <height/>
+            <measured_on>2019-03-04T10:1{hour}:00.000+05:30</measured_on>
+        </vitals>
+{questions}
+        <n0:case case_id="{case_id}" date_modified="2019-03-04T10:21:02.122+05:30"
+            user_id="{user_id}" xmlns:n0="http://commcarehq.org/case/transaction/v2">
+            <n0:create>
+                <n0:case_name>Member {index}</n0:case_name>
+                <n0:owner_id>{user_id}</n0:owner_id>
+                <n0:case_type>member</n0:case_type>
+            </n0:create>
+            <n0:index>
+                <n0:parent case_type="household">{parent_id}</n0:parent>
+            </n0:index>
+        </n0:case>
+    </member>"""
+
+
+def get_form_xml(repeats, questions, seed=0):
+    """Build the XML of a household visit form with ``repeats`` members,
+    each with ``questions`` extra questions, shaped like large real-world submissions
+    """
+    rand = random.Random(seed)
+    case_id = str(uuid.UUID(int=rand.getrandbits(128)))
+    user_id = uuid.UUID(int=rand.getrandbits(128)).hex
+    members = []
+    for index in range(repeats):
+        extra_questions = '\n'.join(
+            '        <q{0}>{1}</q{0}>'.format(i, rand.choice(['yes', 'no', '', '2019-01-01', str(i)]))
+            for i in range(questions)
+        )
+        members.append(MEMBER_TEMPLATE.format(
+            count=repeats,
+            case_id=uuid.UUID(int=rand.getrandbits(128)),
+            index=index,
+            day=rand.randint(1, 28),
+            hour=rand.randint(0, 9),
+            sex=rand.choice(['male', 'female']),
+            weight=rand.randint(3, 90),
+            questions=extra_questions,
+            user_id=user_id,
+            parent_id=case_id,
+        ))
+    return FORM_TEMPLATE.format(
+        seed=seed,
+        members='\n'.join(members),
+        case_id=case_id,
+        user_id=user_id,
+        form_id=uuid.UUID(int=rand.getrandbits(128)),
+        repeats=repeats,
+    ).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare converting large form submissions to json with xml2json followed by "
+        "adjust_datetimes against the single pass streaming converter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forms', type=int, default=20)
+        parser.add_argument('--repeats', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, forms, repeats, questions, repeat, **options):
+        converters = [
+            ('two pass', _convert_in_two_passes),
+            ('streaming', convert_xform_to_adjusted_json),
+        ]
+        for repeat_count in repeats:
+            corpus = [get_form_xml(repeat_count, questions, seed=i) for i in range(forms)]
+            for xml in corpus:
+                assert convert_xform_to_adjusted_json(xml) == _convert_in_two_passes(xml)
+
+            size = sum(len(xml) for xml in corpus) / forms
+            print("{} forms, {} repeats, {:.0f} KB per form".format(forms, repeat_count, size / 1024))
+            for name, convert in converters:
+                seconds = min(timeit.repeat(lambda: [convert(xml) for xml in corpus], number=1, repeat=repeat))
+                peak = _get_peak_python_memory(convert, corpus[0])
+                print("    {:<12} {:>10.0f} ms {:>10.1f} forms/s {:>10.0f} KB peak".format(
+                    name, seconds * 1000, forms / seconds, peak / 1024))
+
+
+def _convert_in_two_passes(xml):
+    return adjust_datetimes(convert_xform_to_json(xml))
+
+
+def _get_peak_python_memory(convert, xml):
+    """Peak memory allocated through Python while converting one form
+
+    Allocations made by libxml2 itself are not traced.
+    """
+    tracemalloc.start()
+    try:
+        convert(xml)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
@@ -160,8 +160,7 @@ def reprocess_form(form, save=True, lock_form=True):
                 ledgers_updated = {ledger.ledger_reference for ledger in ledgers if ledger.is_saved()}
 
                 if save:
-                    for case in cases:
-                        CaseAccessorSQL.save_case(case)
+                    CaseAccessorSQL.save_cases(cases)
                     LedgerAccessorSQL.save_ledger_values(ledgers)
                     FormAccessorSQL.update_form_problem_and_state(form)
                     FormProcessorSQL.publish_changes_to_kafka(ProcessedForms(form, None), cases, stock_result)
@@ -36,3 +36,6 @@ class AdjustDatetimesTest(SimpleTestCase):
             adjust_datetimes({'fake_datetime': fake_datetime}),
             {'fake_datetime': fake_datetime}
         )
+
+    def test_top_level_string(self):
+        self.assertEqual(adjust_datetimes('not a date'), 'not a date')
@@ -385,6 +385,82 @@ class CaseAccessorTestsSQL(TestCase):
         with self.assertRaises(CaseSaveError):
             CaseAccessorSQL.save_case(case)
 
+    def test_save_cases(self):
+        db = _new_case().db
+        cases = []
+        while len(cases) < 5:
+            case = _new_case()
+            if case.db == db:
+                cases.append(case)
+        for case in cases:
+            case.track_create(CaseTransaction(
+                case=case,
+                form_id=uuid.uuid4().hex,
+                server_date=datetime.utcnow(),
+                type=CaseTransaction.TYPE_FORM | CaseTransaction.TYPE_CASE_CREATE,
+            ))
+            case.track_create(CommCareCaseIndexSQL(
+                case=case,
+                identifier='parent',
+                referenced_type='mother',
+                referenced_id=uuid.uuid4().hex,
+                relationship_id=CommCareCaseIndexSQL.CHILD
+            ))
+            case.track_create(CaseAttachmentSQL(
+                case=case,
+                attachment_id=uuid.uuid4().hex,
+                name='doc',
+                content_type='text/xml',
+                blob_id=uuid.uuid4().hex,
+                md5='123',
+            ))
+
+        # one insert per table
+        with self.assertNumQueries(4, using=db):
+            CaseAccessorSQL.save_cases(cases)
+
+        for case in cases:
+            [index] = CaseAccessorSQL.get_indices(case.domain, case.case_id)
+            self.assertEqual(index.domain, DOMAIN)
+            self.assertEqual(1, len(CaseAccessorSQL.get_transactions(case.case_id)))
+            self.assertEqual(1, len(CaseAccessorSQL.get_attachments(case.case_id)))
+
+            case.owner_id = 'user2'
+            index.identifier = 'new_identifier'  # shouldn't get saved
+            index.referenced_type = 'new_type'
+            case.track_update(index)
+            [attachment] = CaseAccessorSQL.get_attachments(case.case_id)
+            case.track_delete(attachment)
+
+        # one update per table and one delete
+        with self.assertNumQueries(3, using=db):
+            CaseAccessorSQL.save_cases(cases)
+
+        for case in cases:
+            saved_case = CaseAccessorSQL.get_case(case.case_id)
+            self.assertEqual(saved_case.owner_id, 'user2')
+            [index] = CaseAccessorSQL.get_indices(case.domain, case.case_id)
+            self.assertEqual(index.identifier, 'parent')
+            self.assertEqual(index.referenced_type, 'new_type')
+            self.assertEqual([], CaseAccessorSQL.get_attachments(case.case_id))
+
+    def test_save_cases_update_attachment(self):
+        case = _create_case()
+        case.track_create(CaseAttachmentSQL(
+            case=case,
+            attachment_id=uuid.uuid4().hex,
+            name='doc',
+            content_type='text/xml',
+            blob_id='129',
+            md5='123',
+        ))
+        CaseAccessorSQL.save_cases([case])
+
+        [attachment] = CaseAccessorSQL.get_attachments(case.case_id)
+        case.track_create(attachment)
+        with self.assertRaises(CaseSaveError):
+            CaseAccessorSQL.save_cases([case])
+
     def test_get_case_ids_by_owners(self):
         case1 = _create_case(user_id="user1")
         case2 = _create_case(user_id="user1")
@@ -610,6 +686,25 @@ class CaseAccessorTestsSQL(TestCase):
 
         self.assertEqual([], CaseAccessorSQL.get_cases_by_external_id('d2', '123', case_type='t2'))
 
+    def test_get_cases_by_external_ids(self):
+        case1 = _create_case(domain=DOMAIN, case_type='t1')
+        case1.external_id = '123'
+        CaseAccessorSQL.save_case(case1)
+        case2 = _create_case(domain=DOMAIN, case_type='t2')
+        case2.external_id = '456'
+        CaseAccessorSQL.save_case(case2)
+        case3 = _create_case(domain=DOMAIN, case_type='t1')
+        case3.external_id = '789'
+        CaseAccessorSQL.save_case(case3)
+
+        cases = CaseAccessorSQL.get_cases_by_external_ids(DOMAIN, ['123', '456', 'abc'])
+        self.assertEqual({case.case_id for case in cases}, {case1.case_id, case2.case_id})
+
+        [case] = CaseAccessorSQL.get_cases_by_external_ids(DOMAIN, ['123', '456'], case_type='t1')
+        self.assertEqual(case.case_id, case1.case_id)
+
+        self.assertEqual([], CaseAccessorSQL.get_cases_by_external_ids('d2', ['123']))
+
     def test_closed_transactions(self):
         case = _create_case()
         _create_case_transactions(case)
@@ -742,6 +837,20 @@ def _create_case(domain=None, form_id=None, case_type=None, user_id=None, closed
     return CaseAccessorSQL.get_case(case_id)
 
 
+def _new_case():
+    utcnow = datetime.utcnow()
+    return CommCareCaseSQL(
+        case_id=uuid.uuid4().hex,
+        domain=DOMAIN,
+        type='',
+        owner_id='user1',
+        opened_on=utcnow,
+        modified_on=utcnow,
+        modified_by='user1',
+        server_modified_on=utcnow,
+    )
+
+
 def _create_case_with_index(referenced_case_id, identifier='parent', referenced_type='mother',
                             relationship_id=CommCareCaseIndexSQL.CHILD, case_is_deleted=False,
                             case_type='child'):
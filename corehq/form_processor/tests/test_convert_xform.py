@@ -0,0 +1,85 @@
+import os
+
+from django.test import SimpleTestCase
+
+from corehq.apps.tzmigration.test_utils import \
+    run_pre_and_post_timezone_migration
+from corehq.form_processor.management.commands.benchmark_form_parsing import \
+    get_form_xml
+from corehq.form_processor.utils import (
+    adjust_datetimes,
+    convert_xform_to_adjusted_json,
+    convert_xform_to_json,
+)
+from couchforms import XMLSyntaxError
+
+POSTS_DIR = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'ex-submodules', 'couchforms', 'tests', 'data', 'posts'
+)
+
+
+class ConvertXFormToAdjustedJsonTest(SimpleTestCase):
+    maxDiff = None
+
+    def assertConvertsLikeTwoPasses(self, xml):
+        self.assertEqual(
+            convert_xform_to_adjusted_json(xml),
+            adjust_datetimes(convert_xform_to_json(xml)),
+        )
+
+    @run_pre_and_post_timezone_migration
+    def test_submission_fixtures(self):
+        for filename in sorted(os.listdir(POSTS_DIR)):
+            if filename.endswith('.xml'):
+                with open(os.path.join(POSTS_DIR, filename), 'rb') as f:
+                    xml = f.read()
+                with self.subTest(filename):
+                    self.assertConvertsLikeTwoPasses(xml)
+
+    @run_pre_and_post_timezone_migration
+    def test_large_repeat_groups(self):
+        for seed in range(3):
+            self.assertConvertsLikeTwoPasses(get_form_xml(repeats=200, questions=10, seed=seed))
+
+    def test_unicode_string(self):
+        self.assertConvertsLikeTwoPasses(get_form_xml(repeats=2, questions=2).decode('utf-8'))
+
+    def test_repeats_namespaces_and_text(self):
+        xml = """<?xml version='1.0' ?>
+        <!-- a comment -->
+        <data xmlns="http://example.com/form" version="3">
+            <when>2019-03-04T10:15:27.433+05:30</when>
+            <empty/>
+            <blank>  </blank>
+            <item id="1">first</item>
+            <item>2019-03-04</item>
+            <item><!-- comment --><sub>x</sub></item>
+            <other xmlns="http://example.com/other" at="2019-03-04T10:15:27Z">text<child/></other>
+        </data>"""
+        self.assertEqual(convert_xform_to_adjusted_json(xml), {
+            '#type': 'data',
+            '@xmlns': 'http://example.com/form',
+            '@version': '3',
+            'when': '2019-03-04T04:45:27.433000Z',
+            'empty': '',
+            'blank': '  ',
+            'item': [
+                {'@id': '1', '#text': 'first'},
+                '2019-03-04',
+                {'sub': 'x'},
+            ],
+            'other': {
+                '@xmlns': 'http://example.com/other',
+                '@at': '2019-03-04T10:15:27.000000Z',
+                '#text': 'text',
+                'child': '',
+            },
+        })
+        self.assertConvertsLikeTwoPasses(xml)
+
+    def test_missing_xmlns(self):
+        self.assertNotIn('@xmlns', convert_xform_to_adjusted_json('<data><q>1</q></data>'))
+
+    def test_invalid_xml(self):
+        with self.assertRaises(XMLSyntaxError):
+            convert_xform_to_adjusted_json('<data><q>1</data>')
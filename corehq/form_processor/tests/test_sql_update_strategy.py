@@ -1,14 +1,18 @@
 from django.test import TestCase
 from freezegun import freeze_time
-from mock import patch
+from mock import Mock, patch
 from testil import eq
 from corehq.util.soft_assert.core import SoftAssert
 
+from casexml.apps.case import const
 from casexml.apps.case.exceptions import ReconciliationError
 from casexml.apps.case.xml.parser import CaseUpdateAction, KNOWN_PROPERTIES
 from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
 from corehq.form_processor.backends.sql.processor import FormProcessorSQL
-from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
+from corehq.form_processor.backends.sql.update_strategy import (
+    ALWAYS_MODIFIED_CASE_PROPERTIES,
+    SqlCaseUpdateStrategy,
+)
 from corehq.form_processor.interfaces.processor import ProcessedForms
 from corehq.form_processor.models import (
     CommCareCaseSQL,
@@ -222,3 +226,46 @@ def test_update_known_properties_with_empty_values():
     for prop, default in KNOWN_PROPERTIES.items():
         if default is not None:
             yield test, prop
+
+
+def test_track_modified_properties():
+    case = SqlCaseUpdateStrategy.case_implementation_class(
+        name="bob", case_json={"color": "red", "size": "big"})
+    strategy = SqlCaseUpdateStrategy(case)
+    properties_before = strategy._get_property_snapshot()
+    case.name = "alice"
+    case.case_json["color"] = "blue"
+    case.case_json["shape"] = "round"
+
+    strategy._track_modified_properties(_case_update(const.CASE_ACTION_UPDATE), properties_before)
+
+    eq(case.modified_properties, {"name", "color", "shape"} | ALWAYS_MODIFIED_CASE_PROPERTIES)
+
+
+def test_track_modified_properties_accumulates_updates():
+    case = SqlCaseUpdateStrategy.case_implementation_class(case_json={"color": "red"})
+    strategy = SqlCaseUpdateStrategy(case)
+    for prop in ["color", "size"]:
+        properties_before = strategy._get_property_snapshot()
+        case.case_json[prop] = "changed"
+        strategy._track_modified_properties(_case_update(const.CASE_ACTION_UPDATE), properties_before)
+
+    eq(case.modified_properties, {"color", "size"} | ALWAYS_MODIFIED_CASE_PROPERTIES)
+
+
+def test_track_modified_properties_unknown_for_other_actions():
+    case = SqlCaseUpdateStrategy.case_implementation_class(case_json={})
+    strategy = SqlCaseUpdateStrategy(case)
+    properties_before = strategy._get_property_snapshot()
+    case_update = _case_update(const.CASE_ACTION_UPDATE, const.CASE_ACTION_INDEX)
+
+    strategy._track_modified_properties(case_update, properties_before)
+    eq(case.modified_properties, None)
+
+    # stays unknown for later updates
+    strategy._track_modified_properties(_case_update(const.CASE_ACTION_UPDATE), properties_before)
+    eq(case.modified_properties, None)
+
+
+def _case_update(*action_types):
+    return Mock(actions=[Mock(action_type_slug=action_type) for action_type in action_types])
@@ -1,4 +1,5 @@
 from datetime import datetime
+from io import BytesIO
 from lxml import etree
 
 import iso8601
@@ -195,15 +196,10 @@ def adjust_datetimes(data, parent=None, key=None, process_timezones=None):
     >>>     adjust_datetimes(form_json)
     """
     process_timezones = process_timezones or phone_timezones_should_be_processed()
-    # this strips the timezone like we've always done
-    # todo: in the future this will convert to UTC
-    if isinstance(data, str) and jsonobject.re_loose_datetime.match(data):
-        try:
-            parent[key] = str(json_format_datetime(
-                adjust_text_to_datetime(data, process_timezones=process_timezones)
-            ))
-        except (iso8601.ParseError, ValueError):
-            pass
+    if isinstance(data, str):
+        adjusted = _adjust_datetime_string(data, process_timezones)
+        if adjusted is not data:
+            parent[key] = adjusted
     elif isinstance(data, dict):
         for key, value in data.items():
             adjust_datetimes(value, parent=data, key=key, process_timezones=process_timezones)
@@ -216,6 +212,80 @@ def adjust_datetimes(data, parent=None, key=None, process_timezones=None):
     return data
 
 
+def _adjust_datetime_string(value, process_timezones):
+    # this strips the timezone like we've always done
+    # todo: in the future this will convert to UTC
+    if jsonobject.re_loose_datetime.match(value):
+        try:
+            return str(json_format_datetime(
+                adjust_text_to_datetime(value, process_timezones=process_timezones)
+            ))
+        except (iso8601.ParseError, ValueError):
+            pass
+    return value
+
+
+def convert_xform_to_adjusted_json(xml_string, process_timezones=None):
+    """
+    Equivalent to ``adjust_datetimes(convert_xform_to_json(xml_string))``
+    but done in a single pass over the XML.
+
+    Elements are converted as soon as they are closed and then discarded,
+    so the full element tree is never held in memory alongside the json.
+    """
+    process_timezones = process_timezones or phone_timezones_should_be_processed()
+    if isinstance(xml_string, str):
+        xml_string = xml_string.encode('utf-8')
+
+    # one frame per open element: [xmlns, json value]
+    stack = [[None, {}]]
+    try:
+        for event, elem in etree.iterparse(BytesIO(xml_string), events=('start', 'end')):
+            if event == 'start':
+                stack.append([_split_tag(elem.tag)[0], {}])
+                continue
+
+            xmlns, value = stack.pop()
+            parent_xmlns, parent_value = stack[-1]
+            name = _split_tag(elem.tag)[1]
+            for attr, attr_value in elem.attrib.items():
+                value['@' + attr] = _adjust_datetime_string(attr_value, process_timezones)
+            if xmlns is not None and xmlns != parent_xmlns:
+                value['@xmlns'] = xmlns
+            text = elem.text
+            if not value:
+                value = _adjust_datetime_string(text or '', process_timezones)
+            elif text and text.strip():
+                value['#text'] = _adjust_datetime_string(text, process_timezones)
+
+            if name in parent_value:
+                if not isinstance(parent_value[name], list):
+                    parent_value[name] = [parent_value[name]]
+                parent_value[name].append(value)
+            else:
+                parent_value[name] = value
+
+            # drop converted elements so that memory stays flat for long repeats
+            elem.clear()
+            if elem.getparent() is not None:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        from couchforms import XMLSyntaxError
+        raise XMLSyntaxError('Invalid XML: %s' % e)
+
+    (name, json_form), = stack[0][1].items()
+    json_form['#type'] = _adjust_datetime_string(name, process_timezones)
+    return json_form
+
+
+def _split_tag(tag):
+    if tag[0] == '{':
+        xmlns, name = tag[1:].split('}', 1)
+        return xmlns, name
+    return None, tag
+
+
 def resave_form(domain, form):
     from corehq.form_processor.utils import should_use_sql_backend
     from corehq.form_processor.change_publishers import publish_form_saved
@@ -1,10 +1,15 @@
+from collections import defaultdict
 from uuid import UUID
 
+from django.db import transaction
 from django.db.models import Q
 
+from django_bulk_update.helper import bulk_update as bulk_update_helper
+
 from corehq.sql_db.util import (
     get_db_aliases_for_partitioned_query,
     paginate_query_across_partitioned_databases,
+    split_list_by_db_partition,
 )
 from corehq.util.metrics.load_counters import load_counter_for_model
 
@@ -274,6 +279,32 @@ def get_case_timed_schedule_instances_for_schedule(case_id, schedule):
     return get_case_timed_schedule_instances_for_schedule_id(case_id, schedule.schedule_id)
 
 
+def get_case_schedule_instances_for_case_ids(cls, case_ids, schedule_ids):
+    """
+    :return: the instances of cls for any of the given cases and schedules,
+    with one query per partition
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    if cls is CaseAlertScheduleInstance:
+        schedule_filter = {'alert_schedule_id__in': schedule_ids}
+    elif cls is CaseTimedScheduleInstance:
+        schedule_filter = {'timed_schedule_id__in': schedule_ids}
+    else:
+        raise TypeError("Expected CaseAlertScheduleInstance or CaseTimedScheduleInstance")
+
+    if not schedule_ids:
+        return []
+
+    result = []
+    for db_name, case_ids_in_db in split_list_by_db_partition(case_ids):
+        result.extend(cls.objects.using(db_name).filter(case_id__in=case_ids_in_db, **schedule_filter))
+    return result
+
+
 def get_case_schedule_instance(cls, case_id, schedule_instance_id):
     from corehq.messaging.scheduling.scheduling_partitioned.models import (
         CaseAlertScheduleInstance,
@@ -308,6 +339,41 @@ def delete_case_schedule_instance(instance):
     instance.delete()
 
 
+def bulk_save_case_schedule_instances(to_create, to_update, to_delete):
+    """
+    Creates, updates and deletes case schedule instances with bulk queries,
+    in one transaction per partition.
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    classes = (CaseAlertScheduleInstance, CaseTimedScheduleInstance)
+    changes = defaultdict(lambda: ([], [], []))
+    for index, instances in enumerate([to_create, to_update, to_delete]):
+        for instance in instances:
+            _validate_class(instance, classes)
+            _validate_uuid(instance.schedule_instance_id)
+            changes[(instance.db, type(instance))][index].append(instance)
+
+    for db_name in {db_name for db_name, cls in changes}:
+        with transaction.atomic(using=db_name):
+            for cls in classes:
+                if (db_name, cls) not in changes:
+                    continue
+                creates, updates, deletes = changes[(db_name, cls)]
+                # delete first to keep the unique constraint on recipients
+                if deletes:
+                    cls.objects.using(db_name).filter(
+                        schedule_instance_id__in=[instance.schedule_instance_id for instance in deletes]
+                    ).delete()
+                if updates:
+                    bulk_update_helper(updates, using=db_name)
+                if creates:
+                    cls.objects.using(db_name).bulk_create(creates)
+
+
 def delete_alert_schedule_instances_for_schedule(cls, schedule_id):
     from corehq.messaging.scheduling.scheduling_partitioned.models import (
         AlertScheduleInstance,
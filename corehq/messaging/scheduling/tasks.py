@@ -24,13 +24,16 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_case_alert_schedule_instances_for_schedule,
     get_case_timed_schedule_instances_for_schedule,
     get_case_schedule_instance,
+    get_case_schedule_instances_for_case_ids,
     save_case_schedule_instance,
+    bulk_save_case_schedule_instances,
     delete_case_schedule_instance,
     delete_alert_schedule_instances_for_schedule,
     delete_timed_schedule_instances_for_schedule,
     delete_schedule_instances_by_case_id,
 )
 from corehq.util.celery_utils import no_result_task
+from collections import defaultdict
 from datetime import datetime
 from dimagi.utils.couch import CriticalSection
 from django.conf import settings
@@ -38,11 +41,15 @@ from django.conf import settings
 
 class ScheduleInstanceRefresher(object):
 
-    def __init__(self, schedule, new_recipients, existing_instances):
+    def __init__(self, schedule, new_recipients, existing_instances, batch=None):
         self.schedule = schedule
         self.new_recipients = set(self._convert_to_tuple_of_tuples(new_recipients))
         self.existing_instances = self._recipient_instance_dict(existing_instances)
 
+        # (Optional) a CaseScheduleInstanceBatch which collects the changes
+        # to save them in bulk, rather than saving each instance right away
+        self.batch = batch
+
         # The model_instance is just an example of any existing instance,
         # or None if none exist yet.
         # When creating instances for new recipients, we should use the
@@ -142,6 +149,8 @@ class ScheduleInstanceRefresher(object):
             if recipient_type_and_id in self.new_recipients:
                 needs_saving = self.handle_existing_instance(instance)
                 refreshed_list.append((instance, needs_saving))
+            elif self.batch:
+                self.batch.delete(instance)
             else:
                 self.delete_instance(instance)
 
@@ -150,7 +159,10 @@ class ScheduleInstanceRefresher(object):
                 needs_saving = True
 
             if needs_saving:
-                self.save_instance(instance)
+                if self.batch:
+                    self.batch.save(instance)
+                else:
+                    self.save_instance(instance)
 
 
 class AlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
@@ -201,8 +213,9 @@ class TimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
 class CaseAlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
-    def __init__(self, case, action_definition, rule, schedule, new_recipients, existing_instances):
-        super(CaseAlertScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances)
+    def __init__(self, case, action_definition, rule, schedule, new_recipients, existing_instances, batch=None):
+        super(CaseAlertScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances,
+            batch=batch)
         self.case = case
         self.action_definition = action_definition
         self.rule = rule
@@ -242,8 +255,9 @@ class CaseAlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
 class CaseTimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
     def __init__(self, case, action_definition, rule, schedule,
-                 new_recipients, existing_instances, start_date=None):
-        super(CaseTimedScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances)
+                 new_recipients, existing_instances, start_date=None, batch=None):
+        super(CaseTimedScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances,
+            batch=batch)
         self.case = case
         self.action_definition = action_definition
         self.rule = rule
@@ -286,6 +300,59 @@ class CaseTimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
         return False
 
 
+class CaseScheduleInstanceBatch(object):
+    """
+    Loads the case schedule instances for a chunk of cases and some
+    schedules up front, and collects the changes made to them so that
+    commit() can save them with a few bulk queries per partition.
+    """
+
+    def __init__(self, case_ids, alert_schedule_ids, timed_schedule_ids):
+        self.instances = defaultdict(list)
+        for instance in get_case_schedule_instances_for_case_ids(
+                CaseAlertScheduleInstance, case_ids, alert_schedule_ids):
+            self.instances[(instance.case_id, instance.alert_schedule_id)].append(instance)
+        for instance in get_case_schedule_instances_for_case_ids(
+                CaseTimedScheduleInstance, case_ids, timed_schedule_ids):
+            self.instances[(instance.case_id, instance.timed_schedule_id)].append(instance)
+
+        self.existing_ids = {
+            instance.schedule_instance_id
+            for instances in self.instances.values()
+            for instance in instances
+        }
+        self.to_save = {}
+        self.to_delete = {}
+
+    def get_instances(self, case_id, schedule_id):
+        return list(self.instances.get((case_id, schedule_id), []))
+
+    def save(self, instance):
+        self.to_save[instance.schedule_instance_id] = instance
+
+    def delete(self, instance):
+        self.to_save.pop(instance.schedule_instance_id, None)
+        if instance.schedule_instance_id in self.existing_ids:
+            self.to_delete[instance.schedule_instance_id] = instance
+
+    def delete_instances(self, case_id, schedule_id):
+        for instance in self.get_instances(case_id, schedule_id):
+            self.delete(instance)
+
+    def commit(self):
+        to_create = []
+        to_update = []
+        for schedule_instance_id, instance in self.to_save.items():
+            if schedule_instance_id in self.existing_ids:
+                to_update.append(instance)
+            else:
+                to_create.append(instance)
+
+        bulk_save_case_schedule_instances(to_create, to_update, list(self.to_delete.values()))
+        self.to_save = {}
+        self.to_delete = {}
+
+
 @task(serializer='pickle', queue=settings.CELERY_REMINDER_RULE_QUEUE, ignore_result=True)
 def refresh_alert_schedule_instances(schedule_id, recipients):
     """
@@ -379,7 +446,7 @@ def handle_case_alert_schedule_instance_reset(instance, schedule, reset_case_pro
     return False
 
 
-def refresh_case_alert_schedule_instances(case, schedule, action_definition, rule):
+def refresh_case_alert_schedule_instances(case, schedule, action_definition, rule, batch=None):
     """
     :param case: the CommCareCase/SQL
     :param schedule: the AlertSchedule
@@ -387,18 +454,27 @@ def refresh_case_alert_schedule_instances(case, schedule, action_definition, rul
     causing the schedule instances to be refreshed
     :param rule: the AutomaticUpdateRule that is causing the schedule instances
     to be refreshed
+    :param batch: (optional) the CaseScheduleInstanceBatch to take the existing
+    instances from and to collect the changes in
     """
+    if batch:
+        existing_instances = batch.get_instances(case.case_id, schedule.schedule_id)
+    else:
+        existing_instances = get_case_alert_schedule_instances_for_schedule(case.case_id, schedule)
+
     CaseAlertScheduleInstanceRefresher(
         case,
         action_definition,
         rule,
         schedule,
         action_definition.recipients,
-        get_case_alert_schedule_instances_for_schedule(case.case_id, schedule)
+        existing_instances,
+        batch=batch
     ).refresh()
 
 
-def refresh_case_timed_schedule_instances(case, schedule, action_definition, rule, start_date=None):
+def refresh_case_timed_schedule_instances(case, schedule, action_definition, rule, start_date=None,
+                                          batch=None):
     """
     :param case: the CommCareCase/SQL
     :param schedule: the TimedSchedule
@@ -407,15 +483,23 @@ def refresh_case_timed_schedule_instances(case, schedule, action_definition, rul
     :param rule: the AutomaticUpdateRule that is causing the schedule instances
     to be refreshed
     :param start_date: the date to start the TimedSchedule
+    :param batch: (optional) the CaseScheduleInstanceBatch to take the existing
+    instances from and to collect the changes in
     """
+    if batch:
+        existing_instances = batch.get_instances(case.case_id, schedule.schedule_id)
+    else:
+        existing_instances = get_case_timed_schedule_instances_for_schedule(case.case_id, schedule)
+
     CaseTimedScheduleInstanceRefresher(
         case,
         action_definition,
         rule,
         schedule,
         action_definition.recipients,
-        get_case_timed_schedule_instances_for_schedule(case.case_id, schedule),
-        start_date=start_date
+        existing_instances,
+        start_date=start_date,
+        batch=batch
     ).refresh()
 
 
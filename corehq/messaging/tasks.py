@@ -1,11 +1,17 @@
 from corehq import toggles
-from corehq.apps.data_interfaces.models import AutomaticUpdateRule
+from corehq.apps.data_interfaces.models import (
+    AutomaticUpdateRule,
+    CreateScheduleInstanceActionDefinition,
+)
 from corehq.apps.sms import tasks as sms_tasks
 from corehq.form_processor.exceptions import CaseNotFound
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.models import CommCareCaseSQL
 from corehq.form_processor.utils import should_use_sql_backend
-from corehq.messaging.scheduling.tasks import delete_schedule_instances_for_cases
+from corehq.messaging.scheduling.tasks import (
+    CaseScheduleInstanceBatch,
+    delete_schedule_instances_for_cases,
+)
 from corehq.messaging.scheduling.util import utcnow
 from corehq.messaging.util import MessagingRuleProgressHelper, use_phone_entries
 from corehq.sql_db.util import (
@@ -48,12 +54,18 @@ def sync_case_for_messaging_rule(self, domain, case_id, rule_id):
 
 @no_result_task(serializer='pickle', queue=settings.CELERY_REMINDER_CASE_UPDATE_QUEUE, acks_late=True)
 def sync_case_chunk_for_messaging_rule(domain, case_id_chunk, rule_id):
-    for case_id in case_id_chunk:
-        try:
-            with CriticalSection([get_sync_key(case_id)], timeout=5 * 60):
-                _sync_case_for_messaging_rule(domain, case_id, rule_id)
-        except Exception:
-            sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
+    # sorted to acquire the locks in the same order as other chunks
+    keys = sorted(get_sync_key(case_id) for case_id in case_id_chunk)
+    try:
+        with CriticalSection(keys, timeout=5 * 60):
+            _sync_case_chunk_for_messaging_rule(domain, list(case_id_chunk), rule_id)
+    except Exception:
+        for case_id in case_id_chunk:
+            try:
+                with CriticalSection([get_sync_key(case_id)], timeout=5 * 60):
+                    _sync_case_for_messaging_rule(domain, case_id, rule_id)
+            except Exception:
+                sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
 
 
 def _sync_case_for_messaging(domain, case_id):
@@ -106,6 +118,49 @@ def _sync_case_for_messaging_rule(domain, case_id, rule_id):
         MessagingRuleProgressHelper(rule_id).increment_current_case_count()
 
 
+def _sync_case_chunk_for_messaging_rule(domain, case_ids, rule_id):
+    """
+    Like _sync_case_for_messaging_rule for many cases at once. The cases
+    and their schedule instances are loaded in bulk, and the changes to the
+    schedule instances are saved in bulk.
+    """
+    rule = _get_cached_rule(domain, rule_id)
+    if not rule:
+        return
+
+    definitions = [action.definition for action in rule.memoized_actions]
+    if not all(isinstance(definition, CreateScheduleInstanceActionDefinition) for definition in definitions):
+        for case_id in case_ids:
+            _sync_case_for_messaging_rule(domain, case_id, rule_id)
+        return
+
+    case_load_counter("messaging_rule_sync", domain)(len(case_ids))
+    cases = CaseAccessors(domain).get_cases(case_ids)
+    found_case_ids = {case.case_id for case in cases}
+    missing_case_ids = [case_id for case_id in case_ids if case_id not in found_case_ids]
+    if missing_case_ids:
+        sms_tasks.delete_phone_numbers_for_owners(missing_case_ids)
+        delete_schedule_instances_for_cases(domain, missing_case_ids)
+
+    cases = [case for case in cases if case.domain == domain]
+    batch = CaseScheduleInstanceBatch(
+        [case.case_id for case in cases],
+        [definition.alert_schedule_id for definition in definitions if definition.alert_schedule_id],
+        [definition.timed_schedule_id for definition in definitions if definition.timed_schedule_id],
+    )
+    now = utcnow()
+    for case in cases:
+        if rule.criteria_match(case, now):
+            for definition in definitions:
+                definition.refresh_schedule_instances(case, rule, batch=batch)
+        else:
+            for definition in definitions:
+                definition.delete_schedule_instances(case, batch=batch)
+    batch.commit()
+
+    MessagingRuleProgressHelper(rule_id).increment_current_case_count(value=len(cases))
+
+
 def initiate_messaging_rule_run(rule):
     if not rule.active:
         return
@@ -151,11 +206,12 @@ def run_messaging_rule(domain, rule_id):
     progress_helper = MessagingRuleProgressHelper(rule_id)
 
     def _run_rule_sequentially():
+        chunk_size = getattr(settings, 'MESSAGING_RULE_CASE_CHUNK_SIZE', 100)
         incr = 0
         progress_helper.set_initial_progress()
-        for case_id in get_case_ids_for_messaging_rule(domain, rule.case_type):
-            sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
-            incr += 1
+        for case_id_chunk in chunked(get_case_ids_for_messaging_rule(domain, rule.case_type), chunk_size):
+            sync_case_chunk_for_messaging_rule.delay(domain, case_id_chunk, rule_id)
+            incr += len(case_id_chunk)
             if incr >= 1000:
                 progress_helper.increase_total_case_count(incr)
                 incr = 0
@@ -97,6 +97,7 @@ class Dhis2EntityRepeater(CaseRepeater, Dhis2Instance):
     dhis2_entity_config = SchemaProperty(Dhis2EntityConfig)
 
     _has_config = True
+    _supports_batches = False
 
     def __str__(self):
         return Repeater.__str__(self)
@@ -163,6 +164,7 @@ class Dhis2Repeater(FormRepeater, Dhis2Instance):
     dhis2_config = SchemaProperty(Dhis2Config)
 
     _has_config = True
+    _supports_batches = False
 
     def __str__(self):
         return Repeater.__str__(self)
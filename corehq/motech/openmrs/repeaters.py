@@ -95,6 +95,7 @@ class OpenmrsRepeater(CaseRepeater):
     openmrs_config = SchemaProperty(OpenmrsConfig)
 
     _has_config = True
+    _supports_batches = False
 
     # self.white_listed_case_types must have exactly one case type set
     # for Atom feed integration to add cases for OpenMRS patients.
@@ -153,14 +153,14 @@ def _get_repeater_ids_by_domain(domain):
     return [result['id'] for result in results]
 
 
-def iterate_repeat_records(due_before, chunk_size=10000, database=None):
+def iterate_repeat_records(due_before, chunk_size=10000, database=None, domain=None):
     from .models import RepeatRecord
     json_now = json_format_datetime(due_before)
 
     view_kwargs = {
         'reduce': False,
-        'startkey': [None],
-        'endkey': [None, json_now, {}],
+        'startkey': [domain],
+        'endkey': [domain, json_now, {}],
         'include_docs': True
     }
     for doc in paginate_view(
@@ -171,6 +171,15 @@ def iterate_repeat_records(due_before, chunk_size=10000, database=None):
         yield RepeatRecord.wrap(doc['doc'])
 
 
+def get_domains_with_pending_repeat_records():
+    from .models import RepeatRecord
+    return [
+        row['key'][0]
+        for row in RepeatRecord.view('repeaters/repeat_records_by_next_check', group_level=1).all()
+        if row['key'][0] is not None
+    ]
+
+
 def get_domains_that_have_repeat_records():
     from .models import RepeatRecord
     return [
@@ -0,0 +1,59 @@
+import json
+import time
+import uuid
+
+from django.core.management import BaseCommand
+
+from dimagi.utils.chunked import chunked
+
+from corehq.motech.repeaters.models import LocationRepeater, RepeatRecord
+from corehq.motech.repeaters.tests.fake_endpoint import FakeEndpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure repeat records delivered per second to a local fake endpoint, "
+        "sending one request per record and one request per batch"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=1000)
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--payload-size', type=int, default=2000,
+                            help="Approximate size of each payload in bytes")
+
+    def handle(self, records, batch_sizes, payload_size, **options):
+        repeat_records = [
+            RepeatRecord(domain='benchmark', payload_id=uuid.uuid4().hex)
+            for i in range(records)
+        ]
+        payloads = [
+            json.dumps({'id': record.payload_id, 'data': 'x' * payload_size})
+            for record in repeat_records
+        ]
+
+        with FakeEndpoint() as endpoint:
+            repeater = LocationRepeater(domain='benchmark', url=endpoint.url, batch_size=max(batch_sizes))
+
+            def one_per_record():
+                for record, payload in zip(repeat_records, payloads):
+                    repeater.send_request(record, payload)
+
+            def batched(batch_size):
+                def send():
+                    pairs = list(zip(repeat_records, payloads))
+                    for batch in chunked(pairs, batch_size, list):
+                        batch_records, batch_payloads = zip(*batch)
+                        repeater.send_batch_request(batch_records, '[{}]'.format(','.join(batch_payloads)))
+                return send
+
+            print("{} records, {} byte payloads".format(records, payload_size))
+            runs = [('one per record', one_per_record)]
+            runs += [('batches of {}'.format(size), batched(size)) for size in batch_sizes]
+            for name, send in runs:
+                start = time.perf_counter()
+                send()
+                seconds = time.perf_counter() - start
+                print("    {:<16} {:>10.0f} ms {:>10.0f} records/s".format(
+                    name, seconds * 1000, records / seconds))
+            assert endpoint.item_count == records * len(runs)
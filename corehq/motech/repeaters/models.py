@@ -43,7 +43,9 @@ associates it with the payload using the payload's ID. The
 Next we jump to *tasks.py*. The ``check_repeaters()`` function will run
 every ``CHECK_REPEATERS_INTERVAL`` (currently set to 5 minutes). Each
 ``RepeatRecord`` due to be processed will be added to the
-``CELERY_REPEAT_RECORD_QUEUE``.
+``CELERY_REPEAT_RECORD_QUEUE``. If ``CHECK_REPEATERS_PARTITION_COUNT``
+is set, domains are split across that many ``check_repeaters_in_partition``
+tasks, which enqueue their due records in chunks.
 
 When it is pulled off the queue and processed, if its repeater is paused
 it will be postponed. If its repeater is deleted it will be deleted. And
@@ -63,14 +65,17 @@ class.
 "Data Forwarding Records".
 
 """
+import json
 import re
 import warnings
 from datetime import datetime, timedelta
 from typing import Optional
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_lazy as _
 
+import attr
 from couchdbkit.exceptions import ResourceConflict, ResourceNotFound
 from memoized import memoized
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
@@ -182,10 +187,14 @@ class Repeater(QuickCachedDocumentMixin, Document):
 
     friendly_name = _("Data")
     paused = BooleanProperty(default=False)
+    # Send up to this many due records in one request. Only used by
+    # repeaters that support batches, with a JSON payload format.
+    batch_size = IntegerProperty(default=1)
 
     payload_generator_classes = ()
 
     _has_config = False
+    _supports_batches = False
 
     def __str__(self):
         url = "@".join((self.username, self.url)) if self.username else self.url
@@ -230,6 +239,21 @@ class Repeater(QuickCachedDocumentMixin, Document):
     def get_payload(self, repeat_record):
         return self.generator.get_payload(repeat_record, self.payload_doc(repeat_record))
 
+    def get_payload_docs(self, repeat_records):
+        """
+        Returns a dictionary of payload docs by payload ID. Payloads that
+        are not found are left out.
+
+        Override this to fetch the payload docs of a batch in bulk.
+        """
+        payload_docs = {}
+        for record in repeat_records:
+            try:
+                payload_docs[record.payload_id] = self.payload_doc(record)
+            except (XFormNotFound, ResourceNotFound, ObjectDoesNotExist):
+                pass
+        return payload_docs
+
     def get_attempt_info(self, repeat_record):
         return None
 
@@ -393,7 +417,7 @@ class Repeater(QuickCachedDocumentMixin, Document):
         else:
             return self.handle_response(response, repeat_record)
 
-    def handle_response(self, result, repeat_record):
+    def handle_response(self, result, repeat_record, payload_doc=None):
         """
         route the result to the success, failure, or exception handlers
 
@@ -404,12 +428,97 @@ class Repeater(QuickCachedDocumentMixin, Document):
             self.generator.handle_exception(result, repeat_record)
         elif _is_response(result) and 200 <= result.status_code < 300 or result is True:
             attempt = repeat_record.handle_success(result)
-            self.generator.handle_success(result, self.payload_doc(repeat_record), repeat_record)
+            payload_doc = payload_doc or self.payload_doc(repeat_record)
+            self.generator.handle_success(result, payload_doc, repeat_record)
         else:
             attempt = repeat_record.handle_failure(result)
-            self.generator.handle_failure(result, self.payload_doc(repeat_record), repeat_record)
+            payload_doc = payload_doc or self.payload_doc(repeat_record)
+            self.generator.handle_failure(result, payload_doc, repeat_record)
         return attempt
 
+    @property
+    def uses_batches(self):
+        # A batch is sent to ``self.url`` with the generator's headers,
+        # so repeaters that vary the URL or headers per record can't batch
+        return (
+            self._supports_batches
+            and type(self).get_url is Repeater.get_url
+            and type(self).get_headers is Repeater.get_headers
+            and self.batch_size > 1
+            and self.generator.content_type == 'application/json'
+        )
+
+    def fire_for_records(self, repeat_records):
+        """
+        Sends the payloads of ``repeat_records`` as a JSON array in one
+        request, and returns an attempt for each record, in order.
+
+        Records whose payload cannot be generated are not sent, and
+        their attempts are cancelled.
+        """
+        payload_docs = self.get_payload_docs(repeat_records)
+        attempts = {}
+        records_to_send = []
+        payloads = []
+        for record in repeat_records:
+            try:
+                if record.payload_id not in payload_docs:
+                    raise ResourceNotFound('Payload {} not found'.format(record.payload_id))
+                payloads.append(self.generator.get_payload(record, payload_docs[record.payload_id]))
+            except Exception as e:
+                log_repeater_error_in_datadog(self.domain, status_code=None, repeater_type=record.repeater_type)
+                attempts[record.record_id] = record.handle_payload_exception(e)
+            else:
+                records_to_send.append(record)
+
+        if records_to_send:
+            payload = '[{}]'.format(','.join(payloads))
+            try:
+                response = self.send_batch_request(records_to_send, payload)
+            except (Timeout, ConnectionError) as error:
+                log_repeater_timeout_in_datadog(self.domain)
+                results = [RequestConnectionError(error)] * len(records_to_send)
+            except Exception as e:
+                results = [e] * len(records_to_send)
+            else:
+                results = self.get_batch_results(response, records_to_send)
+            for record, result in zip(records_to_send, results):
+                attempts[record.record_id] = self.handle_response(
+                    result, record, payload_docs[record.payload_id])
+
+        return [attempts[record.record_id] for record in repeat_records]
+
+    def send_batch_request(self, repeat_records, payload):
+        return simple_post(
+            self.domain, self.url, payload, headers=self.generator.get_headers(), auth=self.get_auth(),
+            verify=self.verify, notify_addresses=self.notify_addresses,
+        )
+
+    def get_batch_results(self, response, repeat_records):
+        """
+        Returns the result of each record in a batch, in order.
+
+        If the endpoint responds with "207 Multi-Status" and a JSON array
+        with a ``{"status": <status code>}`` object per record, each
+        record gets its own status. Otherwise the response applies to
+        the whole batch.
+        """
+        if response.status_code != 207:
+            return [response] * len(repeat_records)
+        try:
+            statuses = json.loads(response.text)
+            results = [
+                BatchItemResponse(status_code=int(item['status']), reason=item.get('reason', ''),
+                                  text=json.dumps(item))
+                for item in statuses
+            ]
+        except (ValueError, TypeError, KeyError):
+            results = []
+        if len(results) != len(repeat_records):
+            error = ValueError('Unexpected batch response: {}'.format(response.text))
+            return [error] * len(repeat_records)
+        return results
+
     @property
     def form_class_name(self):
         """
@@ -613,6 +722,7 @@ class UserRepeater(Repeater):
     friendly_name = _("Forward Users")
 
     payload_generator_classes = (UserPayloadGenerator,)
+    _supports_batches = True
 
     @memoized
     def payload_doc(self, repeat_record):
@@ -626,11 +736,16 @@ class LocationRepeater(Repeater):
     friendly_name = _("Forward Locations")
 
     payload_generator_classes = (LocationPayloadGenerator,)
+    _supports_batches = True
 
     @memoized
     def payload_doc(self, repeat_record):
         return SQLLocation.objects.get(location_id=repeat_record.payload_id)
 
+    def get_payload_docs(self, repeat_records):
+        locations = SQLLocation.objects.filter(location_id__in=[r.payload_id for r in repeat_records])
+        return {location.location_id: location for location in locations}
+
     def __str__(self):
         return "forwarding locations to: %s" % self.url
 
@@ -752,10 +867,11 @@ class RepeatRecord(Document):
         for i, attempt in enumerate(self.attempts):
             yield i + 1, attempt
 
-    def postpone_by(self, duration):
+    def postpone_by(self, duration, save=True):
         self.last_checked = datetime.utcnow()
         self.next_check = self.last_checked + duration
-        self.save()
+        if save:
+            self.save()
 
     def make_set_next_try_attempt(self, failure_reason):
         assert self.succeeded is False
@@ -880,21 +996,10 @@ class RepeatRecord(Document):
     def attempt_forward_now(self):
         from corehq.motech.repeaters.tasks import process_repeat_record
 
-        def is_ready():
-            return self.next_check < datetime.utcnow()
-
-        def already_processed():
-            return self.succeeded or self.cancelled or self.next_check is None
-
-        if already_processed() or not is_ready():
+        if not self.is_ready_to_forward():
             return
 
-        # Set the next check to happen an arbitrarily long time from now so
-        # if something goes horribly wrong with the delayed task it will not
-        # be lost forever. A check at this time is expected to occur rarely,
-        # if ever, because `process_repeat_record` will usually succeed or
-        # reset the next check to sometime sooner.
-        self.next_check = datetime.utcnow() + timedelta(hours=48)
+        self.mark_enqueued()
         try:
             self.save()
         except ResourceConflict:
@@ -904,6 +1009,18 @@ class RepeatRecord(Document):
             return
         process_repeat_record.delay(self)
 
+    def is_ready_to_forward(self):
+        already_processed = self.succeeded or self.cancelled or self.next_check is None
+        return not already_processed and self.next_check < datetime.utcnow()
+
+    def mark_enqueued(self):
+        # Set the next check to happen an arbitrarily long time from now so
+        # if something goes horribly wrong with the delayed task it will not
+        # be lost forever. A check at this time is expected to occur rarely,
+        # if ever, because `process_repeat_record` will usually succeed or
+        # reset the next check to sometime sooner.
+        self.next_check = datetime.utcnow() + timedelta(hours=48)
+
     def requeue(self):
         self.cancelled = False
         self.succeeded = False
@@ -931,6 +1048,14 @@ def _get_retry_interval(last_checked, now):
     return interval
 
 
+@attr.s(frozen=True)
+class BatchItemResponse(object):
+    """The result of one record in a batch, as reported by the endpoint"""
+    status_code = attr.ib()
+    reason = attr.ib()
+    text = attr.ib()
+
+
 def _is_response(duck):
     """
     Returns True if ``duck`` has the attributes of a Requests response
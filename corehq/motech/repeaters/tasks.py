@@ -1,3 +1,5 @@
+import hashlib
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -5,9 +7,12 @@ from django.conf import settings
 from celery.schedules import crontab
 from celery.task import periodic_task, task
 from celery.utils.log import get_task_logger
+from couchdbkit import BulkSaveError
 
 from corehq.util.metrics import metrics_gauge_task, metrics_counter, metrics_histogram_timer
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import get_redis_lock
+from dimagi.utils.couch.database import iter_docs
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 from corehq.apps.accounting.utils import domain_has_privilege
@@ -19,6 +24,7 @@ from corehq.motech.repeaters.const import (
     RECORD_PENDING_STATE,
 )
 from corehq.motech.repeaters.dbaccessors import (
+    get_domains_with_pending_repeat_records,
     get_overdue_repeat_record_count,
     iterate_repeat_records,
 )
@@ -57,6 +63,12 @@ def clean_logs():
     queue=settings.CELERY_PERIODIC_QUEUE,
 )
 def check_repeaters():
+    partition_count = settings.CHECK_REPEATERS_PARTITION_COUNT
+    if partition_count:
+        for partition in range(partition_count):
+            check_repeaters_in_partition.delay(partition, partition_count)
+        return
+
     start = datetime.utcnow()
     six_hours_sec = 6 * 60 * 60
     six_hours_later = start + timedelta(seconds=six_hours_sec)
@@ -86,6 +98,113 @@ def check_repeaters():
         check_repeater_lock.release()
 
 
+@task(queue=settings.CELERY_PERIODIC_QUEUE)
+def check_repeaters_in_partition(partition, partition_count):
+    """
+    Enqueue the due repeat records of the domains in one partition
+
+    Domains are split across ``partition_count`` partitions by a hash of
+    their name, and each partition is checked under its own lock.
+    Records are handled in chunks: privileges and repeaters are looked up
+    once per chunk, and the records' new states are saved in bulk.
+    """
+    start = datetime.utcnow()
+    six_hours_sec = 6 * 60 * 60
+    six_hours_later = start + timedelta(seconds=six_hours_sec)
+    tags = {'partition': str(partition)}
+
+    lock_key = '{}-{}-of-{}'.format(CHECK_REPEATERS_KEY, partition, partition_count)
+    check_repeater_lock = get_redis_lock(lock_key, timeout=six_hours_sec, name=CHECK_REPEATERS_KEY)
+    if not check_repeater_lock.acquire(blocking=False):
+        metrics_counter("commcare.repeaters.check.locked_out", tags=tags)
+        return
+
+    try:
+        with metrics_histogram_timer(
+            "commcare.repeaters.check.processing",
+            timing_buckets=_check_repeaters_buckets,
+            tags=tags,
+        ):
+            for domain in get_domains_with_pending_repeat_records():
+                if get_repeaters_partition(domain, partition_count) != partition:
+                    continue
+                records = iterate_repeat_records(start, domain=domain)
+                for chunk in chunked(records, settings.CHECK_REPEATERS_CHUNK_SIZE, list):
+                    if datetime.utcnow() > six_hours_later:
+                        _soft_assert(False, "I've been iterating repeat records for six hours. I quit!")
+                        return
+                    enqueue_repeat_records(chunk)
+    finally:
+        check_repeater_lock.release()
+
+
+def get_repeaters_partition(domain, partition_count):
+    digest = hashlib.md5(domain.encode('utf-8')).hexdigest()
+    return int(digest, 16) % partition_count
+
+
+def enqueue_repeat_records(repeat_records):
+    """
+    Bulk equivalent of calling ``attempt_forward_now()`` on each record
+
+    Records that ``process_repeat_record`` would cancel, postpone or
+    retire without sending are updated here instead of being queued.
+    All updated records are saved in one request, and only records that
+    were saved without a conflict are queued for processing.
+    """
+    from corehq.motech.repeaters.models import Repeater, RepeatRecord
+
+    repeat_records = [record for record in repeat_records if record.is_ready_to_forward()]
+    if not repeat_records:
+        return
+
+    privileges = {
+        domain: _domain_can_forward(domain)
+        for domain in {record.domain for record in repeat_records}
+    }
+    repeaters = {}
+    for doc in iter_docs(Repeater.get_db(), list({record.repeater_id for record in repeat_records})):
+        if Repeater.get_class_from_doc_type(doc['doc_type']):
+            repeaters[doc['_id']] = Repeater.wrap(doc)
+
+    to_process = []
+    for record in repeat_records:
+        repeater = repeaters.get(record.repeater_id)
+        if not privileges[record.domain] or not repeater:
+            record.cancel()
+        elif repeater.paused:
+            # see process_repeat_record
+            record.postpone_by(timedelta(days=1), save=False)
+        elif repeater.doc_type.endswith(DELETED_SUFFIX):
+            record.doc_type += DELETED_SUFFIX
+        else:
+            record.mark_enqueued()
+            to_process.append(record)
+
+    try:
+        RepeatRecord.bulk_save(repeat_records)
+    except BulkSaveError as e:
+        # Conflicting records were updated by another process
+        conflict_ids = {error['id'] for error in e.errors}
+        to_process = [record for record in to_process if record._id not in conflict_ids]
+
+    records_by_repeater_id = defaultdict(list)
+    for record in to_process:
+        metrics_counter("commcare.repeaters.check.attempt_forward")
+        if repeaters[record.repeater_id].uses_batches:
+            records_by_repeater_id[record.repeater_id].append(record)
+        else:
+            process_repeat_record.delay(record)
+    for repeater_id, records in records_by_repeater_id.items():
+        for batch in chunked(records, repeaters[repeater_id].batch_size, list):
+            process_repeat_record_batch.delay(batch)
+
+
+def _domain_can_forward(domain):
+    return (domain_has_privilege(domain, ZAPIER_INTEGRATION)
+            or domain_has_privilege(domain, DATA_FORWARDING))
+
+
 @task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
 def process_repeat_record(repeat_record):
 
@@ -95,8 +214,7 @@ def process_repeat_record(repeat_record):
     # todo reconcile ZAPIER_INTEGRATION and DATA_FORWARDING
     #  they each do two separate things and are priced differently,
     #  but use the same infrastructure
-    if not (domain_has_privilege(repeat_record.domain, ZAPIER_INTEGRATION)
-            or domain_has_privilege(repeat_record.domain, DATA_FORWARDING)):
+    if not _domain_can_forward(repeat_record.domain):
         repeat_record.cancel()
         repeat_record.save()
 
@@ -132,6 +250,57 @@ def process_repeat_record(repeat_record):
         logging.exception('Failed to process repeat record: {}'.format(repeat_record._id))
 
 
+@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeat_record_batch(repeat_records):
+    """
+    Send the repeat records of one batching repeater in a single request
+
+    Records that ``process_repeat_record`` would not send, and all
+    records if the repeater can no longer send batches, are passed to
+    ``process_repeat_record`` one by one instead.
+    """
+    from corehq.motech.repeaters.models import RepeatRecord
+
+    repeater = repeat_records[0].repeater
+    if not (
+        repeater
+        and repeater.uses_batches
+        and not repeater.paused
+        and not repeater.doc_type.endswith(DELETED_SUFFIX)
+        and _domain_can_forward(repeater.domain)
+    ):
+        for repeat_record in repeat_records:
+            process_repeat_record(repeat_record)
+        return
+
+    to_send = []
+    for repeat_record in repeat_records:
+        if _should_send(repeat_record):
+            to_send.append(repeat_record)
+        else:
+            process_repeat_record(repeat_record)
+    if not to_send:
+        return
+
+    try:
+        for repeat_record in to_send:
+            repeat_record.overall_tries += 1
+        attempts = repeater.fire_for_records(to_send)
+        for repeat_record, attempt in zip(to_send, attempts):
+            repeat_record.add_attempt(attempt)
+        RepeatRecord.bulk_save(to_send)
+    except Exception:
+        logging.exception('Failed to process repeat record batch: {}'.format(
+            ', '.join(record._id for record in to_send)))
+
+
+def _should_send(repeat_record):
+    return repeat_record.state == RECORD_PENDING_STATE or (
+        repeat_record.state == RECORD_FAILURE_STATE
+        and repeat_record.overall_tries < repeat_record.max_possible_tries
+    )
+
+
 repeaters_overdue = metrics_gauge_task(
     'commcare.repeaters.overdue',
     get_overdue_repeat_record_count,
@@ -0,0 +1,101 @@
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class FakeEndpoint(object):
+    """
+    A local HTTP server that accepts repeater requests
+
+    Use as a context manager. Each POST body is recorded in ``requests``,
+    ``request_count`` counts GET and POST requests, and
+    ``connection_count`` counts the connections that clients opened.
+    Connections are kept alive between requests. ``headers`` are added
+    to every response.
+    ``get_statuses``, if given, is called with the items of a JSON array
+    body and returns one status code per item, which the server sends
+    back with "207 Multi-Status".
+
+    >>> with FakeEndpoint() as endpoint:
+    ...     repeater.url = endpoint.url
+    """
+
+    def __init__(self, status_code=200, get_statuses=None, headers=None):
+        self.status_code = status_code
+        self.get_statuses = get_statuses
+        self.headers = headers or {}
+        self.requests = []
+        self.request_count = 0
+        self.connection_count = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}/'.format(host, port)
+
+    @property
+    def item_count(self):
+        return sum(len(body) if isinstance(body, list) else 1 for body in self.requests)
+
+    def __enter__(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                endpoint.connection_count += 1
+
+            def do_GET(self):
+                endpoint.request_count += 1
+                self._respond(endpoint.status_code, b'OK')
+
+            def do_POST(self):
+                endpoint.request_count += 1
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    body = body.decode('utf-8')
+                endpoint.requests.append(body)
+
+                if endpoint.get_statuses and isinstance(body, list):
+                    status_code = 207
+                    content = json.dumps([
+                        {'status': status} for status in endpoint.get_statuses(body)
+                    ]).encode('utf-8')
+                else:
+                    status_code = endpoint.status_code
+                    content = b'OK'
+                self._respond(status_code, content)
+
+            def _respond(self, status_code, content):
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in endpoint.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is new in Python 3.7
+    daemon_threads = True
@@ -59,6 +59,8 @@ from corehq.motech.repeaters.repeater_generators import (
 )
 from corehq.motech.repeaters.tasks import (
     check_repeaters,
+    enqueue_repeat_records,
+    get_repeaters_partition,
     process_repeat_record,
 )
 
@@ -328,6 +330,49 @@ class RepeaterTest(BaseRepeaterTest):
             check_repeaters()
             self.assertEqual(mock_process.delay.call_count, 2)
 
+    def _make_records_due(self):
+        for record in self.repeat_records():
+            record.next_check = datetime.utcnow()
+            record.save()
+
+    @run_with_all_backends
+    def test_partitioned_check_repeaters(self):
+        self._make_records_due()
+
+        with override_settings(CHECK_REPEATERS_PARTITION_COUNT=3), \
+                patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process:
+            check_repeaters()
+            self.assertEqual(mock_process.delay.call_count, 2)
+
+        for record in self.repeat_records():
+            self.assertGreater(record.next_check, datetime.utcnow() + timedelta(hours=47))
+
+    @run_with_all_backends
+    def test_enqueue_repeat_records(self):
+        self.form_repeater.pause()
+        self._make_records_due()
+
+        with patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process:
+            enqueue_repeat_records(list(self.repeat_records()))
+        enqueued, = [call[0][0] for call in mock_process.delay.call_args_list]
+        self.assertEqual(enqueued.repeater_id, self.case_repeater.get_id)
+
+        form_record, = [r for r in self.repeat_records() if r.repeater_id == self.form_repeater.get_id]
+        self.assertGreater(form_record.next_check, datetime.utcnow() + timedelta(hours=23))
+        self.assertLess(form_record.next_check, datetime.utcnow() + timedelta(hours=25))
+
+    @run_with_all_backends
+    def test_enqueue_repeat_records_with_conflict(self):
+        self._make_records_due()
+        records = list(self.repeat_records())
+        # another process updates a record first
+        RepeatRecord.get(records[0]._id).save()
+
+        with patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process:
+            enqueue_repeat_records(records)
+        enqueued, = [call[0][0] for call in mock_process.delay.call_args_list]
+        self.assertEqual(enqueued._id, records[1]._id)
+
     @run_with_all_backends
     def test_automatic_cancel_repeat_record(self):
         repeat_record = self.case_repeater.register(CaseAccessors(self.domain).get_case(CASE_ID))
@@ -1172,6 +1217,15 @@ class TestGetRetryInterval(SimpleTestCase):
             self.assertEqual(interval, timedelta(hours=expected_interval_hours))
 
 
+class GetRepeatersPartitionTests(SimpleTestCase):
+
+    def test_partitions(self):
+        domains = ['domain-{}'.format(i) for i in range(100)]
+        partitions = [get_repeaters_partition(domain, 4) for domain in domains]
+        self.assertEqual(set(partitions), {0, 1, 2, 3})
+        self.assertEqual(partitions, [get_repeaters_partition(domain, 4) for domain in domains])
+
+
 def fromisoformat(isoformat):
     """
     Return a datetime from a string in ISO 8601 date time format
@@ -0,0 +1,199 @@
+from datetime import datetime
+
+from django.test import SimpleTestCase, TestCase
+
+from corehq.apps.accounting.models import SoftwarePlanEdition
+from corehq.apps.accounting.tests.utils import DomainSubscriptionMixin
+from corehq.apps.accounting.utils import clear_plan_version_cache
+from corehq.apps.domain.shortcuts import create_domain
+from corehq.apps.locations.models import LocationType, SQLLocation
+from corehq.motech.repeaters.const import (
+    RECORD_CANCELLED_STATE,
+    RECORD_FAILURE_STATE,
+    RECORD_SUCCESS_STATE,
+)
+from corehq.motech.repeaters.dbaccessors import (
+    delete_all_repeat_records,
+    delete_all_repeaters,
+)
+from corehq.motech.repeaters.models import (
+    BatchItemResponse,
+    CaseRepeater,
+    CreateCaseRepeater,
+    FormRepeater,
+    LocationRepeater,
+    RepeatRecord,
+    ShortFormRepeater,
+    UpdateCaseRepeater,
+    UserRepeater,
+)
+from corehq.motech.repeaters.tasks import enqueue_repeat_records
+from corehq.motech.repeaters.tests.fake_endpoint import FakeEndpoint
+from corehq.motech.repeaters.tests.test_repeater import MockResponse
+
+
+class RepeaterBatchTest(TestCase, DomainSubscriptionMixin):
+    domain = 'repeater-batch-test'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.domain_obj = create_domain(cls.domain)
+        # DATA_FORWARDING is on PRO and above
+        cls.setup_subscription(cls.domain, SoftwarePlanEdition.PRO)
+        cls.location_type = LocationType.objects.create(domain=cls.domain, name='city')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.teardown_subscriptions()
+        cls.domain_obj.delete()
+        clear_plan_version_cache()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.locations = [
+            SQLLocation.objects.create(
+                domain=self.domain,
+                name='city {}'.format(i),
+                site_code='city_{}'.format(i),
+                location_type=self.location_type,
+            )
+            for i in range(5)
+        ]
+        # created after the locations so that it does not forward them on save
+        self.repeater = LocationRepeater(
+            domain=self.domain,
+            url='http://localhost/',
+            batch_size=10,
+        )
+        self.repeater.save()
+
+    def tearDown(self):
+        for location in self.locations:
+            location.delete()
+        delete_all_repeat_records()
+        delete_all_repeaters()
+        super().tearDown()
+
+    def _register_records(self, endpoint, batch_size=10):
+        self.repeater.url = endpoint.url
+        self.repeater.batch_size = batch_size
+        self.repeater.save()
+        return [self.repeater.register(location, next_check=datetime.utcnow()) for location in self.locations]
+
+    def _get_states(self, records):
+        return [RepeatRecord.get(record._id).state for record in records]
+
+    def test_one_request_per_batch(self):
+        with FakeEndpoint() as endpoint:
+            records = self._register_records(endpoint)
+            enqueue_repeat_records(records)
+
+        self.assertEqual(len(endpoint.requests), 1)
+        self.assertEqual(
+            sorted(item['location_id'] for item in endpoint.requests[0]),
+            sorted(location.location_id for location in self.locations),
+        )
+        self.assertEqual(self._get_states(records), [RECORD_SUCCESS_STATE] * 5)
+        self.assertEqual([RepeatRecord.get(r._id).overall_tries for r in records], [1] * 5)
+
+    def test_batch_size(self):
+        with FakeEndpoint() as endpoint:
+            records = self._register_records(endpoint, batch_size=2)
+            enqueue_repeat_records(records)
+
+        self.assertEqual(sorted(len(body) for body in endpoint.requests), [1, 2, 2])
+        self.assertEqual(self._get_states(records), [RECORD_SUCCESS_STATE] * 5)
+
+    def test_failed_batch(self):
+        with FakeEndpoint(status_code=500) as endpoint:
+            records = self._register_records(endpoint)
+            enqueue_repeat_records(records)
+
+        self.assertEqual(len(endpoint.requests), 1)
+        self.assertEqual(self._get_states(records), [RECORD_FAILURE_STATE] * 5)
+
+    def test_per_record_statuses(self):
+        failed_location_id = self.locations[0].location_id
+
+        def get_statuses(items):
+            return [500 if item['location_id'] == failed_location_id else 201 for item in items]
+
+        with FakeEndpoint(get_statuses=get_statuses) as endpoint:
+            records = self._register_records(endpoint)
+            enqueue_repeat_records(records)
+
+        self.assertEqual(len(endpoint.requests), 1)
+        self.assertEqual(
+            self._get_states(records),
+            [RECORD_FAILURE_STATE] + [RECORD_SUCCESS_STATE] * 4,
+        )
+
+    def test_missing_payload(self):
+        with FakeEndpoint() as endpoint:
+            records = self._register_records(endpoint)
+            records[0].payload_id = 'missing'
+            records[0].save()
+            enqueue_repeat_records(records)
+
+        self.assertEqual(len(endpoint.requests[0]), 4)
+        self.assertEqual(
+            self._get_states(records),
+            [RECORD_CANCELLED_STATE] + [RECORD_SUCCESS_STATE] * 4,
+        )
+
+
+class UsesBatchesTests(SimpleTestCase):
+
+    def test_batched_repeaters(self):
+        for repeater_class in (LocationRepeater, UserRepeater):
+            repeater = repeater_class(domain='test', url='http://localhost/', batch_size=10)
+            self.assertTrue(repeater.uses_batches, repeater_class.__name__)
+
+    def test_batch_size_one_is_not_batched(self):
+        repeater = LocationRepeater(domain='test', url='http://localhost/', batch_size=1)
+        self.assertFalse(repeater.uses_batches)
+
+    def test_per_record_url_or_headers_are_not_batched(self):
+        # These set the URL or headers for each record, which one request can't carry
+        for repeater_class, format_ in [
+            (FormRepeater, 'form_json'),
+            (CaseRepeater, 'case_json'),
+            (CreateCaseRepeater, 'case_json'),
+            (UpdateCaseRepeater, 'case_json'),
+            (ShortFormRepeater, 'short_form_json'),
+        ]:
+            repeater = repeater_class(domain='test', url='http://localhost/', format=format_, batch_size=10)
+            self.assertEqual(repeater.generator.content_type, 'application/json')
+            self.assertFalse(repeater.uses_batches, repeater_class.__name__)
+
+
+class GetBatchResultsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.repeater = LocationRepeater(domain='test', url='http://localhost/', batch_size=3)
+        self.records = [RepeatRecord(), RepeatRecord()]
+
+    def test_whole_batch(self):
+        response = MockResponse(status_code=200, reason='OK')
+        self.assertEqual(self.repeater.get_batch_results(response, self.records), [response, response])
+
+    def test_multi_status(self):
+        response = _MultiStatusResponse('[{"status": 201}, {"status": 400, "reason": "Bad"}]')
+        results = self.repeater.get_batch_results(response, self.records)
+        self.assertEqual([(r.status_code, r.reason) for r in results], [(201, ''), (400, 'Bad')])
+        self.assertIsInstance(results[0], BatchItemResponse)
+
+    def test_multi_status_wrong_length(self):
+        response = _MultiStatusResponse('[{"status": 201}]')
+        results = self.repeater.get_batch_results(response, self.records)
+        self.assertEqual([type(r) for r in results], [ValueError, ValueError])
+
+
+class _MultiStatusResponse(object):
+    status_code = 207
+    reason = 'Multi-Status'
+
+    def __init__(self, text):
+        self.text = text
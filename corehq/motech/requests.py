@@ -1,12 +1,18 @@
 import logging
+import os
+import threading
 from functools import wraps
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
 
 from django.conf import settings
 
 import attr
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
 from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 
 from dimagi.utils.logging import notify_exception
 
@@ -20,6 +26,7 @@ from corehq.motech.const import (
 )
 from corehq.motech.models import RequestLog
 from corehq.motech.utils import pformat_json, unpack_request_args
+from corehq.util.metrics import metrics_histogram_timer
 
 
 @attr.s(frozen=True)
@@ -68,6 +75,66 @@ def log_request(self, func, logger):
     return request_wrapper
 
 
+class SessionPool(object):
+    """
+    Process-wide ``requests`` sessions, one per remote host
+
+    Requests to the same host reuse its session's pool of keep-alive
+    connections instead of opening a new connection (and doing a new TLS
+    handshake) each time. Sessions do not keep cookies, so that requests
+    for different domains do not share state.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._pid = os.getpid()
+
+    def get_session(self, url):
+        host = _get_host(url)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Do not share the parent process's sockets after a fork
+                self._sessions = {}
+                self._pid = os.getpid()
+            if host not in self._sessions:
+                self._sessions[host] = _get_pooled_session()
+            return self._sessions[host]
+
+    def clear(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+def _get_pooled_session():
+    retry = Retry(
+        total=settings.MOTECH_REQUEST_RETRIES,
+        # As with requests' default, do not retry read errors, so that a
+        # read timeout is still raised as ReadTimeout
+        read=False,
+        backoff_factor=settings.MOTECH_REQUEST_RETRY_BACKOFF_FACTOR,
+        # Only idempotent methods are retried for these statuses
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=settings.MOTECH_SESSION_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def _get_host(url):
+    parts = urlparse(url)
+    return '{}://{}'.format(parts.scheme, parts.netloc)
+
+
+session_pool = SessionPool()
+
+
 class Requests(object):
     """
     Wraps the requests library to simplify use with JSON REST APIs.
@@ -135,6 +202,12 @@ class Requests(object):
         kwargs.setdefault('timeout', REQUEST_TIMEOUT)
         if self._session:
             response = self._session.request(method, *args, **kwargs)
+        elif settings.MOTECH_SESSION_POOLING:
+            url = args[0] if args else kwargs['url']
+            with metrics_histogram_timer(
+                'commcare.motech.request.duration', timing_buckets=(0.1, 0.5, 1, 5, 20, 60)
+            ):
+                response = session_pool.get_session(url).request(method, *args, **kwargs)
         else:
             # Mimics the behaviour of requests.api.request()
             with requests.Session() as session:
@@ -1,13 +1,17 @@
 import json
 
 from django.conf import settings
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
 
 import requests
 from mock import Mock, patch
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ReadTimeoutError
 
 from corehq.motech.const import REQUEST_TIMEOUT
-from corehq.motech.requests import Requests
+from corehq.motech.repeaters.tests.fake_endpoint import FakeEndpoint
+from corehq.motech.requests import Requests, session_pool
 
 TEST_API_URL = 'http://localhost:9080/api/'
 TEST_API_USERNAME = 'admin'
@@ -151,3 +155,81 @@ class RequestsTests(SimpleTestCase):
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=['foo@example.com', 'bar@example.com']
             )
+
+
+class SessionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        session_pool.clear()
+
+    def tearDown(self):
+        session_pool.clear()
+
+    def _send(self, url, count):
+        requests = Requests(TEST_DOMAIN, url, TEST_API_USERNAME, TEST_API_PASSWORD, logger=noop_logger)
+        for i in range(count):
+            response = requests.post('api', json={'i': i})
+            self.assertEqual(response.status_code, 200)
+
+    def _get_adapters_used(self, count):
+        response = requests.Response()
+        response.status_code = 200
+        with patch.object(HTTPAdapter, 'send', autospec=True, return_value=response) as send:
+            self._send(TEST_API_URL, count)
+        return {call[0][0] for call in send.call_args_list}
+
+    def test_sessions_per_host(self):
+        session = session_pool.get_session('https://example.com/api/')
+        self.assertIs(session_pool.get_session('https://example.com/other/'), session)
+        self.assertIsNot(session_pool.get_session('https://example.org/api/'), session)
+        self.assertIsNot(session_pool.get_session('http://example.com/api/'), session)
+
+    def test_pooled_requests_reuse_connections(self):
+        with override_settings(MOTECH_SESSION_POOLING=True), FakeEndpoint() as endpoint:
+            self._send(endpoint.url, 20)
+        self.assertEqual(len(endpoint.requests), 20)
+        self.assertEqual(endpoint.connection_count, 1)
+
+    def test_unpooled_requests_open_connections(self):
+        with override_settings(MOTECH_SESSION_POOLING=False), FakeEndpoint() as endpoint:
+            self._send(endpoint.url, 20)
+        self.assertEqual(endpoint.connection_count, 20)
+
+    @override_settings(MOTECH_SESSION_POOLING=True)
+    def test_pooled_sessions_reject_cookies(self):
+        with FakeEndpoint(headers={'Set-Cookie': 'sessionid=abc; Path=/'}) as endpoint:
+            self._send(endpoint.url, 1)
+            session = session_pool.get_session(endpoint.url)
+        self.assertEqual(len(session.cookies), 0)
+
+    @override_settings(
+        MOTECH_SESSION_POOLING=True,
+        MOTECH_REQUEST_RETRIES=2,
+        MOTECH_REQUEST_RETRY_BACKOFF_FACTOR=0,
+    )
+    def test_pooled_retries_idempotent_requests(self):
+        with FakeEndpoint(status_code=503) as endpoint:
+            requests = Requests(TEST_DOMAIN, endpoint.url, TEST_API_USERNAME, TEST_API_PASSWORD,
+                                logger=noop_logger)
+            self.assertEqual(requests.get('api').status_code, 503)
+            self.assertEqual(endpoint.request_count, 3)
+            self.assertEqual(requests.post('api', json={}).status_code, 503)
+            self.assertEqual(endpoint.request_count, 4)
+
+    @override_settings(MOTECH_SESSION_POOLING=True)
+    def test_pooled_requests_share_adapter(self):
+        adapters = self._get_adapters_used(5)
+        self.assertEqual(len(adapters), 1)
+        adapter, = adapters
+        self.assertIs(adapter, session_pool.get_session(TEST_API_URL).get_adapter(TEST_API_URL))
+
+    @override_settings(MOTECH_SESSION_POOLING=False)
+    def test_unpooled_requests_use_new_adapters(self):
+        self.assertEqual(len(self._get_adapters_used(5)), 5)
+
+    @override_settings(MOTECH_SESSION_POOLING=True, MOTECH_REQUEST_RETRIES=0)
+    def test_pooled_read_timeout(self):
+        read_timeout = ReadTimeoutError(None, TEST_API_URL, 'Read timed out.')
+        with patch.object(HTTPConnectionPool, '_make_request', side_effect=read_timeout):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self._send(TEST_API_URL, 1)
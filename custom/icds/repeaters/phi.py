@@ -13,6 +13,8 @@ from custom.icds.repeaters.generators.phi import (
 
 
 class BasePHIRepeater(CaseRepeater):
+    _supports_batches = False
+
     @classmethod
     def available_for_domain(cls, domain):
         return toggles.PHI_CAS_INTEGRATION.enabled(domain)
@@ -509,6 +509,70 @@ FIXTURE_GENERATORS = [
     "custom.m4change.fixtures.location_fixtures.generator",
 ]
 
+# Store cached restore payloads gzip compressed in the blob db
+COMPRESS_CACHED_RESTORES = False
+
+# Livequery restores fetch cases in batches of this size. With a positive
+# queue depth, batches are fetched on a separate thread up to this many
+# batches ahead of XML serialization.
+LIVEQUERY_BATCH_SIZE = 1000
+LIVEQUERY_PREFETCH_QUEUE_DEPTH = 0
+
+# Store the case state of sync logs in a compact binary format. It is
+# smaller than JSON, but slower to save (see the management command
+# benchmark_synclog_case_state)
+SYNCLOG_COMPACT_CASE_STATE = False
+
+# Convert submitted form XML to json and normalize its datetimes in a single
+# streaming pass instead of building the whole tree and walking it twice
+STREAMING_FORM_XML_PARSING = False
+
+# With a positive partition count, check_repeaters splits domains across
+# that many tasks, each enqueuing due repeat records in chunks of this size
+CHECK_REPEATERS_PARTITION_COUNT = 0
+CHECK_REPEATERS_CHUNK_SIZE = 1000
+
+# Send MOTECH requests through process-wide sessions that keep a pool of
+# connections to each remote host, retrying failed connections and
+# idempotent requests that get a 502, 503 or 504 response
+MOTECH_SESSION_POOLING = False
+MOTECH_SESSION_POOL_SIZE = 10
+MOTECH_REQUEST_RETRIES = 0
+MOTECH_REQUEST_RETRY_BACKOFF_FACTOR = 0.5
+
+# Leave lookup tables that have not changed since the last sync out of
+# restores, tracking what each phone has with fingerprints on its sync logs
+INCREMENTAL_ITEM_LIST_FIXTURES = False
+
+# Keep recently read S3 blobs of the given types on local disk. Maps type
+# code names to the size of the largest blob of that type to cache. Example:
+# BLOB_DB_CACHE = {
+#     "dir": "/opt/data/blobdb-cache",
+#     "max_bytes": 2 * 1024 ** 3,
+#     "type_codes": {"form_xml": 1024 ** 2, "commcarebuild": None},
+# }
+BLOB_DB_CACHE = None
+
+# Share serialized location fixtures between users assigned to the same
+# locations. Cached fixtures are invalidated when a domain's locations change.
+# Changes are not tracked while this is off, so fixtures cached before it was
+# turned off may be served until they expire (after a day) if it is turned
+# back on.
+CACHE_LOCATION_FIXTURES = False
+
+# number of threads the case importer uses to submit caseblock chunks
+# concurrently. 0 or 1 submits them one at a time.
+CASE_IMPORTER_SUBMISSION_WORKERS = 0
+
+# check the criteria of automatic case update rules in postgres where
+# possible so rule runs only load candidate cases
+AUTO_UPDATE_RULE_SQL_FILTER = False
+
+# number of threads the form multimedia export uses to fetch attachments
+# ahead of streaming them to the blob db. 0 or 1 fetches them one at a time
+# and builds the zip file in a temporary file before uploading it.
+MULTIMEDIA_EXPORT_FETCH_WORKERS = 0
+
 ### Shared drive settings ###
 # Also see section after localsettings import
 SHARED_DRIVE_ROOT = None
@@ -911,6 +975,16 @@ NO_DEVICE_LOG_ENVS = list(ICDS_ENVS) + ['production']
 
 UCR_COMPARISONS = {}
 
+# evaluate UCR data sources over a whole pillow chunk at once instead of doc by doc
+UCR_BULK_TRANSFORM = False
+# load the docs referenced by related_doc expressions for a whole pillow chunk at once
+UCR_PREFETCH_RELATED_DOCS = False
+# number of threads the UCR pillow uses to process the domains in a chunk (and
+# the adapters in a domain) concurrently. 0 or 1 processes them sequentially.
+UCR_PILLOW_WORKERS = 0
+# skip evaluating a UCR data source for changes that didn't modify any property it reads
+UCR_SKIP_UNAFFECTED_CHANGES = False
+
 MAX_RULE_UPDATES_IN_ONE_RUN = 10000
 
 DEFAULT_ODATA_FEED_LIMIT = 25